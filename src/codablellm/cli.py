@@ -12,15 +12,17 @@ from click import BadParameter
 from rich import print
 from rich.prompt import Confirm
 from typer import Argument, Exit, Option, prompt, Typer
-from typing import Callable, Dict, Final, List, Optional, Tuple
+from typing import Any, Callable, Dict, Final, List, Optional, Tuple
 
 import codablellm
 from codablellm.core import downloader
+from codablellm.core.cache import DecompileCache
 from codablellm.core.decompiler import DecompileConfig
 from codablellm.core.extractor import ExtractConfig
 from codablellm.core.function import SourceFunction
-from codablellm.dataset import DecompiledCodeDatasetConfig, SourceCodeDatasetConfig
-from codablellm.decompilers.ghidra import Ghidra
+from codablellm.dataset import (DecompiledCodeDatasetConfig, DwarfMapper, SourceCodeDataset,
+                                SourceCodeDatasetConfig, default_mapper)
+from codablellm.decompilers.ghidra import Ghidra, GhidraProjectCache
 from codablellm.repoman import ManageConfig
 
 logger = logging.getLogger('codablellm')
@@ -100,8 +102,9 @@ def show_version(show: bool) -> None:
 
 
 # Arguments
-REPO: Final[Path] = Argument(file_okay=False, exists=True, show_default=False,
-                             help='Path to the local repository.')
+REPO: Final[Path] = Argument(exists=True, show_default=False,
+                             help='Path to the local repository, or to a tarball or zip file of '
+                             'the repository if a source code dataset is being created.')
 SAVE_AS: Final[Path] = Argument(dir_okay=False, show_default=False,
                                 callback=validate_dataset_format,
                                 help='Path to save the dataset at.')
@@ -124,6 +127,13 @@ CHECKPOINT: Final[int] = Option(DEFAULT_SOURCE_CODE_DATASET_CONFIG.extract_confi
                                 min=0,
                                 help='Number of extraction entries after which a backup dataset '
                                 'file will be saved in case of a crash.')
+COMPILE_COMMANDS: Final[Optional[Path]] = Option(DEFAULT_SOURCE_CODE_DATASET_CONFIG.extract_config.compile_commands,
+                                                '--compile-commands', dir_okay=False, exists=True,
+                                                metavar='FILE',
+                                                help='Path to a compilation database '
+                                                '(compile_commands.json). Only the translation '
+                                                'units listed in it and the headers they include '
+                                                'will be extracted.')
 CLEANUP: Final[Optional[str]] = Option(DEFAULT_MANAGE_CONFIG.cleanup_command,
                                        '--cleanup', '-c', metavar='COMMAND',
                                        help='If --decompile is specified, the repository will be '
@@ -134,10 +144,17 @@ DECOMPILE: Final[bool] = Option(False, '--decompile / --source', '-d / -s',
                                 '--decompiler to decompile the binaries specified by the bins '
                                 'argument and add decompiled code to the dataset.')
 DECOMPILER: Final[str] = Option(codablellm.decompiler.DECOMPILER['class_path'],
-                                help='Decompiler to use.',
+                                help='Decompiler to use, either the class path of a '
+                                'Decompiler subclass or the name of a built-in decompiler '
+                                f'({", ".join(codablellm.decompiler.DECOMPILER_ALIASES)}).',
                                 metavar='CLASSPATH')
 DEBUG: Final[bool] = Option(False, '--debug', callback=toggle_debug_logging,
                             hidden=True)
+DWARF: Final[bool] = Option(False, '--dwarf',
+                            help='Map decompiled functions to the source code functions they '
+                            'were compiled from with the DWARF debug information of the '
+                            'binaries, instead of by name. The binaries must be ELF binaries '
+                            'built with debug information.')
 EXCLUDE_SUBPATH: Final[Optional[List[Path]]] = Option(list(DEFAULT_SOURCE_CODE_DATASET_CONFIG.extract_config.exclude_subpaths),
                                                       '--exclude-subpath', '-e',
                                                       help='Path relative to the repository '
@@ -159,6 +176,18 @@ GHIDRA: Final[Optional[Path]] = Option(Ghidra.get_path(), envvar=Ghidra.ENVIRON_
                                        callback=lambda v: Ghidra.set_path(
                                            v) if v else None,
                                        help="Path to Ghidra's analyzeHeadless command.")
+GHIDRA_PROJECT_CACHE: Final[Optional[Path]] = Option(None, file_okay=False, dir_okay=True,
+                                                     metavar='DIR',
+                                                     help='Directory of a cache of Ghidra projects. '
+                                                     'Binaries that were already imported are '
+                                                     'opened from their cached project instead of '
+                                                     'being imported again.')
+GHIDRA_PROJECT_CACHE_SIZE: Final[Optional[int]] = Option(None, min=1, metavar='MB',
+                                                          help='Maximum total size of the Ghidra '
+                                                          'project cache in megabytes. The least '
+                                                          'recently used projects are evicted '
+                                                          'first. By default, the cache is not '
+                                                          'limited.')
 GIT: Final[bool] = Option(False, '--git / --archive', help='Determines whether --url is a Git '
                           'download URL or a tarball/zipfile download URL.')
 BUILD_ERROR_HANDLING: Final[CommandErrorHandler] = Option(DEFAULT_MANAGE_CONFIG.build_error_handling,
@@ -171,14 +200,40 @@ CLEANUP_ERROR_HANDLING: Final[CommandErrorHandler] = Option(DEFAULT_MANAGE_CONFI
                                                             'during the cleanup process. Options include '
                                                             'ignoring the error, raising an exception, or '
                                                             'prompting the user for manual intervention.')
+MAPPING_WORKERS: Final[int] = Option(DEFAULT_DECOMPILED_CODE_DATASET_CONFIG.mapping_workers,
+                                     min=1,
+                                     help='Number of workers to use to map decompiled '
+                                     'functions to source code functions in parallel.')
 MAX_DECOMPILER_WORKERS: Final[Optional[int]] = Option(DEFAULT_DECOMPILED_CODE_DATASET_CONFIG.decompiler_config.max_workers,
                                                       min=1,
                                                       help='Maximum number of workers to use to '
                                                       'decompile binaries in parallel.')
+DECOMPILER_MEMORY: Final[Optional[int]] = Option(None, min=1, metavar='MB',
+                                                 help='Estimated peak memory of each decompiler '
+                                                 'worker in megabytes, which limits the number of '
+                                                 'workers to the available memory. By default, '
+                                                 "the decompiler's own estimate is used.")
+DECOMPILE_CACHE: Final[Optional[Path]] = Option(None, file_okay=False, dir_okay=True,
+                                                metavar='DIR',
+                                                help='Directory of a cache of decompiled binaries. '
+                                                'Cached binaries are not decompiled again, and '
+                                                'interrupted runs resume where they stopped.')
+DEDUPLICATE_FUNCTIONS: Final[bool] = Option(DEFAULT_DECOMPILED_CODE_DATASET_CONFIG.decompiler_config.deduplicate_functions,
+                                            '--deduplicate-functions',
+                                            help='Only keep one copy of functions with identical '
+                                            'assembly in different binaries, such as statically '
+                                            'linked library code.')
+DECOMPILE_TIMEOUT: Final[Optional[float]] = Option(DEFAULT_DECOMPILED_CODE_DATASET_CONFIG.decompiler_config.timeout,
+                                                   min=1,
+                                                   help='Seconds the decompiler may spend on a '
+                                                   'single function before it is skipped.')
 MAX_EXTRACTOR_WORKERS: Final[Optional[int]] = Option(DEFAULT_SOURCE_CODE_DATASET_CONFIG.extract_config.max_workers,
                                                      min=1,
                                                      help='Maximum number of workers to use to '
                                                      'extract source code functions in parallel.')
+SKIP_OBJECT_FILES: Final[bool] = Option(DEFAULT_DECOMPILED_CODE_DATASET_CONFIG.decompiler_config.skip_object_files,
+                                        '--skip-object-files',
+                                        help='Do not decompile relocatable object files.')
 VERBOSE: Final[bool] = Option(False, '--verbose', '-v',
                               callback=toggle_logging,
                               help='Display verbose logging information.')
@@ -203,6 +258,14 @@ REPO_CLEANUP_ARG: Final[bool] = Option(False, '--repo-cleanup-arg', '-C',
                                        'specified with --cleanup. This may be useful '
                                        'when --generation-mode temp or '
                                        '--generation-mode temp-append is specified.')
+REVISION: Final[Optional[List[str]]] = Option(None, '--revision', '-r', metavar='REV',
+                                              help='Create a source code dataset from the Git '
+                                              'object database of the repository at the specified '
+                                              'commit, tag, or branch, without checking out the '
+                                              'working tree. Specify multiple revisions or a '
+                                              'commit range (e.g. v1.0..v2.0) to mine the history '
+                                              'of the repository, extracting each unique file only '
+                                              'once.')
 STRIP: Final[bool] = Option(DEFAULT_DECOMPILED_CODE_DATASET_CONFIG.strip,
                             help='If a decompiled dataset is being created, strip the symbols '
                             'after decompiling')
@@ -221,18 +284,29 @@ def command(repo: Path = REPO, save_as: Path = SAVE_AS, bins: Optional[List[Path
             cleanup: Optional[str] = CLEANUP,
             cleanup_error_handling: CommandErrorHandler = CLEANUP_ERROR_HANDLING,
             checkpoint: int = CHECKPOINT,
+            compile_commands: Optional[Path] = COMPILE_COMMANDS,
             debug: bool = DEBUG, decompile: bool = DECOMPILE,
+            decompile_cache: Optional[Path] = DECOMPILE_CACHE,
+            decompile_timeout: Optional[float] = DECOMPILE_TIMEOUT,
             decompiler: str = DECOMPILER,
+            decompiler_memory: Optional[int] = DECOMPILER_MEMORY,
+            deduplicate_functions: bool = DEDUPLICATE_FUNCTIONS,
+            dwarf: bool = DWARF,
             exclude_subpath: Optional[List[Path]] = EXCLUDE_SUBPATH,
             exclusive_subpath: Optional[List[Path]] = EXCLUSIVE_SUBPATH,
             extractors: Optional[Tuple[ExtractorConfigOperation,
                                        Path]] = EXTRACTORS,
             generation_mode: GenerationMode = GENERATION_MODE,
             git: bool = GIT, ghidra: Optional[Path] = GHIDRA,
+            ghidra_project_cache: Optional[Path] = GHIDRA_PROJECT_CACHE,
+            ghidra_project_cache_size: Optional[int] = GHIDRA_PROJECT_CACHE_SIZE,
+            mapping_workers: int = MAPPING_WORKERS,
             max_decompiler_workers: Optional[int] = MAX_DECOMPILER_WORKERS,
             max_extractor_workers: Optional[int] = MAX_EXTRACTOR_WORKERS,
             repo_build_arg: bool = REPO_BUILD_ARG,
             repo_cleanup_arg: bool = REPO_CLEANUP_ARG,
+            revision: Optional[List[str]] = REVISION,
+            skip_object_files: bool = SKIP_OBJECT_FILES,
             strip: bool = STRIP,
             transform: Optional[codablellm.extractor.Transform] = TRANSFORM,
             use_checkpoint: Optional[bool] = USE_CHECKPOINT,
@@ -284,7 +358,8 @@ def command(repo: Path = REPO, save_as: Path = SAVE_AS, bins: Optional[List[Path
             exclusive_subpath) if exclusive_subpath else set(),
         exclude_subpaths=set(exclude_subpath) if exclude_subpath else set(),
         checkpoint=checkpoint,
-        use_checkpoint=use_checkpoint
+        use_checkpoint=use_checkpoint,
+        compile_commands=compile_commands
     )
     if build:
         logger.warning('--build specified without --decompile. --decompile enabled '
@@ -292,14 +367,38 @@ def command(repo: Path = REPO, save_as: Path = SAVE_AS, bins: Optional[List[Path
         decompile = True
     # Create source code/decompiled code dataset
     if decompile:
+        if repo.is_file():
+            raise BadParameter('Decompiled code datasets must be created from a repository '
+                               'directory.', param_hint='repo')
         if not bins or not any(bins):
             raise BadParameter('Must specify at least one binary for decompiled code datasets.',
                                param_hint='bins')
+        decompiler_kwargs: Dict[str, Any] = {}
+        if ghidra_project_cache:
+            if not issubclass(codablellm.decompiler.get_decompiler_class(), Ghidra):
+                raise BadParameter('The Ghidra project cache can only be used with Ghidra.',
+                                   param_hint='--ghidra-project-cache')
+            decompiler_kwargs['project_cache'] = GhidraProjectCache(
+                ghidra_project_cache,
+                max_size=ghidra_project_cache_size * 2 ** 20 if ghidra_project_cache_size
+                else None
+            )
+        elif ghidra_project_cache_size:
+            raise BadParameter('--ghidra-project-cache must be specified.',
+                               param_hint='--ghidra-project-cache-size')
         dataset_config = DecompiledCodeDatasetConfig(
             extract_config=extract_config,
             strip=strip,
+            mapper=DwarfMapper() if dwarf else default_mapper,
+            mapping_workers=mapping_workers,
             decompiler_config=DecompileConfig(
-                max_workers=max_decompiler_workers
+                max_workers=max_decompiler_workers,
+                timeout=decompile_timeout,
+                skip_object_files=skip_object_files,
+                decompiler_kwargs=decompiler_kwargs,
+                cache=DecompileCache(decompile_cache) if decompile_cache else None,
+                worker_memory=decompiler_memory * 2 ** 20 if decompiler_memory else None,
+                deduplicate_functions=deduplicate_functions
             )
         )
         if not build:
@@ -325,6 +424,18 @@ def command(repo: Path = REPO, save_as: Path = SAVE_AS, bins: Optional[List[Path
                                                  generation_mode=generation_mode,  # type: ignore
                                                  repo_arg_with=repo_arg_with
                                                  )
+    elif revision:
+        # Extract directly from the Git object database
+        if len(revision) > 1 or '..' in revision[0]:
+            dataset = SourceCodeDataset.from_history(repo,
+                                                     revision if len(revision) > 1 else revision[0],
+                                                     config=extract_config)
+        else:
+            dataset = SourceCodeDataset.from_revision(repo, revision=revision[0],
+                                                      config=extract_config)
+    elif repo.is_file():
+        # Extract directly from the archive without unpacking it
+        dataset = SourceCodeDataset.from_archive(repo, config=extract_config)
     else:
         dataset_config = SourceCodeDatasetConfig(
             generation_mode=str(generation_mode),  # type: ignore
@@ -8,10 +8,12 @@ from codablellm.core.dashboard import (
 from codablellm.core import extractor, decompiler
 from codablellm.core.function import DecompiledFunction, Function, SourceFunction
 from codablellm.core.extractor import ExtractConfig
+from codablellm.core.cache import DecompileCache
 from codablellm.core.decompiler import DecompileConfig
-from codablellm.core.utils import rate_limiter
+from codablellm.core.utils import ASTEdit, ASTEditor, rate_limiter
 
 __all__ = ['Progress', 'SubmitCallable',
            'CallablePoolProgress', 'ProcessPoolProgress', 'Function',
            'SourceFunction', 'DecompiledFunction', 'extractor',
-           'ExtractConfig', 'decompiler', 'DecompileConfig', 'rate_limiter']
+           'ExtractConfig', 'decompiler', 'DecompileConfig', 'DecompileCache', 'rate_limiter',
+           'ASTEdit', 'ASTEditor']
@@ -0,0 +1,182 @@
+'''
+An on-disk, content-addressed cache of decompiled functions.
+'''
+
+from dataclasses import dataclass, field
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, List, Mapping, Optional, Sequence
+
+from codablellm.core.function import DecompiledFunction
+from codablellm.core.utils import PathLike
+
+logger = logging.getLogger('codablellm')
+
+
+def get_default_cache_dir() -> Path:
+    '''
+    Retrieves the default directory of the decompilation cache, which is
+    `$XDG_CACHE_HOME/codablellm/decompiled` (or `~/.cache/codablellm/decompiled`).
+
+    Returns:
+        The default cache directory.
+    '''
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    return (Path(cache_home) if cache_home else Path.home() / '.cache') / 'codablellm' / \
+        'decompiled'
+
+
+def get_file_hash(path: PathLike, chunk_size: int = 1 << 20) -> str:
+    '''
+    Computes the SHA-256 digest of a file.
+
+    Parameters:
+        path: The file to hash.
+        chunk_size: Number of bytes read at a time.
+
+    Returns:
+        The hexadecimal SHA-256 digest of the file's contents.
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _to_key_json(value: Any) -> Any:
+    # Sets have no order, so they are sorted to produce a stable key
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+@dataclass(frozen=True)
+class DecompileCache:
+    '''
+    An on-disk cache of the decompiled functions of binaries.
+
+    Entries are keyed by the SHA-256 digest of a binary together with the decompiler and its
+    configuration, so identical binaries at different paths share an entry and changing the
+    decompiler invalidates it. When `max_size` is exceeded, the least recently used entries are
+    evicted.
+    '''
+
+    path: Path = field(default_factory=get_default_cache_dir)
+    '''
+    The directory the cache entries are stored in.
+    '''
+    max_size: Optional[int] = None
+    '''
+    The maximum total size of the cache entries in bytes, or `None` for no limit.
+    '''
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'path', Path(self.path))
+        if self.max_size is not None and self.max_size < 0:
+            raise ValueError('Max size must be a non-negative integer')
+
+    def get_key(self, binary_hash: str, decompiler_class_path: str,
+                decompiler_args: Sequence[Any] = (),
+                decompiler_kwargs: Mapping[str, Any] = {}, version: str = '') -> str:
+        '''
+        Derives the key of a binary's cache entry.
+
+        Parameters:
+            binary_hash: The SHA-256 digest of the binary.
+            decompiler_class_path: The class path of the decompiler.
+            decompiler_args: Positional arguments passed to the decompiler.
+            decompiler_kwargs: Keyword arguments passed to the decompiler.
+            version: The version of the decompiler's output, such as a digest of its scripts.
+
+        Returns:
+            The key of the cache entry.
+        '''
+        configuration = json.dumps([decompiler_class_path, list(decompiler_args),
+                                    dict(decompiler_kwargs), version],
+                                   sort_keys=True, default=_to_key_json)
+        configuration_hash = hashlib.sha256(configuration.encode()).hexdigest()
+        return f'{binary_hash}-{configuration_hash[:16]}'
+
+    def _get_entry_path(self, key: str) -> Path:
+        return self.path / key[:2] / f'{key}.json'
+
+    def load(self, key: str, path: PathLike) -> Optional[List[DecompiledFunction]]:
+        '''
+        Loads the decompiled functions of a binary from the cache.
+
+        Parameters:
+            key: The key of the binary's cache entry.
+            path: The path of the binary, which the loaded functions are relocated to.
+
+        Returns:
+            The decompiled functions of the binary, or `None` if the binary is not cached.
+        '''
+        entry_path = self._get_entry_path(key)
+        try:
+            json_objects = json.loads(entry_path.read_text())
+            # Mark the entry as recently used
+            os.utime(entry_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return [DecompiledFunction.from_json(j).with_path(Path(path)) for j in json_objects]
+
+    def store(self, key: str, functions: Sequence[DecompiledFunction]) -> None:
+        '''
+        Stores the decompiled functions of a binary in the cache, evicting the least recently
+        used entries if the cache grows too large.
+
+        Parameters:
+            key: The key of the binary's cache entry.
+            functions: The decompiled functions of the binary.
+        '''
+        entry_path = self._get_entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that an interrupted write never leaves a
+        # truncated entry behind
+        temp_path = entry_path.with_suffix(f'.{os.getpid()}.tmp')
+        temp_path.write_text(json.dumps([f.to_json() for f in functions]))
+        os.replace(temp_path, entry_path)
+        logger.debug(f'Cached {len(functions)} decompiled functions as "{key}"')
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes an entry from the cache, if it exists.
+
+        Parameters:
+            key: The key of the cache entry.
+        '''
+        self._get_entry_path(key).unlink(missing_ok=True)
+
+    def evict(self, max_size: int) -> None:
+        '''
+        Removes the least recently used entries until the cache is no larger than `max_size`.
+
+        Parameters:
+            max_size: The maximum total size of the cache entries in bytes.
+        '''
+        entries = []
+        for entry_path in self.path.glob('*/*.json'):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        size = sum(s for _, s, _ in entries)
+        for _, entry_size, entry_path in sorted(entries):
+            if size <= max_size:
+                break
+            entry_path.unlink(missing_ok=True)
+            size -= entry_size
+            logger.debug(f'Evicted "{entry_path.stem}" from the decompilation cache')
+
+    def clear(self) -> None:
+        '''
+        Removes all entries from the cache.
+        '''
+        self.evict(0)
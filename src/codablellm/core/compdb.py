@@ -0,0 +1,280 @@
+'''
+Functionality for reading compilation databases (`compile_commands.json`).
+'''
+
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import shlex
+from typing import Dict, Final, List, Mapping, Optional, Sequence, Set, Tuple
+
+from codablellm.core.utils import PathLike
+
+logger = logging.getLogger('codablellm')
+
+INCLUDE_PATTERN: Final[re.Pattern[bytes]] = re.compile(
+    rb'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\n]+)[>"]', re.MULTILINE
+)
+'''
+Regular expression for locating `#include` directives in C source code.
+'''
+PATH_OPTIONS: Final[Tuple[str, ...]] = ('-iquote', '-isystem', '-idirafter', '-include', '-I',
+                                        '-o')
+'''
+Compiler options whose values are paths.
+'''
+
+
+def remap_path(path: Path, prefix_map: Mapping[Path, Path]) -> Path:
+    '''
+    Replaces the longest directory of a prefix map that contains a path with the directory it
+    maps to, like `-fdebug-prefix-map`.
+
+    Parameters:
+        path: The path to remap.
+        prefix_map: Maps directories to the directories that replace them.
+
+    Returns:
+        The remapped path, or `path` if no directory of `prefix_map` contains it.
+    '''
+    for prefix in sorted(prefix_map, key=lambda p: len(Path(p).parts), reverse=True):
+        try:
+            return Path(prefix_map[prefix]) / path.relative_to(prefix)
+        except ValueError:
+            continue
+    return path
+
+
+def _remap_arguments(arguments: Sequence[str],
+                     prefix_map: Mapping[Path, Path]) -> Tuple[str, ...]:
+    remapped: List[str] = []
+    remap_next = False
+    for argument in arguments:
+        if remap_next:
+            remap_next = False
+            if os.path.isabs(argument):
+                argument = str(remap_path(Path(argument), prefix_map))
+        else:
+            for option in PATH_OPTIONS:
+                if argument == option:
+                    remap_next = True
+                    break
+                if argument.startswith(option) and os.path.isabs(argument[len(option):]):
+                    argument = option + str(remap_path(Path(argument[len(option):]),
+                                                       prefix_map))
+                    break
+        remapped.append(argument)
+    return tuple(remapped)
+
+
+@dataclass(frozen=True)
+class CompileCommand:
+    '''
+    An entry of a compilation database, describing how a single translation unit is compiled.
+    '''
+
+    directory: Path
+    '''
+    The working directory of the compilation.
+    '''
+    file: Path
+    '''
+    The absolute path to the main source file of the translation unit.
+    '''
+    arguments: Tuple[str, ...]
+    '''
+    The compiler invocation, split into arguments.
+    '''
+    output: Optional[Path] = None
+    '''
+    The absolute path to the file produced by the compilation, if known.
+    '''
+
+    def _get_option_values(self, *options: str) -> List[str]:
+        values: List[str] = []
+        arguments = iter(self.arguments)
+        for argument in arguments:
+            for option in options:
+                if argument == option:
+                    value = next(arguments, None)
+                    if value is not None:
+                        values.append(value)
+                    break
+                elif argument.startswith(option):
+                    values.append(argument[len(option):])
+                    break
+        return values
+
+    @property
+    def quote_include_dirs(self) -> List[Path]:
+        '''
+        Directories searched only for `#include "..."` directives (`-iquote`).
+        '''
+        return [self.directory / d for d in self._get_option_values('-iquote')]
+
+    @property
+    def include_dirs(self) -> List[Path]:
+        '''
+        Directories searched for all `#include` directives (`-I`, `-isystem`, `-idirafter`).
+        '''
+        return [self.directory / d
+                for d in self._get_option_values('-I', '-isystem', '-idirafter')]
+
+    @property
+    def forced_includes(self) -> List[Path]:
+        '''
+        Files included before the main source file (`-include`).
+        '''
+        return [self.directory / f for f in self._get_option_values('-include')]
+
+    @classmethod
+    def from_json(cls, json_obj: Mapping[str, object],
+                  prefix_map: Optional[Mapping[Path, Path]] = None) -> 'CompileCommand':
+        '''
+        Loads a compilation database entry.
+
+        Parameters:
+            json_obj: A single entry of a `compile_commands.json` file.
+            prefix_map: If specified, maps the directories the entry was compiled in to the directories they are found in on this machine, like `-fdebug-prefix-map`. The working directory, and the files and include directories of the entry are remapped.
+
+        Returns:
+            The parsed compilation database entry.
+
+        Raises:
+            ValueError: If the entry does not have a directory, file, and command or arguments.
+        '''
+        prefix_map = prefix_map or {}
+        try:
+            directory = remap_path(Path(str(json_obj['directory'])), prefix_map)
+            file = remap_path(directory / str(json_obj['file']), prefix_map)
+        except KeyError as e:
+            raise ValueError('Compilation database entries must have a "directory" and '
+                             '"file"') from e
+        if 'arguments' in json_obj:
+            arguments = tuple(str(a) for a in json_obj['arguments'])  # type: ignore
+        elif 'command' in json_obj:
+            arguments = tuple(shlex.split(str(json_obj['command'])))
+        else:
+            raise ValueError('Compilation database entries must have a "command" or '
+                             '"arguments"')
+        if prefix_map:
+            arguments = _remap_arguments(arguments, prefix_map)
+        command = cls(directory, file.resolve(), arguments)
+        if 'output' in json_obj:
+            output: Optional[str] = str(json_obj['output'])
+        else:
+            output, *_ = command._get_option_values('-o') or [None]
+        if output:
+            return cls(command.directory, command.file, command.arguments,
+                       output=remap_path(directory / output, prefix_map).resolve())
+        return command
+
+
+def load_compile_commands(path: PathLike,
+                          prefix_map: Optional[Mapping[Path, Path]] = None
+                          ) -> List[CompileCommand]:
+    '''
+    Loads a compilation database.
+
+    Parameters:
+        path: Path to a `compile_commands.json` file.
+        prefix_map: If specified, maps the directories the database was generated in to the directories they are found in on this machine, e.g. if the repository was built in a container or has been copied.
+
+    Returns:
+        All entries of the compilation database.
+    '''
+    entries = json.loads(Path(path).read_text())
+    if not isinstance(entries, list):
+        raise ValueError('Expected a compilation database to be a JSON array')
+    commands = [CompileCommand.from_json(e, prefix_map=prefix_map) for e in entries]
+    logger.info(f'Loaded {len(commands)} compile commands from "{Path(path).name}"')
+    return commands
+
+
+def _resolve_include(name: str, quoted: bool, including_file: Path,
+                     command: CompileCommand) -> Optional[Path]:
+    search_dirs: List[Path] = []
+    if quoted:
+        search_dirs.append(including_file.parent)
+        search_dirs.extend(command.quote_include_dirs)
+    search_dirs.extend(command.include_dirs)
+    for search_dir in search_dirs:
+        candidate = search_dir / name
+        if candidate.is_file():
+            return candidate.resolve()
+    return None
+
+
+def get_reachable_files(command: CompileCommand,
+                        _includes_cache: Optional[Dict[Tuple[Path, Tuple[Path, ...]],
+                                                       Set[Path]]] = None) -> Set[Path]:
+    '''
+    Locates the main source file of a translation unit and all of the headers it transitively
+    includes. Includes that cannot be found in the search directories of the compile command
+    (i.e. system headers) are ignored.
+
+    Parameters:
+        command: The compile command of the translation unit.
+
+    Returns:
+        The resolved paths of all files that belong to the translation unit.
+    '''
+    if _includes_cache is None:
+        _includes_cache = {}
+    search_key = tuple(command.quote_include_dirs + command.include_dirs)
+    reachable: Set[Path] = set()
+    pending = [command.file, *(f.resolve() for f in command.forced_includes)]
+    while pending:
+        file = pending.pop()
+        if file in reachable or not file.is_file():
+            continue
+        reachable.add(file)
+        cache_key = (file, search_key)
+        if cache_key not in _includes_cache:
+            includes: Set[Path] = set()
+            for delimiter, name in INCLUDE_PATTERN.findall(file.read_bytes()):
+                include = _resolve_include(name.decode(errors='ignore').strip(),
+                                           delimiter == b'"', file, command)
+                if include:
+                    includes.add(include)
+            _includes_cache[cache_key] = includes
+        pending.extend(_includes_cache[cache_key] - reachable)
+    return reachable
+
+
+def get_translation_units(commands: Sequence[CompileCommand]) -> Dict[Path, Set[Path]]:
+    '''
+    Maps every file reachable from a compilation database to the translation units it is
+    compiled in.
+
+    Parameters:
+        commands: The entries of a compilation database.
+
+    Returns:
+        A dictionary mapping the resolved path of each source file or header to the main source files of the translation units that reach it.
+    '''
+    translation_units: Dict[Path, Set[Path]] = {}
+    includes_cache: Dict[Tuple[Path, Tuple[Path, ...]], Set[Path]] = {}
+    for command in commands:
+        for file in get_reachable_files(command, _includes_cache=includes_cache):
+            translation_units.setdefault(file, set()).add(command.file)
+    logger.info(f'{len(translation_units)} files are reachable from '
+                f'{len({c.file for c in commands})} translation units')
+    return translation_units
+
+
+def get_translation_unit_outputs(commands: Sequence[CompileCommand]) -> Dict[Path, Path]:
+    '''
+    Maps the outputs of a compilation database (object files or directly linked executables)
+    to their translation units.
+
+    Parameters:
+        commands: The entries of a compilation database.
+
+    Returns:
+        A dictionary mapping the resolved path of each output to the main source file of its translation unit.
+    '''
+    return {c.output: c.file for c in commands if c.output}
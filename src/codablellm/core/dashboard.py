@@ -130,7 +130,9 @@ class ProcessPoolProgress(Iterator[R], Generic[I_co, R]):
         self._submit = submit
         self._iterables = iterables
         self._progress = progress
-        self._process_pool_executor = ProcessPoolExecutor(max_workers=max_workers,
+        # By default, only as many workers are started as the container's CPU quota allows
+        self._process_pool_executor = ProcessPoolExecutor(max_workers=max_workers or
+                                                          utils.get_worker_count(),
                                                           mp_context=mp_context,
                                                           initializer=initializer,
                                                           initargs=initargs,
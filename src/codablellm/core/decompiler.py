@@ -1,13 +1,22 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+import hashlib
 import importlib
+import itertools
 import logging
+import math
 from pathlib import Path
-from typing import Any, Dict, Final, List, Literal, Optional, TypedDict, Sequence, Union, overload
+import re
+from tempfile import TemporaryDirectory
+from typing import (Any, ClassVar, Collection, Dict, Final, FrozenSet, Iterator, List, Literal,
+                    Mapping, NamedTuple, Optional, Tuple, Type, TypedDict, Sequence, Union,
+                    get_args, overload)
 
+from codablellm.core.cache import DecompileCache, get_file_hash
 from codablellm.core.dashboard import CallablePoolProgress, ProcessPoolProgress, Progress
 from codablellm.core.function import DecompiledFunction
-from codablellm.core.utils import PathLike, is_binary
+from codablellm.core.utils import (PathLike, get_binary_format, get_cpu_limit, get_worker_count,
+                                   is_object_file, resolve_kwargs)
 from codablellm.exceptions import DecompilerNotFound
 
 logger = logging.getLogger('codablellm')
@@ -22,22 +31,53 @@ DECOMPILER: Final[NamedDecompiler] = {
 }
 
 
+DECOMPILER_ALIASES: Final[Dict[str, str]] = {
+    'ghidra': 'codablellm.decompilers.ghidra.Ghidra',
+    'objdump': 'codablellm.decompilers.objdump.Objdump',
+}
+'''
+Short names of the built-in decompilers, which can be used in place of their class paths.
+'''
+
+
 def set_decompiler(class_path: str) -> None:
     '''
     Sets the decompiler used by `codablellm`.
 
     Parameters:
-        class_path:  The fully qualified class path (in the form `module.submodule.ClassName`) of the subclass of `Decompiler` to use.
+        class_path:  The fully qualified class path (in the form `module.submodule.ClassName`) of the subclass of `Decompiler` to use, or the name of a built-in decompiler in `DECOMPILER_ALIASES` (e.g. `objdump`).
     '''
+    class_path = DECOMPILER_ALIASES.get(class_path.lower(), class_path)
     DECOMPILER['class_path'] = class_path
     logger.info(f'Using "{class_path}" as the decompiler')
 
 
+FunctionKind = Literal['thunk', 'external']
+'''
+Kinds of functions that can be skipped during decompilation.
+
+Supported Kinds:
+    - **`thunk`**: Functions that only jump to another function, such as PLT stubs.
+    - **`external`**: Functions that are imported from another binary and have no body.
+'''
+
+
 class Decompiler(ABC):
     '''
     Abstract base class for a decompiler that extracts decompiled functions from compiled binaries.
     '''
 
+    OPTIONS: ClassVar[FrozenSet[str]] = frozenset()
+    '''
+    The `DecompileConfig` options (e.g. `timeout`) that the decompiler accepts as keyword
+    arguments. Options that are not listed are not passed to the decompiler.
+    '''
+    SUPPORTS_SHARDING: ClassVar[bool] = False
+    '''
+    Indicates whether large binaries can be split into shards that are decompiled by separate
+    workers with `decompile_shard`.
+    '''
+
     @abstractmethod
     def decompile(self, path: PathLike) -> Sequence[DecompiledFunction]:
         '''
@@ -51,6 +91,141 @@ class Decompiler(ABC):
         '''
         pass
 
+    def decompile_many(self, paths: Sequence[PathLike]) -> Sequence[DecompiledFunction]:
+        '''
+        Decompiles a batch of binaries and retrieves all decompiled functions contained in them.
+
+        By default, each binary is decompiled in turn with `decompile`. Decompilers with a high
+        startup cost should override this method to decompile the whole batch in a single session.
+        Binaries that cannot be decompiled are logged and skipped, so that they do not discard the
+        results of the rest of the batch.
+
+        Parameters:
+            paths: The paths to the binary files to be decompiled.
+
+        Returns:
+            A sequence of `DecompiledFunction` objects representing the functions extracted from all of the binaries.
+        '''
+        return [f for _, functions in self.decompile_each(paths) for f in functions]
+
+    def decompile_each(self, paths: Sequence[PathLike]
+                       ) -> Iterator[Tuple[Path, Sequence[DecompiledFunction]]]:
+        '''
+        Decompiles a batch of binaries, yielding the decompiled functions of each binary as soon
+        as all of them are available.
+
+        By default, each binary is decompiled in turn with `decompile`. Binaries that cannot be
+        decompiled are logged and skipped, so only binaries that were completely decompiled are
+        yielded.
+
+        Parameters:
+            paths: The paths to the binary files to be decompiled.
+
+        Returns:
+            An iterator over each completely decompiled binary and its decompiled functions.
+        '''
+        for path in paths:
+            try:
+                yield Path(path), self.decompile(path)
+            except Exception as e:
+                logger.warning(f'Could not decompile "{Path(path).name}": '
+                               f'{type(e).__name__}: {e}')
+
+    def decompile_shard(self, path: PathLike, shard: int, shards: int,
+                        workspace: Path) -> Sequence[DecompiledFunction]:
+        '''
+        Decompiles one shard of a binary. The functions of the binary are split into `shards`
+        disjoint shards, so that decompiling every shard yields all of its functions.
+
+        Parameters:
+            path: The path to the binary file to be decompiled.
+            shard: The index of the shard to decompile, from `0` to `shards - 1`.
+            shards: The number of shards the binary is split into.
+            workspace: A directory shared by all shards of the binary, e.g. to import the binary only once. Shards may be decompiled concurrently by different processes.
+
+        Returns:
+            The decompiled functions of the shard.
+
+        Raises:
+            NotImplementedError: If the decompiler does not support sharding.
+        '''
+        raise NotImplementedError(f'{type(self).__name__} does not support sharding')
+
+    @classmethod
+    def get_version(cls, *args: Any, **kwargs: Any) -> str:
+        '''
+        Identifies the version of the decompiler's output, which is part of the key of cached
+        results. Decompilers should change it whenever the same binary may decompile differently,
+        e.g. when their scripts change.
+
+        Parameters:
+            args: Positional arguments that will be passed to the decompiler's `__init__` method.
+            kwargs: Keyword arguments that will be passed to the decompiler's `__init__` method.
+
+        Returns:
+            The version of the decompiler's output.
+        '''
+        return ''
+
+    @classmethod
+    def get_worker_memory(cls, paths: Sequence[Path], *args: Any,
+                          **kwargs: Any) -> Optional[int]:
+        '''
+        Estimates the peak memory of a worker that decompiles binaries, which limits how many
+        workers run concurrently. By default, the memory of a worker is unknown and only the
+        number of CPUs limits the workers.
+
+        Parameters:
+            paths: The binaries that will be decompiled.
+            args: Positional arguments that will be passed to the decompiler's `__init__` method.
+            kwargs: Keyword arguments that will be passed to the decompiler's `__init__` method.
+
+        Returns:
+            The estimated peak memory of a worker in bytes, or `None` if it is unknown.
+        '''
+        return None
+
+    @classmethod
+    def get_worker_kwargs(cls, workers: int, *args: Any,
+                          **kwargs: Any) -> Sequence[Mapping[str, Any]]:
+        '''
+        Prepares the long-lived workers that batches of binaries are decompiled with.
+
+        This method is called once in the parent process before binaries are decompiled. By
+        default, decompilers do not use long-lived workers and no additional arguments are
+        passed. Decompilers with a high startup cost may override this method to start (or reuse)
+        persistent backends, returning the keyword arguments that connect an instance to each of
+        them. Batches are assigned to the returned workers in a round-robin fashion.
+
+        Parameters:
+            workers: The number of workers that will decompile batches concurrently.
+            args: Positional arguments that will be passed to the decompiler's `__init__` method.
+            kwargs: Keyword arguments that will be passed to the decompiler's `__init__` method.
+
+        Returns:
+            Additional keyword arguments to pass to the decompiler's `__init__` method for each worker.
+        '''
+        return [{}]
+
+
+def get_decompiler_class() -> Type[Decompiler]:
+    '''
+    Imports the class of the decompiler that is being used by `codablellm`.
+
+    Returns:
+        The specified `Decompiler` subclass.
+
+    Raises:
+        DecompilerNotFound: If the specified decompiler cannot be imported or if the class cannot be found in the specified module.
+    '''
+    module_path, class_name = DECOMPILER['class_path'].rsplit('.', 1)
+    try:
+        module = importlib.import_module(module_path)
+        return getattr(module, class_name)
+    except (ModuleNotFoundError, AttributeError) as e:
+        raise DecompilerNotFound('Could not import '
+                                 f'"{module_path}.{class_name}"') from e
+
 
 def get_decompiler(*args: Any, **kwargs: Any) -> Decompiler:
     '''
@@ -66,13 +241,7 @@ def get_decompiler(*args: Any, **kwargs: Any) -> Decompiler:
     Raises:
         DecompilerNotFound: If the specified decompiler cannot be imported or if the class cannot be found in the specified module.
     '''
-    module_path, class_name = DECOMPILER['class_path'].rsplit('.', 1)
-    try:
-        module = importlib.import_module(module_path)
-        return getattr(module, class_name)(*args, **kwargs)
-    except (ModuleNotFoundError, AttributeError) as e:
-        raise DecompilerNotFound('Could not import '
-                                 f'"{module_path}.{class_name}"') from e
+    return get_decompiler_class()(*args, **kwargs)
 
 
 def _decompile(path: PathLike, *args: Any, **kwargs: Any) -> Sequence[DecompiledFunction]:
@@ -80,38 +249,487 @@ def _decompile(path: PathLike, *args: Any, **kwargs: Any) -> Sequence[Decompiled
     return get_decompiler(*args, **kwargs).decompile(path)
 
 
+def _decompile_many(paths: Sequence[PathLike], *args: Any, **kwargs: Any) -> Sequence[DecompiledFunction]:
+    logger.debug(f'Decompiling a batch of {len(paths)} binaries...')
+    return get_decompiler(*args, **kwargs).decompile_many(paths)
+
+
+class _Shard(NamedTuple):
+    index: int
+    count: int
+    workspace: Path
+
+    def get_cache_key(self, key: str) -> str:
+        return f'{key}.{self.index}-{self.count}'
+
+
+class _DecompileBatch(NamedTuple):
+    paths: Sequence[Path]
+    worker_kwargs: Mapping[str, Any]
+    cache: Optional[DecompileCache] = None
+    cache_keys: Mapping[Path, str] = {}
+    shard: Optional[_Shard] = None
+
+
+def _decompile_batch(batch: _DecompileBatch, *args: Any,
+                     **kwargs: Any) -> Sequence[DecompiledFunction]:
+    kwargs = {**kwargs, **batch.worker_kwargs}
+    if batch.shard:
+        path, = batch.paths
+        shard = batch.shard
+        logger.debug(f'Decompiling shard {shard.index + 1} of {shard.count} of {path.name}...')
+        functions = get_decompiler(*args, **kwargs).decompile_shard(path, shard.index,
+                                                                    shard.count, shard.workspace)
+        if batch.cache:
+            batch.cache.store(shard.get_cache_key(batch.cache_keys[path]), functions)
+        return functions
+    if not batch.cache:
+        return _decompile_many(batch.paths, *args, **kwargs)
+    # Cache each binary as soon as it is decompiled, so that an interrupted run can resume
+    logger.debug(f'Decompiling a batch of {len(batch.paths)} binaries...')
+    decompiled_functions: List[DecompiledFunction] = []
+    for path, functions in get_decompiler(*args, **kwargs).decompile_each(batch.paths):
+        batch.cache.store(batch.cache_keys[path], functions)
+        decompiled_functions.extend(functions)
+    return decompiled_functions
+
+
 @dataclass(frozen=True)
 class DecompileConfig:
     max_workers: Optional[int] = None
     decompiler_args: Sequence[Any] = field(default_factory=list)
     decompiler_kwargs: Dict[str, Any] = field(default_factory=dict)
+    batch_size: Optional[int] = None
+    '''
+    Number of binaries decompiled together by a single worker. By default, the binaries are
+    split evenly across all workers.
+    '''
+    timeout: Optional[float] = None
+    '''
+    Seconds the decompiler may spend on a single function before it is recorded as failed.
+    Passed to the decompiler as the `timeout` keyword argument if set.
+    '''
+    threads: Optional[int] = None
+    '''
+    Number of functions each worker decompiles concurrently. Passed to the decompiler as the
+    `threads` keyword argument. If `None`, the CPUs are split evenly among the concurrent
+    workers for decompilers that support the option.
+    '''
+    skip_object_files: bool = False
+    '''
+    If `True`, relocatable object files are not decompiled.
+    '''
+    shard_threshold: Optional[int] = None
+    '''
+    Size in bytes above which a binary is split into shards that are decompiled by separate
+    workers, if the decompiler supports sharding. Sharding a binary adds the cost of loading it
+    once per shard, so binaries are never sharded by default.
+    '''
+    shards: Optional[int] = None
+    '''
+    Number of shards a large binary is split into. By default, a binary is split across all
+    workers.
+    '''
+    deduplicate: bool = True
+    '''
+    If `True`, byte-identical binaries (e.g. hard links or copied install outputs) are only
+    decompiled once, and their decompiled functions are copied to each path.
+    '''
+    cache: Optional[DecompileCache] = None
+    '''
+    If specified, binaries are looked up in this cache before they are decompiled, and each
+    binary is added to it as soon as it has been decompiled.
+    '''
+    function_names: Optional[Collection[str]] = None
+    '''
+    Names of the only functions that should be decompiled. Passed to the decompiler as the
+    `function_names` keyword argument if set.
+    '''
+    skip_functions: Sequence[FunctionKind] = field(default_factory=list)
+    '''
+    Kinds of functions that should not be decompiled. Passed to the decompiler as the
+    `skip_functions` keyword argument if not empty.
+    '''
+    deduplicate_functions: bool = False
+    '''
+    If `True`, functions with identical assembly in different binaries, such as statically linked
+    library code, are only kept once, with the binaries that contain them listed in their
+    `binaries` metadata.
+    '''
+    worker_memory: Optional[int] = None
+    '''
+    Estimated peak memory of a worker in bytes. Unless `max_workers` is set, no more workers are
+    started than fit in the memory available to the host or its container. If `None`, the
+    decompiler's own estimate is used. Passed to the decompiler as the `max_memory` keyword
+    argument if set and supported, e.g. to size Ghidra's heap.
+    '''
 
     def __post_init__(self) -> None:
         if self.max_workers and self.max_workers < 1:
             raise ValueError('Max workers must be a positive integer')
+        if self.batch_size is not None and self.batch_size < 1:
+            raise ValueError('Batch size must be a positive integer')
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError('Timeout must be a positive number')
+        if self.threads is not None and self.threads < 1:
+            raise ValueError('Threads must be a positive integer')
+        if self.shard_threshold is not None and self.shard_threshold < 0:
+            raise ValueError('Shard threshold must be a non-negative integer')
+        if self.shards is not None and self.shards < 1:
+            raise ValueError('Shards must be a positive integer')
+        if self.worker_memory is not None and self.worker_memory < 1:
+            raise ValueError('Worker memory must be a positive integer')
+        if isinstance(self.function_names, str):
+            raise ValueError('Function names must be a collection of names')
+        if any(k not in get_args(FunctionKind) for k in self.skip_functions):
+            raise ValueError(f'Skipped functions must be any of {get_args(FunctionKind)}')
+
+    def get_decompiler_kwargs(self,
+                              decompiler_class: Optional[Type[Decompiler]] = None) -> Dict[str, Any]:
+        '''
+        Combines `decompiler_kwargs` with the decompiler options that are set in this configuration.
 
+        Parameters:
+            decompiler_class: If specified, options that are not in the decompiler's `OPTIONS` are ignored.
+
+        Returns:
+            The keyword arguments to pass to the decompiler's `__init__` method.
+        '''
+        options = resolve_kwargs(timeout=self.timeout, threads=self.threads,
+                                 function_names=self.function_names,
+                                 skip_functions=list(self.skip_functions) or None)
+        if self.worker_memory and (not decompiler_class or
+                                   'max_memory' in decompiler_class.OPTIONS):
+            # The memory estimate also limits the workers, so it is not required to be supported
+            options['max_memory'] = self.worker_memory
+        if decompiler_class:
+            unsupported = [o for o in options if o not in decompiler_class.OPTIONS]
+            if unsupported:
+                logger.warning(f'{decompiler_class.__name__} does not support the options: '
+                               f'{", ".join(unsupported)}')
+            options = {k: v for k, v in options.items() if k not in unsupported}
+        return {**self.decompiler_kwargs, **options}
+
+
+def discover_binaries(paths: Union[PathLike, Sequence[PathLike]],
+                      skip_object_files: bool = False) -> List[Path]:
+    '''
+    Locates the binaries to decompile.
+
+    Files are kept as they are, while directories are searched recursively for ELF, PE, Mach-O
+    and `ar` files, which are recognized by their magic bytes.
+
+    Parameters:
+        paths: Paths to binaries or directories containing binaries.
+        skip_object_files: If `True`, relocatable object files are not included.
+
+    Returns:
+        The paths of the located binaries.
+    '''
+    if isinstance(paths, (Path, str)):
+        paths = [paths]
+    bins: List[Path] = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            bins.extend(sorted(b for b in path.rglob('*')
+                               if b.is_file() and get_binary_format(b)))
+        else:
+            bins.append(path)
+    if skip_object_files:
+        bins = [b for b in bins if not (b.is_file() and is_object_file(b))]
+    logger.info(f'Located {len(bins)} binaries')
+    return bins
+
+
+def _group_identical(bins: Sequence[Path], hashes: Dict[Path, str]) -> Dict[Path, List[Path]]:
+    # Hard links are identical without reading them. Other files can only be identical if they
+    # have the same size, so only those are hashed
+    groups: Dict[Path, List[Path]] = {}
+    representatives: Dict[Tuple[int, ...], Path] = {}
+    sizes: Dict[int, List[Path]] = {}
+    for path in bins:
+        try:
+            stat = path.stat()
+        except OSError:
+            groups.setdefault(path, [])
+            continue
+        inode = (stat.st_dev, stat.st_ino)
+        if inode in representatives:
+            groups[representatives[inode]].append(path)
+            continue
+        representatives[inode] = path
+        groups[path] = []
+        sizes.setdefault(stat.st_size, []).append(path)
+    for same_size in sizes.values():
+        if len(same_size) < 2:
+            continue
+        by_hash: Dict[str, Path] = {}
+        for path in same_size:
+            hashes[path] = get_file_hash(path)
+            representative = by_hash.setdefault(hashes[path], path)
+            if representative != path:
+                groups[representative].extend([path, *groups.pop(path)])
+    return groups
+
+
+SYMBOLIZED_ADDRESS_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r'\b(?:0x)?[0-9a-fA-F]+ (?=<[^>]+>)'
+)
+'''
+Matches the addresses that are followed by the symbol they refer to, such as the branch targets
+printed by objdump, e.g. `1139 ` in `call 1139 <helper>`.
+'''
+RELATIVE_OFFSET_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r'-?0x[0-9a-fA-F]+(?=\(%rip\))|(?<=rip)\s*[+-]\s*0x[0-9a-fA-F]+'
+)
+'''
+Matches the displacements of instruction-relative operands, e.g. `0xe9c` in `0xe9c(%rip)` or
+`+0xe9c` in `[rip+0xe9c]`, which differ wherever the same code is linked.
+'''
+HEX_PATTERN: Final[re.Pattern[str]] = re.compile(r'\b0x[0-9a-fA-F]+\b')
+'''
+Matches hexadecimal literals, which are either addresses or constants.
+'''
+AUTO_LABEL_SUFFIX_PATTERN: Final[re.Pattern[str]] = re.compile(r'_[0-9a-fA-F]{8,16}$')
+'''
+Matches the address that ends the labels Ghidra generates, e.g. `_00102004` in
+`s_hello_00102004`.
+'''
+
+
+def normalize_assembly(function: DecompiledFunction) -> str:
+    '''
+    Removes the parts of a decompiled function's assembly that depend on where the function is
+    located, while keeping the symbols it refers to.
+
+    Addresses that are followed by their symbol and instruction-relative displacements are
+    removed. Hexadecimal literals are replaced by the symbol they refer to if the function has
+    `references` metadata, which lists the addresses and names of the symbols the function
+    refers to. Other literals may be constants, so they are kept.
+
+    Parameters:
+        function: The decompiled function.
+
+    Returns:
+        The normalized assembly.
+    '''
+    assembly = SYMBOLIZED_ADDRESS_PATTERN.sub('', function.assembly)
+    assembly = RELATIVE_OFFSET_PATTERN.sub('?', assembly)
+    references = {int(a): AUTO_LABEL_SUFFIX_PATTERN.sub('', n)
+                  for a, n in function.metadata.get('references', [])}
+    if references:
+        assembly = HEX_PATTERN.sub(lambda m: f'<{references[int(m.group(0), 16)]}>'
+                                   if int(m.group(0), 16) in references else m.group(0),
+                                   assembly)
+    return assembly
+
+
+def get_assembly_hash(function: DecompiledFunction) -> str:
+    '''
+    Computes a digest of a decompiled function's assembly that is independent of where the
+    function is located, so that the same function linked into different binaries has the same
+    digest.
 
-class _CallableDecompiler(CallablePoolProgress[PathLike, Sequence[DecompiledFunction],
+    Parameters:
+        function: The decompiled function.
+
+    Returns:
+        The hexadecimal SHA-256 digest of the function's name, architecture and assembly, as
+        normalized by `normalize_assembly`.
+    '''
+    assembly = normalize_assembly(function)
+    return hashlib.sha256(f'{function.architecture}\n{function.name}\n{assembly}'.encode()
+                          ).hexdigest()
+
+
+def deduplicate_functions(functions: Sequence[DecompiledFunction]) -> List[DecompiledFunction]:
+    '''
+    Removes decompiled functions whose assembly is identical to a previous function, such as a
+    statically linked library function that is contained in several binaries. Each remaining
+    function lists every binary that contains it in its `binaries` metadata.
+
+    Parameters:
+        functions: The decompiled functions.
+
+    Returns:
+        The first decompiled function with each assembly digest, in their original order.
+    '''
+    unique: Dict[str, Tuple[DecompiledFunction, List[str]]] = {}
+    for index, function in enumerate(functions):
+        # Without assembly, functions cannot be told apart and are always kept
+        key = get_assembly_hash(function) if function.assembly else str(index)
+        _, binaries = unique.setdefault(key, (function, []))
+        if str(function.path) not in binaries:
+            binaries.append(str(function.path))
+    if len(unique) < len(functions):
+        logger.info(f'Removed {len(functions) - len(unique)} decompiled functions that are '
+                    'identical to a function of another binary')
+    for function, binaries in unique.values():
+        function.set_metadata({**function.metadata, 'binaries': binaries})
+    return [f for f, _ in unique.values()]
+
+
+class _CallableDecompiler(CallablePoolProgress[_DecompileBatch, Sequence[DecompiledFunction],
                                                List[DecompiledFunction]]):
 
     def __init__(self, paths: Union[PathLike, Sequence[PathLike]],
                  config: DecompileConfig) -> None:
-        bins: List[Path] = []
-        if isinstance(paths, (Path, str)):
-            paths = [paths]
-        for path in paths:
-            path = Path(path)
-            # If a path is a directory, glob all child binaries
-            bins.extend([b for b in path.glob('*') if is_binary(b)]
-                        if path.is_dir() else [path])
-        pool = ProcessPoolProgress(_decompile, bins, Progress('Decompiling binaries...', total=len(paths)),
-                                   max_workers=config.max_workers,
+        bins = discover_binaries(paths, skip_object_files=config.skip_object_files)
+        # Decompile byte-identical binaries only once, and copy their functions to the duplicates
+        hashes: Dict[Path, str] = {}
+        self.duplicates: Dict[Path, List[Path]] = {}
+        if config.deduplicate:
+            self.duplicates = _group_identical(bins, hashes)
+            bins = list(self.duplicates)
+            duplicate_count = sum(len(d) for d in self.duplicates.values())
+            if duplicate_count:
+                logger.info(f'Skipping {duplicate_count} binaries that are identical to another '
+                            'binary')
+        decompiler_class = get_decompiler_class()
+        decompiler_kwargs = config.get_decompiler_kwargs(decompiler_class)
+        self.cached_functions: List[DecompiledFunction] = []
+        cache_keys: Dict[Path, str] = {}
+        if config.cache:
+            # Only decompile the binaries that are not cached yet
+            version = decompiler_class.get_version(*config.decompiler_args, **decompiler_kwargs)
+            uncached_bins: List[Path] = []
+            for path in bins:
+                if path not in hashes:
+                    hashes[path] = get_file_hash(path)
+                cache_keys[path] = config.cache.get_key(hashes[path],
+                                                        DECOMPILER['class_path'],
+                                                        config.decompiler_args,
+                                                        decompiler_kwargs, version)
+                cached_functions = config.cache.load(cache_keys[path], path)
+                if cached_functions is None:
+                    uncached_bins.append(path)
+                else:
+                    self.cached_functions.extend(cached_functions)
+            logger.info(f'Loaded {len(bins) - len(uncached_bins)} decompiled binaries from '
+                        'the cache')
+            bins = uncached_bins
+        # Admit only as many workers as the CPUs and the memory of the container allow
+        worker_memory = config.worker_memory
+        if not config.max_workers and not worker_memory and bins:
+            worker_memory = decompiler_class.get_worker_memory(bins, *config.decompiler_args,
+                                                               **decompiler_kwargs)
+        workers = get_worker_count(config.max_workers, worker_memory)
+        # Split large binaries into shards, so that they do not keep a single worker busy
+        shard_items: List[_DecompileBatch] = []
+        self._sharded_bins: Dict[Path, int] = {}
+        self._cache = config.cache
+        self._cache_keys = cache_keys
+        self._workspace: Optional[TemporaryDirectory[str]] = None
+        shards = config.shards or workers
+        if decompiler_class.SUPPORTS_SHARDING and config.shard_threshold is not None and \
+                shards > 1:
+            for path in [b for b in bins if b.is_file() and
+                         b.stat().st_size > config.shard_threshold]:
+                if not self._workspace:
+                    self._workspace = TemporaryDirectory(prefix='codablellm_shards')
+                workspace = Path(self._workspace.name) / str(len(self._sharded_bins))
+                workspace.mkdir()
+                self._sharded_bins[path] = shards
+                bins.remove(path)
+                for index in range(shards):
+                    shard = _Shard(index, shards, workspace)
+                    # Shards that were cached by an interrupted run are not decompiled again
+                    if config.cache:
+                        functions = config.cache.load(shard.get_cache_key(cache_keys[path]),
+                                                      path)
+                        if functions is not None:
+                            self.cached_functions.extend(functions)
+                            continue
+                    shard_items.append(_DecompileBatch([path], {}, config.cache,
+                                                       {path: cache_keys[path]}
+                                                       if config.cache else {}, shard))
+            if self._sharded_bins:
+                logger.info(f'Decompiling {len(self._sharded_bins)} large binaries in '
+                            f'{len(shard_items)} shards')
+        # Split the binaries into batches, so that each worker pays the decompiler's startup cost
+        # once per batch instead of once per binary
+        batch_size = config.batch_size
+        if not batch_size:
+            batch_size = max(1, math.ceil(len(bins) / workers))
+        batches = [bins[i:i + batch_size] for i in range(0, len(bins), batch_size)]
+        logger.info(f'Decompiling {len(bins)} binaries in {len(batches)} batches')
+        if config.threads is None and 'threads' in decompiler_class.OPTIONS:
+            # Split the CPUs among the concurrent workers, instead of letting every worker start
+            # a decompiler thread for each CPU
+            concurrent_workers = max(1, min(workers, len(batches) + len(shard_items)))
+            decompiler_kwargs['threads'] = max(1, get_cpu_limit() // concurrent_workers)
+        # Let the decompiler start (or reuse) a long-lived worker for each concurrent batch
+        worker_kwargs = decompiler_class.get_worker_kwargs(
+            max(1, min(workers, len(batches))), *config.decompiler_args, **decompiler_kwargs
+        ) if batches else [{}]
+        items = [_DecompileBatch(b, worker_kwargs[i % len(worker_kwargs)], config.cache,
+                                 {p: cache_keys[p] for p in b} if config.cache else {})
+                 for i, b in enumerate(batches)]
+        items.extend(shard_items)
+        pool = ProcessPoolProgress(_decompile_batch, items,
+                                   Progress('Decompiling binaries...', total=len(items)),
+                                   max_workers=workers,
                                    submit_args=tuple(config.decompiler_args),
-                                   submit_kwargs=config.decompiler_kwargs)
+                                   submit_kwargs=decompiler_kwargs)
+        self._deduplicate_functions = config.deduplicate_functions
         super().__init__(pool)
 
     def get_results(self) -> List[DecompiledFunction]:
-        return [d for b in self.pool for d in b]
+        decompiled_functions = self._get_decompiled_functions()
+        if self._deduplicate_functions:
+            return deduplicate_functions(decompiled_functions)
+        return decompiled_functions
+
+    def iter_batches(self) -> Iterator[List[DecompiledFunction]]:
+        '''
+        Decompiles the binaries, yielding the functions of each batch of binaries as soon as it
+        is decompiled instead of waiting for every binary. A batch is only yielded once its
+        worker has decompiled all of its binaries. Functions are not deduplicated, even if
+        `DecompileConfig.deduplicate_functions` is `True`.
+
+        Returns:
+            An iterator over the decompiled functions of each batch, starting with the cached functions.
+        '''
+        with self.pool:
+            yield from self._iter_batches()
+
+    def _get_decompiled_functions(self) -> List[DecompiledFunction]:
+        return [f for b in self._iter_batches() for f in b]
+
+    def _iter_batches(self) -> Iterator[List[DecompiledFunction]]:
+        # Fan the functions of each decompiled binary out to its duplicates
+        duplicates = {p.resolve(): d for p, d in self.duplicates.items() if d}
+        try:
+            for functions in itertools.chain([self.cached_functions], self.pool):
+                if duplicates:
+                    functions = [*functions, *(f.with_path(d) for f in functions
+                                               for d in duplicates.get(f.path.resolve(), []))]
+                yield list(functions)
+        finally:
+            if self._workspace:
+                self._workspace.cleanup()
+        if self._cache:
+            self._merge_cached_shards()
+
+    def _merge_cached_shards(self) -> None:
+        # Once every shard of a binary is cached, cache the binary as a whole
+        assert self._cache
+        for path, shards in self._sharded_bins.items():
+            key = self._cache_keys[path]
+            shard_keys = [_Shard(i, shards, Path()).get_cache_key(key) for i in range(shards)]
+            functions: List[DecompiledFunction] = []
+            for shard_key in shard_keys:
+                shard_functions = self._cache.load(shard_key, path)
+                if shard_functions is None:
+                    logger.warning(f'Not caching "{path.name}" because some of its shards '
+                                   'failed')
+                    break
+                functions.extend(shard_functions)
+            else:
+                self._cache.store(key, functions)
+                for shard_key in shard_keys:
+                    self._cache.remove(shard_key)
 
 
 @overload
@@ -0,0 +1,616 @@
+'''
+A minimal, pure-Python reader of the DWARF debug information in ELF binaries, which locates the
+source code of each function.
+'''
+
+from bisect import bisect_right
+import logging
+from pathlib import Path, PurePosixPath
+import struct
+from typing import Any, Dict, Final, List, NamedTuple, Optional, Sequence, Tuple
+import zlib
+
+from codablellm.core.utils import PathLike
+
+logger = logging.getLogger('codablellm')
+
+DEBUG_SECTIONS: Final[Tuple[str, ...]] = ('.debug_info', '.debug_abbrev', '.debug_str',
+                                          '.debug_line', '.debug_line_str', '.debug_str_offsets',
+                                          '.debug_addr', '.debug_ranges', '.debug_rnglists')
+'''
+The ELF sections the reader uses.
+'''
+
+# Tags, attributes and forms from the DWARF 5 standard (and GNU extensions)
+_TAG_COMPILE_UNIT: Final = 0x11
+_TAG_SUBPROGRAM: Final = 0x2e
+_TAG_PARTIAL_UNIT: Final = 0x3c
+_TAG_SKELETON_UNIT: Final = 0x4a
+_UNIT_TAGS: Final = frozenset({_TAG_COMPILE_UNIT, _TAG_PARTIAL_UNIT, _TAG_SKELETON_UNIT})
+
+_AT_NAME: Final = 0x03
+_AT_STMT_LIST: Final = 0x10
+_AT_LOW_PC: Final = 0x11
+_AT_HIGH_PC: Final = 0x12
+_AT_COMP_DIR: Final = 0x1b
+_AT_ABSTRACT_ORIGIN: Final = 0x31
+_AT_DECL_FILE: Final = 0x3a
+_AT_DECL_LINE: Final = 0x3b
+_AT_SPECIFICATION: Final = 0x47
+_AT_RANGES: Final = 0x55
+_AT_STR_OFFSETS_BASE: Final = 0x72
+_AT_ADDR_BASE: Final = 0x73
+_AT_RNGLISTS_BASE: Final = 0x74
+
+_FORM_ADDR: Final = 0x01
+_FORM_STRP: Final = 0x0e
+_FORM_REF_ADDR: Final = 0x10
+_FORM_SEC_OFFSET: Final = 0x17
+_FORM_STRX: Final = 0x1a
+_FORM_ADDRX: Final = 0x1b
+_FORM_LINE_STRP: Final = 0x1f
+_FORM_IMPLICIT_CONST: Final = 0x21
+_FORM_RNGLISTX: Final = 0x23
+_CONSTANT_FORMS: Final = frozenset({0x05, 0x06, 0x07, 0x0b, 0x0d, 0x0f, _FORM_IMPLICIT_CONST})
+_REF_FORMS: Final = frozenset({0x11, 0x12, 0x13, 0x14, 0x15})
+_STRX_FORMS: Final = frozenset({_FORM_STRX, 0x25, 0x26, 0x27, 0x28, 0x1f02})
+_ADDRX_FORMS: Final = frozenset({_FORM_ADDRX, 0x29, 0x2a, 0x2b, 0x2c, 0x1f01})
+
+_LNCT_PATH: Final = 0x1
+_LNCT_DIRECTORY_INDEX: Final = 0x2
+
+_SHF_COMPRESSED: Final = 0x800
+_PT_LOAD: Final = 1
+
+
+class Subprogram(NamedTuple):
+    '''
+    A function described by the debug information of a binary.
+    '''
+
+    name: str
+    '''
+    The name of the function.
+    '''
+    file: Path
+    '''
+    The source code file the function is declared in.
+    '''
+    line: int
+    '''
+    The line the function is declared on, starting at 1.
+    '''
+    low_pc: Optional[int]
+    '''
+    The address of the first instruction of the function, if it was compiled out of line.
+    '''
+    high_pc: Optional[int]
+    '''
+    The address after the last instruction of the function, if it was compiled out of line.
+    '''
+
+
+class _Reader:
+
+    def __init__(self, data: bytes, little_endian: bool, position: int = 0) -> None:
+        self.data = data
+        self.endian = '<' if little_endian else '>'
+        self.position = position
+
+    def unpack(self, fmt: str) -> Any:
+        value, = struct.unpack_from(self.endian + fmt, self.data, self.position)
+        self.position += struct.calcsize(fmt)
+        return value
+
+    def uint(self, size: int) -> int:
+        if size == 3:
+            data = self.read(3)
+            return int.from_bytes(data, 'little' if self.endian == '<' else 'big')
+        return self.unpack({1: 'B', 2: 'H', 4: 'I', 8: 'Q'}[size])
+
+    def uleb(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self.data[self.position]
+            self.position += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+
+    def sleb(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self.data[self.position]
+            self.position += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value - (1 << shift) if byte & 0x40 else value
+
+    def read(self, size: int) -> bytes:
+        data = self.data[self.position:self.position + size]
+        self.position += size
+        return data
+
+    def cstring(self) -> str:
+        end = self.data.index(b'\0', self.position)
+        value = self.data[self.position:end].decode(errors='replace')
+        self.position = end + 1
+        return value
+
+    def initial_length(self) -> Tuple[int, int]:
+        # Returns the length of a unit and the size of its offsets (4 or 8 bytes)
+        length = self.uint(4)
+        if length == 0xffffffff:
+            return self.uint(8), 8
+        return length, 4
+
+
+def _cstring_at(data: bytes, offset: int) -> str:
+    return data[offset:data.index(b'\0', offset)].decode(errors='replace')
+
+
+class _Unit:
+
+    def __init__(self, offset: int, version: int, offset_size: int, address_size: int) -> None:
+        self.offset = offset
+        self.version = version
+        self.offset_size = offset_size
+        self.address_size = address_size
+        self.str_offsets_base = 8 if version >= 5 else 0
+        self.addr_base = 8 if version >= 5 else 0
+        self.rnglists_base = 12 if version >= 5 else 0
+        self.base_address = 0
+        self.files: List[Path] = []
+
+
+class _DebugInfoParser:
+
+    def __init__(self, sections: Dict[str, bytes], little_endian: bool) -> None:
+        self.sections = sections
+        self.little_endian = little_endian
+        self.abbreviations: Dict[int, Dict[int, Tuple[int, bool, List[Tuple[int, int, int]]]]] = {}
+        # Attributes of every subprogram entry by their offset, which the out-of-line instances
+        # of inlined functions and member functions refer to
+        self.entries: Dict[int, Dict[int, Any]] = {}
+        self.entry_files: Dict[int, List[Path]] = {}
+
+    def reader(self, section: str, position: int = 0) -> _Reader:
+        return _Reader(self.sections.get(section, b''), self.little_endian, position)
+
+    def get_abbreviations(self, offset: int
+                          ) -> Dict[int, Tuple[int, bool, List[Tuple[int, int, int]]]]:
+        if offset in self.abbreviations:
+            return self.abbreviations[offset]
+        reader = self.reader('.debug_abbrev', offset)
+        table: Dict[int, Tuple[int, bool, List[Tuple[int, int, int]]]] = {}
+        while True:
+            code = reader.uleb()
+            if not code:
+                break
+            tag = reader.uleb()
+            has_children = reader.uint(1) == 1
+            attributes: List[Tuple[int, int, int]] = []
+            while True:
+                attribute, form = reader.uleb(), reader.uleb()
+                if not attribute and not form:
+                    break
+                implicit_const = reader.sleb() if form == _FORM_IMPLICIT_CONST else 0
+                attributes.append((attribute, form, implicit_const))
+            table[code] = (tag, has_children, attributes)
+        self.abbreviations[offset] = table
+        return table
+
+    def read_form(self, reader: _Reader, unit: _Unit, form: int, implicit_const: int) -> Any:
+        if form == 0x16:
+            # DW_FORM_indirect
+            return self.read_form(reader, unit, reader.uleb(), implicit_const)
+        if form == _FORM_ADDR:
+            return reader.uint(unit.address_size)
+        if form in (0x03, 0x04, 0x09, 0x0a, 0x18):
+            # Blocks and expressions are skipped
+            size = {0x03: 2, 0x04: 4, 0x0a: 1}.get(form)
+            reader.read(reader.uint(size) if size else reader.uleb())
+            return None
+        if form in (0x05, 0x06, 0x07, 0x0b, 0x11, 0x12, 0x13, 0x14, 0x0c, 0x1c, 0x24, 0x20):
+            size = {0x05: 2, 0x06: 4, 0x07: 8, 0x0b: 1, 0x11: 1, 0x12: 2, 0x13: 4, 0x14: 8,
+                    0x0c: 1, 0x1c: 4, 0x24: 8, 0x20: 8}[form]
+            return reader.uint(size)
+        if form == 0x1e:
+            reader.read(16)
+            return None
+        if form == 0x08:
+            return reader.cstring()
+        if form in (_FORM_STRP, _FORM_LINE_STRP, _FORM_SEC_OFFSET, 0x1d, 0x1f20, 0x1f21):
+            return reader.uint(unit.offset_size)
+        if form == _FORM_REF_ADDR:
+            return reader.uint(unit.address_size if unit.version == 2 else unit.offset_size)
+        if form == 0x0d:
+            return reader.sleb()
+        if form in (0x0f, 0x15, _FORM_STRX, _FORM_ADDRX, 0x22, _FORM_RNGLISTX, 0x1f01, 0x1f02):
+            return reader.uleb()
+        if form in (0x25, 0x29):
+            return reader.uint(1)
+        if form in (0x26, 0x2a):
+            return reader.uint(2)
+        if form in (0x27, 0x2b):
+            return reader.uint(3)
+        if form in (0x28, 0x2c):
+            return reader.uint(4)
+        if form == 0x19:
+            return True
+        if form == _FORM_IMPLICIT_CONST:
+            return implicit_const
+        raise ValueError(f'Unsupported DWARF form 0x{form:x}')
+
+    def resolve_string(self, unit: _Unit, form: int, value: Any) -> Any:
+        if form == _FORM_STRP:
+            return _cstring_at(self.sections.get('.debug_str', b''), value)
+        if form == _FORM_LINE_STRP:
+            return _cstring_at(self.sections.get('.debug_line_str', b''), value)
+        if form in _STRX_FORMS:
+            offset = self.reader('.debug_str_offsets',
+                                 unit.str_offsets_base + value * unit.offset_size
+                                 ).uint(unit.offset_size)
+            return _cstring_at(self.sections.get('.debug_str', b''), offset)
+        return value
+
+    def resolve_address(self, unit: _Unit, form: int, value: int) -> int:
+        if form in _ADDRX_FORMS:
+            return self.reader('.debug_addr', unit.addr_base + value * unit.address_size
+                               ).uint(unit.address_size)
+        return value
+
+    def read_entry(self, reader: _Reader, unit: _Unit,
+                   attributes: Sequence[Tuple[int, int, int]]) -> Dict[int, Tuple[int, Any]]:
+        values: Dict[int, Tuple[int, Any]] = {}
+        for attribute, form, implicit_const in attributes:
+            values[attribute] = (form, self.read_form(reader, unit, form, implicit_const))
+        return values
+
+    def get_first_range(self, unit: _Unit, form: int, value: int) -> Optional[Tuple[int, int]]:
+        # Only the first range is used, which contains the entry point of the function
+        if unit.version < 5:
+            reader = self.reader('.debug_ranges', value)
+            base = unit.base_address
+            while reader.position < len(reader.data):
+                start, end = reader.uint(unit.address_size), reader.uint(unit.address_size)
+                if not start and not end:
+                    return None
+                if start == (1 << unit.address_size * 8) - 1:
+                    base = end
+                    continue
+                return base + start, base + end
+            return None
+        if form == _FORM_RNGLISTX:
+            value = unit.rnglists_base + self.reader(
+                '.debug_rnglists', unit.rnglists_base + value * unit.offset_size
+            ).uint(unit.offset_size)
+        reader = self.reader('.debug_rnglists', value)
+        base = unit.base_address
+        while reader.position < len(reader.data):
+            kind = reader.uint(1)
+            if kind == 0:
+                return None
+            if kind == 1:
+                base = self.resolve_address(unit, _FORM_ADDRX, reader.uleb())
+            elif kind == 2:
+                start = self.resolve_address(unit, _FORM_ADDRX, reader.uleb())
+                return start, self.resolve_address(unit, _FORM_ADDRX, reader.uleb())
+            elif kind == 3:
+                start = self.resolve_address(unit, _FORM_ADDRX, reader.uleb())
+                return start, start + reader.uleb()
+            elif kind == 4:
+                start, end = reader.uleb(), reader.uleb()
+                return base + start, base + end
+            elif kind == 5:
+                base = reader.uint(unit.address_size)
+            elif kind == 6:
+                return reader.uint(unit.address_size), reader.uint(unit.address_size)
+            elif kind == 7:
+                start = reader.uint(unit.address_size)
+                return start, start + reader.uleb()
+            else:
+                return None
+        return None
+
+    def read_file_names(self, unit: _Unit, offset: int, comp_dir: str) -> List[Path]:
+        reader = self.reader('.debug_line', offset)
+        _, offset_size = reader.initial_length()
+        version = reader.uint(2)
+        if version >= 5:
+            reader.read(2)
+        reader.uint(offset_size)
+        # Skip to the opcode base, past the maximum operations per instruction of version 4
+        reader.read(5 if version >= 4 else 4)
+        opcode_base = reader.uint(1)
+        reader.read(opcode_base - 1)
+        line_unit = _Unit(unit.offset, version, offset_size, unit.address_size)
+        line_unit.str_offsets_base = unit.str_offsets_base
+        directories: List[str] = []
+        names: List[Tuple[str, int]] = []
+        if version >= 5:
+            for entries, is_directory in ((directories, True), (names, False)):
+                formats = [(reader.uleb(), reader.uleb()) for _ in range(reader.uint(1))]
+                for _ in range(reader.uleb()):
+                    path, directory_index = '', 0
+                    for content_type, form in formats:
+                        value = self.resolve_string(line_unit, form,
+                                                    self.read_form(reader, line_unit, form, 0))
+                        if content_type == _LNCT_PATH:
+                            path = value
+                        elif content_type == _LNCT_DIRECTORY_INDEX:
+                            directory_index = value
+                    entries.append(path if is_directory else (path, directory_index))  # type: ignore
+        else:
+            # The compilation directory is the implicit first directory and the file indices
+            # start at 1
+            directories.append(comp_dir)
+            while True:
+                directory = reader.cstring()
+                if not directory:
+                    break
+                directories.append(directory)
+            names.append(('', 0))
+            while True:
+                name = reader.cstring()
+                if not name:
+                    break
+                directory_index = reader.uleb()
+                reader.uleb()
+                reader.uleb()
+                names.append((name, directory_index))
+        files: List[Path] = []
+        for name, directory_index in names:
+            directory = PurePosixPath(comp_dir)
+            if directory_index < len(directories):
+                directory = directory / directories[directory_index]
+            files.append(Path(directory / name))
+        return files
+
+    def parse(self) -> List[Tuple[Dict[int, Any], List[Path]]]:
+        # Returns the attributes of each subprogram that was compiled out of line, together
+        # with the file names of its unit
+        info = self.sections.get('.debug_info', b'')
+        reader = self.reader('.debug_info')
+        instances: List[Tuple[Dict[int, Any], List[Path]]] = []
+        while reader.position < len(info):
+            unit_offset = reader.position
+            length, offset_size = reader.initial_length()
+            end = reader.position + length
+            version = reader.uint(2)
+            if version >= 5:
+                unit_type = reader.uint(1)
+                address_size = reader.uint(1)
+                abbreviation_offset = reader.uint(offset_size)
+                if unit_type in (4, 5):
+                    reader.read(8)
+                elif unit_type in (2, 6):
+                    reader.read(8 + offset_size)
+            else:
+                abbreviation_offset = reader.uint(offset_size)
+                address_size = reader.uint(1)
+            unit = _Unit(unit_offset, version, offset_size, address_size)
+            abbreviations = self.get_abbreviations(abbreviation_offset)
+            depth = 0
+            while reader.position < end:
+                entry_offset = reader.position
+                code = reader.uleb()
+                if not code:
+                    depth -= 1
+                    if depth <= 0:
+                        break
+                    continue
+                tag, has_children, attributes = abbreviations[code]
+                values = self.read_entry(reader, unit, attributes)
+                if has_children:
+                    depth += 1
+                if tag in _UNIT_TAGS:
+                    self.read_unit_entry(unit, values)
+                elif tag == _TAG_SUBPROGRAM:
+                    entry = self.resolve_entry(unit, values)
+                    self.entries[entry_offset] = entry
+                    self.entry_files[entry_offset] = unit.files
+                    if _AT_LOW_PC in entry:
+                        instances.append((entry, unit.files))
+                if not has_children and depth == 0:
+                    break
+            reader.position = end
+        return instances
+
+    def read_unit_entry(self, unit: _Unit, values: Dict[int, Tuple[int, Any]]) -> None:
+        for attribute, base in ((_AT_STR_OFFSETS_BASE, 'str_offsets_base'),
+                                (_AT_ADDR_BASE, 'addr_base'),
+                                (_AT_RNGLISTS_BASE, 'rnglists_base')):
+            if attribute in values:
+                setattr(unit, base, values[attribute][1])
+        if _AT_LOW_PC in values:
+            unit.base_address = self.resolve_address(unit, *values[_AT_LOW_PC])
+        comp_dir = self.resolve_string(unit, *values[_AT_COMP_DIR]) \
+            if _AT_COMP_DIR in values else ''
+        if _AT_STMT_LIST in values and '.debug_line' in self.sections:
+            unit.files = self.read_file_names(unit, values[_AT_STMT_LIST][1], comp_dir)
+
+    def resolve_entry(self, unit: _Unit, values: Dict[int, Tuple[int, Any]]) -> Dict[int, Any]:
+        entry: Dict[int, Any] = {}
+        for attribute, (form, value) in values.items():
+            if attribute == _AT_NAME:
+                entry[attribute] = self.resolve_string(unit, form, value)
+            elif attribute in (_AT_ABSTRACT_ORIGIN, _AT_SPECIFICATION):
+                # References are relative to their unit unless they are section offsets
+                entry[attribute] = value + unit.offset if form in _REF_FORMS else value
+            elif attribute in (_AT_DECL_FILE, _AT_DECL_LINE):
+                entry[attribute] = value
+        if _AT_LOW_PC in values:
+            low_pc = self.resolve_address(unit, *values[_AT_LOW_PC])
+            entry[_AT_LOW_PC] = low_pc
+            if _AT_HIGH_PC in values:
+                form, value = values[_AT_HIGH_PC]
+                entry[_AT_HIGH_PC] = low_pc + value if form in _CONSTANT_FORMS else \
+                    self.resolve_address(unit, form, value)
+        elif _AT_RANGES in values:
+            first_range = self.get_first_range(unit, *values[_AT_RANGES])
+            if first_range:
+                entry[_AT_LOW_PC], entry[_AT_HIGH_PC] = first_range
+        return entry
+
+    def get_subprogram(self, entry: Dict[int, Any],
+                       files: List[Path]) -> Optional[Subprogram]:
+        # The name and declaration of out-of-line instances of inlined functions and of member
+        # functions are in the entries they refer to
+        instance = entry
+        name, file, line = entry.get(_AT_NAME), None, entry.get(_AT_DECL_LINE)
+        if _AT_DECL_FILE in entry and entry[_AT_DECL_FILE] < len(files):
+            file = files[entry[_AT_DECL_FILE]]
+        for _ in range(8):
+            reference = entry.get(_AT_ABSTRACT_ORIGIN, entry.get(_AT_SPECIFICATION))
+            if reference is None or reference not in self.entries or (name and file and line):
+                break
+            files = self.entry_files[reference]
+            entry = self.entries[reference]
+            name = name or entry.get(_AT_NAME)
+            if file is None and _AT_DECL_FILE in entry and entry[_AT_DECL_FILE] < len(files):
+                file = files[entry[_AT_DECL_FILE]]
+            line = line or entry.get(_AT_DECL_LINE)
+        if not name or not file or not line:
+            return None
+        return Subprogram(name, file, line, instance.get(_AT_LOW_PC), instance.get(_AT_HIGH_PC))
+
+
+class DebugInfo:
+    '''
+    The functions described by the DWARF debug information of an ELF binary.
+
+    Functions are indexed by their address ranges, so that the function containing an address
+    is found in logarithmic time.
+    '''
+
+    def __init__(self, subprograms: Sequence[Subprogram], image_base: int = 0) -> None:
+        '''
+        Indexes the functions of a binary.
+
+        Parameters:
+            subprograms: The functions described by the debug information.
+            image_base: The lowest address the binary is loaded at.
+        '''
+        self.subprograms = list(subprograms)
+        self.image_base = image_base
+        self._intervals = sorted((s.low_pc, s.high_pc or s.low_pc + 1, s)
+                                 for s in self.subprograms if s.low_pc is not None)
+        self._starts = [start for start, _, _ in self._intervals]
+        self._names: Dict[str, List[Subprogram]] = {}
+        for subprogram in self.subprograms:
+            self._names.setdefault(subprogram.name, []).append(subprogram)
+
+    def lookup_address(self, address: int) -> Optional[Subprogram]:
+        '''
+        Finds the function that contains an address.
+
+        Parameters:
+            address: A virtual address of the binary.
+
+        Returns:
+            The function containing the address, or `None` if no function contains it.
+        '''
+        index = bisect_right(self._starts, address) - 1
+        if index < 0:
+            return None
+        _, end, subprogram = self._intervals[index]
+        return subprogram if address < end else None
+
+    def lookup_name(self, name: str) -> List[Subprogram]:
+        '''
+        Finds the functions with a name.
+
+        Parameters:
+            name: The name of the functions.
+
+        Returns:
+            Every function with the name, such as static functions of different files.
+        '''
+        return self._names.get(name, [])
+
+    @classmethod
+    def from_elf(cls, path: PathLike) -> 'DebugInfo':
+        '''
+        Reads the DWARF debug information of an ELF binary.
+
+        Parameters:
+            path: The ELF binary.
+
+        Returns:
+            The functions of the binary that were compiled out of line. Binaries without debug information have no functions.
+
+        Raises:
+            ValueError: If the file is not an ELF binary or its debug information cannot be read.
+        '''
+        sections, little_endian, image_base = _read_elf(path)
+        parser = _DebugInfoParser(sections, little_endian)
+        try:
+            instances = parser.parse()
+            subprograms: List[Subprogram] = []
+            for entry, files in instances:
+                subprogram = parser.get_subprogram(entry, files)
+                if subprogram:
+                    subprograms.append(subprogram)
+        except (IndexError, KeyError, struct.error) as e:
+            raise ValueError(f'Could not read the debug information of "{Path(path).name}"') \
+                from e
+        logger.debug(f'Read {len(subprograms)} functions from the debug information of '
+                     f'"{Path(path).name}"')
+        return cls(subprograms, image_base=image_base)
+
+
+def _read_elf(path: PathLike) -> Tuple[Dict[str, bytes], bool, int]:
+    # Returns the debug sections, whether the binary is little endian and its image base
+    with open(path, 'rb') as file:
+        ident = file.read(16)
+        if ident[:4] != b'\x7fELF':
+            raise ValueError(f'"{Path(path).name}" is not an ELF binary')
+        is_64_bit = ident[4] == 2
+        little_endian = ident[5] != 2
+        endian = '<' if little_endian else '>'
+        header = file.read(48 if is_64_bit else 36)
+        fields = struct.unpack(endian + ('HHIQQQIHHHHHH' if is_64_bit else 'HHIIIIIHHHHHH'),
+                               header)
+        phoff, shoff = fields[4], fields[5]
+        phentsize, phnum, shentsize, shnum, shstrndx = fields[8:13]
+        # The image base is the lowest address of a loaded segment
+        image_base: Optional[int] = None
+        for index in range(phnum):
+            file.seek(phoff + index * phentsize)
+            if is_64_bit:
+                p_type, _, _, p_vaddr = struct.unpack(endian + 'IIQQ', file.read(24))
+            else:
+                p_type, _, p_vaddr = struct.unpack(endian + 'III', file.read(12))
+            if p_type == _PT_LOAD and (image_base is None or p_vaddr < image_base):
+                image_base = p_vaddr
+        section_headers = []
+        for index in range(shnum):
+            file.seek(shoff + index * shentsize)
+            if is_64_bit:
+                section_headers.append(struct.unpack(endian + 'IIQQQQ', file.read(40)))
+            else:
+                section_headers.append(struct.unpack(endian + 'IIIIII', file.read(24)))
+
+        def read_section(index: int) -> bytes:
+            _, _, flags, _, offset, size = section_headers[index]
+            file.seek(offset)
+            data = file.read(size)
+            if flags & _SHF_COMPRESSED:
+                # The data is preceded by an Elf_Chdr, and only zlib is in wide use
+                chdr_size = 24 if is_64_bit else 12
+                if struct.unpack_from(endian + 'I', data)[0] != 1:
+                    raise ValueError('Unsupported compressed debug section')
+                data = zlib.decompress(data[chdr_size:])
+            return data
+
+        sections: Dict[str, bytes] = {}
+        if section_headers and shstrndx < len(section_headers):
+            names = read_section(shstrndx)
+            for index, (name_offset, *_) in enumerate(section_headers):
+                name = _cstring_at(names, name_offset)
+                if name in DEBUG_SECTIONS:
+                    sections[name] = read_section(index)
+    return sections, little_endian, image_base or 0
@@ -3,11 +3,15 @@ from dataclasses import dataclass, field
 import importlib
 import logging
 from pathlib import Path
+import tarfile
 from typing import (
-    Any, Callable, Dict, Final, Generator, List, Literal, Mapping, Optional, OrderedDict, Sequence, Set,
-    Tuple, Union, overload)
+    Any, Callable, ClassVar, Dict, Final, Generator, Iterable, List, Literal, Mapping, Optional, OrderedDict,
+    Sequence, Set, Tuple, Union, overload)
+import zipfile
 
-from codablellm.core import utils
+from git import Blob, Repo
+
+from codablellm.core import compdb, utils
 from codablellm.core.dashboard import CallablePoolProgress, ProcessPoolProgress, Progress
 from codablellm.core.function import SourceFunction
 from codablellm.core.utils import PathLike
@@ -40,6 +44,12 @@ def set_extractors(extractors: Mapping[str, str]) -> None:
 
 class Extractor(ABC):
 
+    EXTENSIONS: ClassVar[Sequence[str]] = []
+    '''
+    File extensions of the source code files this extractor can extract, which are compared
+    case-insensitively by `is_extractable`.
+    '''
+
     @abstractmethod
     def extract(self, file_path: PathLike, repo_path: Optional[PathLike] = None) -> Sequence[SourceFunction]:
         pass
@@ -48,6 +58,40 @@ class Extractor(ABC):
     def get_extractable_files(self, path: PathLike) -> Sequence[Path]:
         pass
 
+    def extract_code(self, code: bytes, file_path: PathLike,
+                     repo_path: Optional[PathLike] = None) -> Sequence[SourceFunction]:
+        '''
+        Extracts source code functions from source code that is held in memory rather than read
+        from the file system.
+
+        Parameters:
+            code: The contents of the source code file.
+            file_path: The path recorded for the extracted functions. It does not need to exist.
+            repo_path: The path of the repository the file belongs to, if any.
+
+        Returns:
+            The source code functions contained in the code.
+
+        Raises:
+            NotImplementedError: If the extractor does not support in-memory extraction.
+        '''
+        raise NotImplementedError(f'{type(self).__name__} does not support extracting source '
+                                  'code from memory')
+
+    def is_extractable(self, file_path: PathLike) -> bool:
+        '''
+        Checks if a file can be extracted by this extractor by its path alone, without accessing
+        the file system. By default, the extension of the file is checked against `EXTENSIONS`.
+
+        Parameters:
+            file_path: The path of a potential source code file.
+
+        Returns:
+            `True` if the file can be extracted.
+        '''
+        suffix = Path(file_path).suffix.casefold()
+        return any(suffix == e.casefold() for e in self.EXTENSIONS)
+
 
 def get_extractor(language: str, *args: Any, **kwargs: Any) -> Extractor:
     if language in EXTRACTORS:
@@ -63,6 +107,19 @@ def _extract(extractor_and_paths: Tuple[Extractor, Path, Optional[Path]]) -> Seq
     return extractor.extract(file, repo_path=repo)
 
 
+def _extract_code(extractor_and_code: Tuple[Extractor, Path, bytes, Optional[Path]]) -> Sequence[SourceFunction]:
+    extractor, file, code, repo = extractor_and_code
+    logger.debug(f'Extracting {file} from memory...')
+    return extractor.extract_code(code, file, repo_path=repo)
+
+
+SourceFiles = Callable[[Callable[[Path], bool]], Iterable[Tuple[Path, bytes]]]
+'''
+A callable that yields the path and contents of every source code file accepted by the provided
+predicate, so that unwanted files are never read.
+'''
+
+
 EXTRACTOR_CHECKPOINT_PREFIX: Final[str] = 'codablellm_extractor'
 
 
@@ -95,6 +152,19 @@ class ExtractConfig:
     extract_as_repo: bool = True
     extractor_args: Dict[str, Sequence[Any]] = field(default_factory=dict)
     extractor_kwargs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    compile_commands: Optional[Path] = None
+    '''
+    Path to a compilation database (`compile_commands.json`). If specified, only the translation
+    units listed in it and the headers they include are extracted, and each extracted function is
+    tagged with the `translation_units` it belongs to.
+    '''
+    compile_commands_prefix_map: Dict[Path, Path] = field(default_factory=dict)
+    '''
+    Maps the directories that `compile_commands` refers to to the directories they are found in
+    on this machine, like `-fdebug-prefix-map`, e.g. if the repository was built in a container.
+    Files of the compilation database are resolved against the working directory of their
+    compile commands before they are remapped.
+    '''
 
     def __post_init__(self) -> None:
         if self.max_workers and self.max_workers < 1:
@@ -110,9 +180,39 @@ class ExtractConfig:
         for extractor in self.extractor_kwargs:
             if extractor not in EXTRACTORS:
                 raise ValueError(f'"{extractor}" is not a known extractor')
-
-
-class _CallableExtractor(CallablePoolProgress[Tuple[Extractor, Path, Optional[Path]], Sequence[SourceFunction],
+        if self.compile_commands and not self.compile_commands.is_file():
+            raise ValueError('Compilation database does not exist')
+
+
+def get_translation_units(compile_commands: PathLike, repo_path: PathLike,
+                          prefix_map: Optional[Mapping[Path, Path]] = None
+                          ) -> Dict[Path, List[str]]:
+    '''
+    Maps every file of a repository that is reachable from a compilation database to the
+    translation units it is compiled in.
+
+    Parameters:
+        compile_commands: Path to a `compile_commands.json` file.
+        repo_path: Path to the repository being extracted.
+        prefix_map: If specified, maps the directories the compilation database refers to to the directories they are found in on this machine.
+
+    Returns:
+        A dictionary mapping each reachable file inside the repository to the paths of its translation units.
+    '''
+    repo_path = Path(repo_path).resolve()
+    commands = compdb.load_compile_commands(compile_commands, prefix_map=prefix_map)
+    translation_units: Dict[Path, List[str]] = {}
+    for file, tus in compdb.get_translation_units(commands).items():
+        if file.is_relative_to(repo_path):
+            translation_units[file] = sorted(str(t) for t in tus)
+    if commands and not translation_units:
+        logger.warning(f'No file of "{Path(compile_commands).name}" is in "{repo_path}". '
+                       'If the repository was built elsewhere, map the directories of the '
+                       'compilation database to it with a prefix map.')
+    return translation_units
+
+
+class _CallableExtractor(CallablePoolProgress[Any, Sequence[SourceFunction],
                                               List[SourceFunction]]):
 
     def __init__(self, path: PathLike, config: ExtractConfig) -> None:
@@ -124,18 +224,25 @@ class _CallableExtractor(CallablePoolProgress[Tuple[Extractor, Path, Optional[Pa
                 return False
             return True
 
-        if config.exclude_subpaths & config.exclusive_subpaths:
-            raise ValueError('Cannot have overlapping paths in exclude_subpaths and '
-                             'exclusive_subpaths')
-        if config.checkpoint < 0:
-            raise ValueError('Checkpoint must be a non-negative integer')
-        self.checkpoint = config.checkpoint
-        self.use_checkpoint = config.use_checkpoint
         path = Path(path)
         if not all(is_relative_to(path, p)
                    for subpaths in [config.exclusive_subpaths, config.exclude_subpaths] for p in subpaths):
             raise ValueError('All subpaths must be relative to the '
                              'repository.')
+        file_metadata: Dict[Path, Mapping[str, Any]] = {}
+        scope: Optional[Sequence[Path]] = None
+        if config.compile_commands:
+            translation_units = get_translation_units(
+                config.compile_commands, path, prefix_map=config.compile_commands_prefix_map
+            )
+            file_metadata = {f: {'translation_units': t} for f, t in translation_units.items()}
+            scope = list(translation_units)
+
+        def get_extractable_files(extractor: Extractor, path: PathLike) -> Sequence[Path]:
+            if scope is None:
+                return extractor.get_extractable_files(path)
+            # Only consider files that are part of a compiled translation unit
+            return [f for s in scope for f in extractor.get_extractable_files(s)]
 
         def generate_extractors_and_paths(path: PathLike, extract_as_repo: bool,
                                           extractor_args: Dict[str, Sequence[Any]],
@@ -144,26 +251,38 @@ class _CallableExtractor(CallablePoolProgress[Tuple[Extractor, Path, Optional[Pa
             for language in EXTRACTORS:
                 extractor = get_extractor(language, *extractor_args.get(language, []),
                                           **extractor_kwargs.get(language, {}))
-                for file in extractor.get_extractable_files(path):
+                for file in get_extractable_files(extractor, path):
                     if not any(is_relative_to(p, file) for p in config.exclude_subpaths) \
                             or any(is_relative_to(p, file) for p in config.exclusive_subpaths):
                         yield extractor, file, repo_path
 
+        self._init_pool(_extract, lambda: generate_extractors_and_paths(path, config.extract_as_repo,
+                                                                        config.extractor_args,
+                                                                        config.extractor_kwargs),
+                        config, file_metadata=file_metadata)
+
+    def _init_pool(self, submit: Callable[[Any], Sequence[SourceFunction]],
+                   generate_items: Callable[[], Iterable[Any]], config: ExtractConfig,
+                   file_metadata: Mapping[Path, Mapping[str, Any]] = {}) -> None:
+        if config.exclude_subpaths & config.exclusive_subpaths:
+            raise ValueError('Cannot have overlapping paths in exclude_subpaths and '
+                             'exclusive_subpaths')
+        if config.checkpoint < 0:
+            raise ValueError('Checkpoint must be a non-negative integer')
+        self.checkpoint = config.checkpoint
+        self.use_checkpoint = config.use_checkpoint
+        self.file_metadata = file_metadata
         if config.accurate_progress:
-            extractors_and_paths = list(generate_extractors_and_paths(path, config.extract_as_repo,
-                                                                      config.extractor_args,
-                                                                      config.extractor_kwargs))
-            total = len(extractors_and_paths)
+            items: Iterable[Any] = list(generate_items())
+            total = len(items)  # type: ignore
             logger.info(f'Located {total} extractable source code files')
         else:
-            extractors_and_paths = generate_extractors_and_paths(path, config.extract_as_repo,
-                                                                 config.extractor_args,
-                                                                 config.extractor_kwargs)
+            items = generate_items()
             total = None
-        pool = ProcessPoolProgress(_extract, extractors_and_paths, Progress('Extracting functions...',
-                                                                            total=total),
+        pool = ProcessPoolProgress(submit, items, Progress('Extracting functions...',
+                                                           total=total),
                                    max_workers=config.max_workers)
-        super().__init__(pool)
+        CallablePoolProgress.__init__(self, pool)
         self.transform = config.transform
 
     def get_results(self) -> List[SourceFunction]:
@@ -172,13 +291,15 @@ class _CallableExtractor(CallablePoolProgress[Tuple[Extractor, Path, Optional[Pa
             results = {f.uid: f for f in load_checkpoint_data()}
             if results:
                 logger.info(f'Loaded {len(results)} checkpoint results')
-        for functions in self.pool:
-            for function in functions:
+        for result in self.pool:
+            for function in self.fan_out(result):
                 if function.uid in results:
                     logger.warning(f'Function "{function.uid}" was already extracted. Ignoring '
                                    'duplicate entry')
                     continue
-                elif self.transform:
+                if function.path in self.file_metadata:
+                    function.add_metadata(self.file_metadata[function.path])
+                if self.transform:
                     try:
                         function = self.transform(function)
                     except Exception as e:
@@ -191,6 +312,173 @@ class _CallableExtractor(CallablePoolProgress[Tuple[Extractor, Path, Optional[Pa
                     logger.info('Extraction checkpoint saved')
         return list(results.values())
 
+    def fan_out(self, result: Any) -> Iterable[SourceFunction]:
+        # Expands the result of a single pool task to all of the functions it represents
+        return result
+
+
+class _CallableCodeExtractor(_CallableExtractor):
+
+    def __init__(self, source_files: SourceFiles, repo_path: Optional[Path],
+                 config: ExtractConfig,
+                 file_metadata: Mapping[Path, Mapping[str, Any]] = {}) -> None:
+        self._init_extractors(config)
+
+        def generate_extractors_and_code() -> Generator[Tuple[Extractor, Path, bytes, Optional[Path]], None, None]:
+            for file, code in source_files(self.is_wanted):
+                for extractor in self.get_file_extractors(file):
+                    yield extractor, file, code, repo_path
+
+        self._init_pool(_extract_code, generate_extractors_and_code, config,
+                        file_metadata=file_metadata)
+
+    def _init_extractors(self, config: ExtractConfig) -> None:
+        if config.compile_commands:
+            raise ValueError('A compilation database can only be used to extract a repository '
+                             'from the file system')
+        self.extractors = [get_extractor(l, *config.extractor_args.get(l, []),
+                                         **config.extractor_kwargs.get(l, {}))
+                           for l in EXTRACTORS]
+        self.exclude_subpaths = config.exclude_subpaths
+        self.exclusive_subpaths = config.exclusive_subpaths
+
+    def get_file_extractors(self, file: Path) -> List[Extractor]:
+        return [e for e in self.extractors if e.is_extractable(file)]
+
+    def is_wanted(self, file: Path) -> bool:
+        if any(file.is_relative_to(p) for p in self.exclude_subpaths):
+            return False
+        if self.exclusive_subpaths and \
+                not any(file.is_relative_to(p) for p in self.exclusive_subpaths):
+            return False
+        return any(self.get_file_extractors(file))
+
+
+class _CallableGitExtractor(_CallableCodeExtractor):
+
+    def __init__(self, path: PathLike, revision: str, config: ExtractConfig) -> None:
+        repo = Repo(path)
+        commit = repo.commit(revision)
+        repo_name = Path(repo.working_tree_dir or repo.git_dir).name
+        self.repo_path = Path(repo_name.removesuffix('.git'))
+        # Other files with the same contents as the file that is actually extracted
+        self.duplicate_files: Dict[Path, List[Path]] = {}
+        file_metadata: Dict[Path, Mapping[str, Any]] = {}
+
+        def iter_blobs(is_wanted: Callable[[Path], bool]) -> Generator[Tuple[Path, bytes], None, None]:
+            files_by_blob: Dict[str, List[Path]] = {}
+            for item in commit.tree.traverse():
+                if isinstance(item, Blob) and item.mode != Blob.link_mode:
+                    file = self.repo_path / item.path
+                    if is_wanted(file):
+                        files_by_blob.setdefault(item.hexsha, []).append(file)
+            logger.info(f'Located {sum(len(f) for f in files_by_blob.values())} source code '
+                        f'files ({len(files_by_blob)} unique) at revision {commit.hexsha[:12]}')
+            # The blob SHA is a content hash, so each unique blob only has to be extracted once
+            for blob_sha, (file, *duplicate_files) in files_by_blob.items():
+                for blob_file in [file, *duplicate_files]:
+                    file_metadata[blob_file] = {'revision': commit.hexsha, 'blob_sha': blob_sha}
+                self.duplicate_files[file] = duplicate_files
+                yield file, repo.odb.stream(bytes.fromhex(blob_sha)).read()
+
+        super().__init__(iter_blobs, self.repo_path if config.extract_as_repo else None, config,
+                         file_metadata=file_metadata)
+        self.extract_as_repo = config.extract_as_repo
+
+    def fan_out(self, result: Sequence[SourceFunction]) -> Iterable[SourceFunction]:
+        repo_path = self.repo_path if self.extract_as_repo else None
+        for function in result:
+            yield function
+            for file in self.duplicate_files.get(function.path, []):
+                yield function.with_path(file, repo_path=repo_path)
+
+
+def _extract_blob(blob_and_code: Tuple[str, Extractor, Path, bytes, Optional[Path]]) -> Tuple[str, Sequence[SourceFunction]]:
+    blob_sha, *extractor_and_code = blob_and_code
+    return blob_sha, _extract_code(tuple(extractor_and_code))  # type: ignore
+
+
+class _CallableHistoryExtractor(_CallableCodeExtractor):
+
+    def __init__(self, path: PathLike, revisions: Union[str, Sequence[str]],
+                 config: ExtractConfig) -> None:
+        repo = Repo(path)
+        if isinstance(revisions, str):
+            # A commit range, such as "v1.0..v2.0", ordered from the oldest to the newest commit
+            commits = list(reversed(list(repo.iter_commits(revisions))))
+            revision_names = [c.hexsha for c in commits]
+        else:
+            commits = [repo.commit(r) for r in revisions]
+            revision_names = list(revisions)
+        if not commits:
+            raise ValueError('Must at least specify one revision')
+        repo_name = Path(repo.working_tree_dir or repo.git_dir).name
+        self.repo_path = Path(repo_name.removesuffix('.git'))
+        self.extract_as_repo = config.extract_as_repo
+        # Every file that has the contents of a blob, and the revisions containing that file
+        self.blob_files: Dict[str, Dict[Path, List[str]]] = {}
+        self._init_extractors(config)
+
+        def generate_blobs_and_code() -> Generator[Tuple[str, Extractor, Path, bytes, Optional[Path]], None, None]:
+            for revision_name, commit in zip(revision_names, commits):
+                for item in commit.tree.traverse():
+                    if isinstance(item, Blob) and item.mode != Blob.link_mode:
+                        file = self.repo_path / item.path
+                        if self.is_wanted(file):
+                            self.blob_files.setdefault(item.hexsha, {}) \
+                                .setdefault(file, []).append(revision_name)
+            logger.info(f'Located {len(self.blob_files)} unique source code files across '
+                        f'{len(commits)} revisions')
+            repo_path = self.repo_path if config.extract_as_repo else None
+            # Each unique blob is only extracted once, regardless of how many revisions contain it
+            for blob_sha, files in self.blob_files.items():
+                file = next(iter(files))
+                code = repo.odb.stream(bytes.fromhex(blob_sha)).read()
+                for extractor in self.get_file_extractors(file):
+                    yield blob_sha, extractor, file, code, repo_path
+
+        self._init_pool(_extract_blob, generate_blobs_and_code, config)
+
+    def fan_out(self, result: Tuple[str, Sequence[SourceFunction]]) -> Iterable[SourceFunction]:
+        blob_sha, functions = result
+        repo_path = self.repo_path if self.extract_as_repo else None
+        for function in functions:
+            for file, revisions in self.blob_files[blob_sha].items():
+                file_function = function.with_path(file, repo_path=repo_path)
+                # Qualify the UID with the blob, since a file may differ between revisions
+                scope, name = file_function.uid.rsplit('::', maxsplit=1)
+                history_function = SourceFunction(f'{scope}@{blob_sha[:12]}::{name}', file,
+                                                  function.name, function.definition,
+                                                  function.language, function.start_byte,
+                                                  function.end_byte,
+                                                  class_name=function.class_name)
+                history_function.set_metadata({**function.metadata,
+                                               'blob_sha': blob_sha,
+                                               'revisions': revisions,
+                                               'first_seen': revisions[0],
+                                               'last_seen': revisions[-1]})
+                yield history_function
+
+
+def _iter_archive(path: Path, is_wanted: Callable[[Path], bool]) -> Generator[Tuple[Path, bytes], None, None]:
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zip_file:
+            for zipfile_member in zip_file.infolist():
+                member_path = Path(zipfile_member.filename)
+                if not zipfile_member.is_dir() and is_wanted(member_path):
+                    yield member_path, zip_file.read(zipfile_member)
+    elif tarfile.is_tarfile(path):
+        # Open the tarball as a stream so that members are read sequentially
+        with tarfile.open(path, mode='r|*') as tarball:
+            for tarball_member in tarball:
+                member_path = Path(tarball_member.name)
+                if tarball_member.isfile() and is_wanted(member_path):
+                    member_file = tarball.extractfile(tarball_member)
+                    if member_file:
+                        yield member_path, member_file.read()
+    else:
+        raise ValueError(f'"{path.name}" is not a tarball or a zip file')
+
 
 @overload
 def extract(path: PathLike, config: ExtractConfig = ExtractConfig(),
@@ -209,3 +497,117 @@ def extract(path: PathLike, config: ExtractConfig = ExtractConfig(),
     if as_callable_pool:
         return extractor
     return extractor()
+
+
+@overload
+def extract_archive(path: PathLike, config: ExtractConfig = ExtractConfig(),
+                    as_callable_pool: Literal[False] = False) -> List[SourceFunction]: ...
+
+
+@overload
+def extract_archive(path: PathLike, config: ExtractConfig = ExtractConfig(),
+                    as_callable_pool: Literal[True] = True) -> _CallableExtractor: ...
+
+
+def extract_archive(path: PathLike, config: ExtractConfig = ExtractConfig(),
+                    as_callable_pool: bool = False) -> Union[List[SourceFunction],
+                                                             _CallableExtractor]:
+    '''
+    Extracts source code functions from a tarball or zip file without unpacking it to disk.
+
+    Matching archive members are read into memory and parsed directly by the extractors. The
+    paths of the extracted functions are relative to the root of the archive, and subpaths in
+    `config` are also interpreted relative to the root of the archive.
+
+    Parameters:
+        path: Path to the tarball or zip file.
+        config: Configuration settings for extracting source code functions. Transforms should not write back to the source code file, since it does not exist on disk.
+        as_callable_pool: If `True`, returns a `CallablePoolProgress` object that can be executed later to extract the functions.
+
+    Returns:
+        The extracted source code functions if `as_callable_pool` is `False`, or a `CallablePoolProgress` object if `as_callable_pool` is `True`.
+    '''
+    path = Path(path)
+    extractor = _CallableCodeExtractor(lambda is_wanted: _iter_archive(path, is_wanted),
+                                       Path() if config.extract_as_repo else None, config)
+    if as_callable_pool:
+        return extractor
+    return extractor()
+
+
+@overload
+def extract_revision(path: PathLike, revision: str = 'HEAD', config: ExtractConfig = ExtractConfig(),
+                     as_callable_pool: Literal[False] = False) -> List[SourceFunction]: ...
+
+
+@overload
+def extract_revision(path: PathLike, revision: str = 'HEAD', config: ExtractConfig = ExtractConfig(),
+                     as_callable_pool: Literal[True] = True) -> _CallableExtractor: ...
+
+
+def extract_revision(path: PathLike, revision: str = 'HEAD', config: ExtractConfig = ExtractConfig(),
+                     as_callable_pool: bool = False) -> Union[List[SourceFunction],
+                                                              _CallableExtractor]:
+    '''
+    Extracts source code functions from a Git repository at a given revision, reading the files
+    directly from the Git object database without checking out the working tree.
+
+    The repository may be a bare repository. Files with identical contents (the same blob) are
+    only extracted once, and each extracted function is annotated with the `revision` and the
+    `blob_sha` of its file. The paths of the extracted functions, as well as subpaths in
+    `config`, are relative to the parent of the repository.
+
+    Parameters:
+        path: Path to the Git repository.
+        revision: The commit, tag, or branch to extract.
+        config: Configuration settings for extracting source code functions. Transforms should not write back to the source code file, since it does not exist on disk.
+        as_callable_pool: If `True`, returns a `CallablePoolProgress` object that can be executed later to extract the functions.
+
+    Returns:
+        The extracted source code functions if `as_callable_pool` is `False`, or a `CallablePoolProgress` object if `as_callable_pool` is `True`.
+    '''
+    extractor = _CallableGitExtractor(path, revision, config)
+    if as_callable_pool:
+        return extractor
+    return extractor()
+
+
+@overload
+def extract_history(path: PathLike, revisions: Union[str, Sequence[str]],
+                    config: ExtractConfig = ExtractConfig(),
+                    as_callable_pool: Literal[False] = False) -> List[SourceFunction]: ...
+
+
+@overload
+def extract_history(path: PathLike, revisions: Union[str, Sequence[str]],
+                    config: ExtractConfig = ExtractConfig(),
+                    as_callable_pool: Literal[True] = True) -> _CallableExtractor: ...
+
+
+def extract_history(path: PathLike, revisions: Union[str, Sequence[str]],
+                    config: ExtractConfig = ExtractConfig(),
+                    as_callable_pool: bool = False) -> Union[List[SourceFunction],
+                                                             _CallableExtractor]:
+    '''
+    Extracts source code functions from many revisions of a Git repository, reading the files
+    directly from the Git object database.
+
+    Each unique blob is extracted only once, no matter how many revisions contain it, so the cost
+    scales with the number of unique blobs rather than the number of revisions. One function is
+    produced for every file and blob it is defined in, with its UID qualified by the blob
+    (`scope@blob::name`) and annotated with the `blob_sha`, the `revisions` containing it, and
+    the `first_seen` and `last_seen` revisions.
+
+    Parameters:
+        path: Path to the Git repository.
+        revisions: Either a commit range (e.g. `"v1.0..v2.0"`), or a sequence of commits, tags, or branches ordered from oldest to newest.
+        config: Configuration settings for extracting source code functions. Transforms should not write back to the source code file, since it does not exist on disk.
+        as_callable_pool: If `True`, returns a `CallablePoolProgress` object that can be executed later to extract the functions.
+
+    Returns:
+        The extracted source code functions if `as_callable_pool` is `False`, or a `CallablePoolProgress` object if `as_callable_pool` is `True`.
+    '''
+    extractor = _CallableHistoryExtractor(path, revisions, config)
+    if as_callable_pool:
+        return extractor
+    return extractor()
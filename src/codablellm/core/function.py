@@ -1,9 +1,11 @@
 
 from dataclasses import dataclass, field, fields
+import hashlib
 import logging
 from pathlib import Path
-from typing import Any, Dict, Final, Mapping, Optional, TypedDict, Union, no_type_check
-import uuid
+import re
+from typing import (Any, Dict, Final, Mapping, MutableMapping, Optional, TypedDict, Union,
+                    no_type_check)
 
 from tree_sitter import Node, Parser
 from tree_sitter import Language, Parser
@@ -126,6 +128,23 @@ class SourceFunction(Function):
             source_function.path.write_text(modified_code)
         return source_function
 
+    def with_path(self, file_path: Path, repo_path: Optional[Path] = None) -> 'SourceFunction':
+        '''
+        Creates a copy of this function that is located in a different source code file, such
+        as another file with identical contents.
+
+        Parameters:
+            file_path: The path of the other source code file.
+            repo_path: The path of the repository the other file belongs to, if any.
+
+        Returns:
+            A copy of this function located at `file_path`.
+        '''
+        return SourceFunction.from_source(file_path, self.language, self.definition, self.name,
+                                          self.start_byte, self.end_byte,
+                                          class_name=self.class_name, repo_path=repo_path,
+                                          metadata=self.metadata)
+
     def to_json(self) -> SourceFunctionJSONObject:
         function_json = super().to_json()
         return {'language': self.language, 'start_byte': self.start_byte,
@@ -183,36 +202,111 @@ GET_C_SYMBOLS_QUERY: Final[str] = (
 C_PARSER: Final[Parser] = Parser(Language(tsc.language()))
 
 
+def get_stripped_symbol(symbol: str, binary: Union[str, Path]) -> str:
+    '''
+    Derives the stripped name of a symbol in a binary.
+
+    The name is derived from a digest of the binary's path and the symbol, so a symbol is
+    stripped to the same name in every function of a binary, no matter which process strips it.
+    The digest is long enough that two symbols of a binary are practically never stripped to
+    the same name.
+
+    Parameters:
+        symbol: The symbol to strip.
+        binary: The path of the binary the symbol belongs to.
+
+    Returns:
+        The stripped name of the symbol, such as `sub_1a2b3c4d5e6f7a8b`.
+    '''
+    digest = hashlib.sha256(f'{binary}\0{symbol}'.encode()).hexdigest()
+    return f'sub_{digest[:16]}'
+
+
+def strip_assembly(assembly: str, symbol_mapping: Mapping[str, str]) -> str:
+    '''
+    Replaces the symbols in assembly code with their stripped names in a single pass.
+
+    Parameters:
+        assembly: The assembly code.
+        symbol_mapping: A mapping of the symbols to replace to their stripped names.
+
+    Returns:
+        The assembly code with the symbols replaced. Only whole identifiers are replaced.
+    '''
+    if not symbol_mapping:
+        return assembly
+    # Longer symbols come first, so that a symbol never shadows another that it prefixes
+    symbols = sorted(symbol_mapping, key=len, reverse=True)
+    pattern = re.compile(r'(?<![\w$])(?:' + '|'.join(map(re.escape, symbols)) + r')(?![\w$])')
+    return pattern.sub(lambda m: symbol_mapping[m.group(0)], assembly)
+
+
 @dataclass(frozen=True)
 class DecompiledFunction(Function):
     assembly: str
     architecture: str
 
-    def to_stripped(self) -> 'DecompiledFunction':
-        definition = self.definition
-        assembly = self.assembly
-        symbol_mapping: Dict[str, str] = {}
+    def to_stripped(self, symbol_mapping: Optional[MutableMapping[str, str]] = None
+                    ) -> 'DecompiledFunction':
+        '''
+        Creates a copy of this function with its symbols replaced by ambiguous names.
+
+        Parameters:
+            symbol_mapping: The stripped names of the binary's symbols, which are reused and
+                extended with the symbols of this function. Sharing it between the functions of a
+                binary avoids deriving the same names again.
+
+        Returns:
+            The stripped function.
+        '''
+        if symbol_mapping is None:
+            symbol_mapping = {}
+        function_symbols: Dict[str, str] = {}
 
         def strip(node: Node) -> str:
-            nonlocal symbol_mapping, assembly
             if not node.text:
                 raise ValueError('Expected all function.symbols to have '
                                  f'text: {node}')
-            orig_function = node.text.decode()
-            stripped_symbol = symbol_mapping.setdefault(orig_function,
-                                                        f'sub_{str(uuid.uuid4()).split("-", maxsplit=1)[0]}')
-            assembly = assembly.replace(orig_function, stripped_symbol)
-            return stripped_symbol
+            return get_symbol(node.text.decode())
+
+        def get_symbol(symbol: str) -> str:
+            if symbol not in symbol_mapping:
+                symbol_mapping[symbol] = get_stripped_symbol(symbol, self.path)
+            function_symbols[symbol] = symbol_mapping[symbol]
+            return function_symbols[symbol]
 
-        editor = ASTEditor(C_PARSER, definition)
         logger.debug(f'Stripping {self.name}...')
-        editor.match_and_edit(GET_C_SYMBOLS_QUERY,
-                              {'function.symbols': strip})
-        definition = editor.source_code
-        first_function, *_ = (f for f in symbol_mapping.values()
-                              if f.startswith('sub_'))
-        return DecompiledFunction(self.uid, self.path, definition, first_function, assembly,
-                                  self.architecture)
+        name = get_symbol(self.name)
+        definition = self.definition
+        if definition:
+            editor = ASTEditor(C_PARSER, definition)
+            editor.match_and_edit(GET_C_SYMBOLS_QUERY,
+                                  {'function.symbols': strip})
+            definition = editor.source_code
+        function = DecompiledFunction(self.uid, self.path, name, definition,
+                                      strip_assembly(self.assembly, function_symbols),
+                                      self.architecture)
+        function.set_metadata(self.metadata)
+        return function
+
+    def with_path(self, path: Path) -> 'DecompiledFunction':
+        '''
+        Creates a copy of this function that is located in a different binary, such as another
+        binary with identical contents.
+
+        Parameters:
+            path: The path of the other binary.
+
+        Returns:
+            A copy of this function located at `path`.
+        '''
+        # Keep the address of functions whose names are not unique in the binary
+        _, qualified_name = self.uid.rsplit('::', maxsplit=1)
+        function = DecompiledFunction(f'{path}::{qualified_name}', path,
+                                      self.name, self.definition, self.assembly,
+                                      self.architecture)
+        function.set_metadata(self.metadata)
+        return function
 
     def to_json(self) -> DecompiledFunctionJSONObject:
         function_json = super().to_json()
@@ -220,7 +314,12 @@ class DecompiledFunction(Function):
                 **function_json}
 
     @staticmethod
-    def create_uid(file_path: Path, name: str, _repo_path: Optional[Path] = None) -> str:
+    def create_uid(file_path: Path, name: str, _repo_path: Optional[Path] = None,
+                   address: Optional[int] = None) -> str:
+        # Functions with the same name in a binary (e.g. static functions of different files)
+        # are told apart by their addresses
+        if address is not None:
+            return f'{file_path}::{name}@{address:#x}'
         return f'{file_path}::{name}'
 
     @classmethod
@@ -233,7 +332,18 @@ class DecompiledFunction(Function):
     @no_type_check
     @classmethod
     def from_decompiled_json(cls, json_obj: JSONObject) -> 'DecompiledFunction':
-        return cls(DecompiledFunction.create_uid(Path(json_obj['path']), json_obj['name']),
-                   Path(json_obj['path']
-                        ), json_obj['name'], json_obj['definition'],
-                   json_obj['assembly'], json_obj['architecture'])
+        # Decompilers mark functions whose names are not unique in their binaries
+        address = json_obj.get('address') if json_obj.get('duplicate_name') else None
+        function = cls(DecompiledFunction.create_uid(Path(json_obj['path']), json_obj['name'],
+                                                     address=address),
+                       Path(json_obj['path']
+                            ), json_obj['name'], json_obj['definition'],
+                       json_obj['assembly'], json_obj['architecture'])
+        # The address of the function's entry point, relative to the lowest address the binary
+        # is loaded at
+        if json_obj.get('address') is not None:
+            function.set_metadata({'address': json_obj['address']})
+        # The absolute addresses and names of the symbols the function refers to
+        if json_obj.get('references'):
+            function.set_metadata({'references': json_obj['references']})
+        return function
@@ -5,12 +5,13 @@ from functools import wraps
 import importlib
 import json
 import logging
+import math
 import os
 from pathlib import Path
 from queue import Queue
 import tempfile
-from typing import (Any, Callable, Concatenate, Dict, Generator, Iterable, List, Optional, Protocol, Sequence, Set,
-                    Type, TypeVar, Union, overload)
+from typing import (Any, Callable, Concatenate, Dict, Final, Generator, Iterable, List, Literal, NamedTuple,
+                    Optional, Protocol, Sequence, Tuple, Type, TypeVar, Union, overload)
 
 import tiktoken
 from tree_sitter import Node, Parser
@@ -101,16 +102,196 @@ def is_binary(file_path: PathLike) -> bool:
     file_path = Path(file_path)
     if file_path.is_file():
         with open(file_path, 'rb') as file:
-            # Read the first 1KB of the file and check for a null byte or non-printable characters
+            # Read the first 1KB of the file and check for a null byte or invalid UTF-8
             chunk = file.read(1024)
-            return b'\0' in chunk or any(byte > 127 for byte in chunk)
+            if b'\0' in chunk:
+                return True
+            try:
+                chunk.decode('utf-8')
+            except UnicodeDecodeError as e:
+                # A multi-byte character may be cut off at the end of the chunk
+                return e.reason != 'unexpected end of data'
+    return False
+
+
+BinaryFormat = Literal['elf', 'pe', 'macho', 'ar']
+'''
+Executable and library file formats that can be recognized by their magic bytes.
+'''
+
+MACHO_MAGIC: Final[Dict[bytes, Literal['big', 'little']]] = {
+    b'\xfe\xed\xfa\xce': 'big', b'\xce\xfa\xed\xfe': 'little',
+    b'\xfe\xed\xfa\xcf': 'big', b'\xcf\xfa\xed\xfe': 'little'
+}
+'''
+Magic bytes of 32-bit and 64-bit Mach-O files, mapped to their byte order.
+'''
+
+
+def get_binary_format(file_path: PathLike) -> Optional[BinaryFormat]:
+    '''
+    Recognizes the format of an executable, object file, or library by its magic bytes.
+
+    Parameters:
+        file_path: Path to a potential binary file.
+
+    Returns:
+        The format of the binary, or `None` if it is not a recognized binary.
+    '''
+    try:
+        with open(file_path, 'rb') as file:
+            header = file.read(64)
+            if header.startswith(b'\x7fELF'):
+                return 'elf'
+            if header.startswith(b'!<arch>\n'):
+                return 'ar'
+            if header[:4] in MACHO_MAGIC:
+                return 'macho'
+            # Universal Mach-O binaries share their magic with Java class files, which store a
+            # version of at least 45 where universal binaries store a small number of architectures
+            if header.startswith(b'\xca\xfe\xba\xbe') and \
+                    0 < int.from_bytes(header[4:8], 'big') < 20:
+                return 'macho'
+            if header.startswith(b'MZ') and len(header) == 64:
+                # DOS executables only contain a PE image if the PE signature follows
+                file.seek(int.from_bytes(header[60:64], 'little'))
+                if file.read(4) == b'PE\0\0':
+                    return 'pe'
+    except (IsADirectoryError, FileNotFoundError, PermissionError):
+        pass
+    return None
+
+
+def is_object_file(file_path: PathLike) -> bool:
+    '''
+    Checks if a file is a relocatable ELF or Mach-O object file, i.e. a file that has been
+    compiled but not linked.
+
+    Parameters:
+        file_path: Path to a potential object file.
+
+    Returns:
+        True if the file is an object file.
+    '''
+    binary_format = get_binary_format(file_path)
+    with open(file_path, 'rb') as file:
+        header = file.read(18)
+    if binary_format == 'elf' and len(header) == 18:
+        # e_type is ET_REL, in the byte order given by EI_DATA
+        return int.from_bytes(header[16:18], 'big' if header[5] == 2 else 'little') == 1
+    if binary_format == 'macho' and header[:4] in MACHO_MAGIC and len(header) >= 16:
+        # filetype is MH_OBJECT
+        return int.from_bytes(header[12:16], MACHO_MAGIC[header[:4]]) == 1
     return False
 
 
+CGROUP_PATH: Final[Path] = Path('/sys/fs/cgroup')
+'''
+The mount point of the cgroup v2 hierarchy, which contains the resource limits of the current
+container.
+'''
+
+
+def _read_cgroup_file(name: str) -> Optional[str]:
+    try:
+        return (CGROUP_PATH / name).read_text().strip()
+    except OSError:
+        return None
+
+
+def get_cpu_limit() -> int:
+    '''
+    Retrieves the number of CPUs this process may use, taking its CPU affinity and the cgroup v2
+    CPU quota of its container (`cpu.max`) into account.
+
+    Returns:
+        The number of usable CPUs, which is at least 1.
+    '''
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    cpu_max = _read_cgroup_file('cpu.max')
+    if cpu_max:
+        quota, *period = cpu_max.split()
+        if quota != 'max':
+            cpus = min(cpus, math.ceil(int(quota) / int(period[0] if period else 100000)))
+    return max(1, cpus)
+
+
+def get_memory_limit() -> Optional[int]:
+    '''
+    Retrieves the memory available to this process, which is the smaller of the memory
+    available on the host and the headroom left by the cgroup v2 memory limit of its container
+    (`memory.max`).
+
+    Returns:
+        The available memory in bytes, or `None` if it cannot be determined.
+    '''
+    limits: List[int] = []
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    limits.append(int(line.split()[1]) * 1024)
+                    break
+    except OSError:
+        pass
+    memory_max = _read_cgroup_file('memory.max')
+    if memory_max and memory_max != 'max':
+        limits.append(max(0, int(memory_max) - int(_read_cgroup_file('memory.current') or 0)))
+    return min(limits) if limits else None
+
+
+def get_worker_count(max_workers: Optional[int] = None,
+                     worker_memory: Optional[int] = None) -> int:
+    '''
+    Determines how many workers can run concurrently without oversubscribing the CPUs or the
+    memory of the host or its container.
+
+    Parameters:
+        max_workers: An explicit number of workers, which is used as is.
+        worker_memory: The estimated peak memory of a single worker in bytes. If `None`, only the CPU limit is taken into account.
+
+    Returns:
+        The number of workers, which is at least 1.
+    '''
+    if max_workers:
+        return max_workers
+    workers = get_cpu_limit()
+    if worker_memory:
+        memory = get_memory_limit()
+        if memory is not None and memory // worker_memory < workers:
+            workers = max(1, memory // worker_memory)
+            logger.info(f'Limiting to {workers} workers, since each worker needs up to '
+                        f'{get_readable_file_size(worker_memory)} of the '
+                        f'{get_readable_file_size(memory)} available')
+    return workers
+
+
 def resolve_kwargs(**kwargs: Any) -> Dict[str, Any]:
     return {k: v for k, v in kwargs.items() if v is not None}
 
 
+class ASTEdit(NamedTuple):
+    '''
+    A pending replacement of a byte range in the source code of an `ASTEditor`.
+    '''
+
+    start_byte: int
+    '''
+    The byte offset where the replaced code starts.
+    '''
+    end_byte: int
+    '''
+    The byte offset where the replaced code ends.
+    '''
+    new_code: str
+    '''
+    The code to replace the byte range with.
+    '''
+
+
 class ASTEditor:
     '''
     A Tree-sitter AST editor.
@@ -152,24 +333,85 @@ class ASTEditor:
         if self.ensure_parsable and self.ast.root_node.has_error:
             raise TSParsingError('Parsing error while editing code')
 
+    def plan_edits(self, query: str,
+                   groups_and_replacement: Dict[str, Union[str, Callable[[Node], str]]]) -> List[ASTEdit]:
+        '''
+        Runs a Tree-sitter query once over the current AST and collects an edit for every node
+        captured by one of the specified groups, without modifying the source code.
+
+        Nodes are visited in source order, and a callable replacement is invoked exactly once
+        per captured node. If captured nodes overlap, the outermost node that starts first is
+        kept and the overlapping edits are discarded.
+
+        Parameters:
+            query: The Tree-sitter query to match against the AST.
+            groups_and_replacement: A mapping of capture group names to either the replacement code or a callable that returns the replacement code for a captured node.
+
+        Returns:
+            The non-overlapping edits, sorted by their starting byte.
+        '''
+        captured: Dict[Tuple[int, int], Tuple[Node, Union[str, Callable[[Node], str]]]] = {}
+        for _, capture in self.ast.language.query(query).matches(self.ast.root_node):
+            for group, replacement in groups_and_replacement.items():
+                for node in capture.get(group, []):
+                    captured.setdefault((node.start_byte, node.end_byte),
+                                        (node, replacement))
+        edits: List[ASTEdit] = []
+        last_end_byte = -1
+        for (start_byte, end_byte), (node, replacement) in sorted(captured.items(),
+                                                                  key=lambda c: (c[0][0], -c[0][1])):
+            if start_byte < last_end_byte:
+                logger.debug(f'Skipping edit of {node.type} at bytes {start_byte}-{end_byte} '
+                             'because it overlaps a previous edit')
+                continue
+            if not isinstance(replacement, str):
+                replacement = replacement(node)
+            edits.append(ASTEdit(start_byte, end_byte, replacement))
+            last_end_byte = end_byte
+        return edits
+
+    def apply_edits(self, edits: Iterable[ASTEdit]) -> None:
+        '''
+        Applies a batch of non-overlapping edits in a single pass and re-parses the source code
+        once.
+
+        Parameters:
+            edits: The edits to apply. Byte offsets refer to the current source code.
+
+        Raises:
+            ValueError: If any of the edits overlap.
+            TSParsingError: If `ensure_parsable` is `True` and the edited code cannot be parsed.
+        '''
+        source_code = self.source_code.encode()
+        chunks: List[bytes] = []
+        end_byte = len(source_code)
+        # Splice in reverse byte order so that earlier offsets remain valid
+        for edit in sorted(edits, key=lambda e: e.start_byte, reverse=True):
+            if edit.end_byte > end_byte:
+                raise ValueError('Cannot apply overlapping edits')
+            chunks.append(source_code[edit.end_byte:end_byte])
+            chunks.append(edit.new_code.encode())
+            end_byte = edit.start_byte
+        if not chunks:
+            return
+        chunks.append(source_code[:end_byte])
+        edited_code = b''.join(reversed(chunks))
+        self.source_code = edited_code.decode()
+        self.ast = self.parser.parse(edited_code)
+        # Check for parsing errors if required
+        if self.ensure_parsable and self.ast.root_node.has_error:
+            raise TSParsingError('Parsing error while editing code')
+
     def match_and_edit(self, query: str,
                        groups_and_replacement: Dict[str, Union[str, Callable[[Node], str]]]) -> None:
-        modified_nodes: Set[Node] = set()
-        matches = self.ast.language.query(query).matches(self.ast.root_node)
-        for idx in range(len(matches)):
-            _, capture = matches.pop(idx)
-            for group, replacement in groups_and_replacement.items():
-                nodes = capture.get(group)
-                if nodes:
-                    node = nodes.pop()
-                    if node not in modified_nodes:
-                        if not isinstance(replacement, str):
-                            replacement = replacement(node)
-                        self.edit_code(node, replacement)
-                        modified_nodes.add(node)
-                        matches = self.ast.language.query(
-                            query).matches(self.ast.root_node)
-                        break
+        '''
+        Replaces every node captured by the specified groups of a Tree-sitter query.
+
+        Parameters:
+            query: The Tree-sitter query to match against the AST.
+            groups_and_replacement: A mapping of capture group names to either the replacement code or a callable that returns the replacement code for a captured node.
+        '''
+        self.apply_edits(self.plan_edits(query, groups_and_replacement))
 
 
 def requires_extra(extra: str, feature: str, module: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
@@ -3,21 +3,28 @@ Code dataset generation.
 '''
 
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
 from collections.abc import Mapping
 from contextlib import nullcontext
-from dataclasses import dataclass, field
+import csv
+from dataclasses import dataclass, field, replace
+import json
 import logging
+import math
 import os
 from pathlib import Path
+import pickle
 import shutil
+import sys
 from tempfile import TemporaryDirectory
-from typing import (Any, Callable, Dict, Iterable, Iterator, List, Literal,
-                    Sequence, Tuple, TypeVar, Union, overload)
+from typing import (Any, Callable, ClassVar, Collection, Dict, Final, Iterable, Iterator, List,
+                    Literal, Optional, Sequence, Set, Tuple, TypeVar, Union, overload)
 
 from numpy import isin
-from pandas import DataFrame
+from pandas import Categorical, DataFrame
 
-from codablellm.core import decompiler, extractor, utils
+from codablellm.core import compdb, decompiler, dwarf, extractor, utils
 from codablellm.core.dashboard import ProcessPoolProgress, Progress
 from codablellm.core.function import DecompiledFunction, SourceFunction
 
@@ -29,6 +36,11 @@ class Dataset(ABC):
     A code dataset.
     '''
 
+    INDEX: ClassVar[str] = 'uid'
+    '''
+    The column that the DataFrame of the dataset is indexed by.
+    '''
+
     @abstractmethod
     def to_df(self) -> DataFrame:
         '''
@@ -39,11 +51,33 @@ class Dataset(ABC):
         '''
         pass
 
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        '''
+        Iterates over the rows of the dataset's DataFrame one at a time, without building the
+        whole DataFrame.
+
+        Returns:
+            An iterator over the rows, each of which includes the `INDEX` column.
+        '''
+        df = self.to_df()
+        for index, row in df.iterrows():
+            yield {self.INDEX: index, **row}
+
+    def get_columns(self) -> List[str]:
+        '''
+        Retrieves the columns of the dataset's rows, in the order they first appear in.
+
+        Returns:
+            The columns of all rows, including the `INDEX` column.
+        '''
+        return list(dict.fromkeys(c for r in self.iter_rows() for c in r))
+
     def save_as(self, path: utils.PathLike) -> None:
         '''
         Converts the dataset to a DataFrame and exports it to the specified file path based on
         its extension. The export format is determined by the file extension provided in the
-        `path` parameter.
+        `path` parameter. JSON Lines, CSV and TSV files are written one row at a time instead,
+        without building the DataFrame, and `-` writes JSON Lines to the standard output.
 
         Example:
             ```py
@@ -53,7 +87,7 @@ class Dataset(ABC):
             Successfully saves the dataset as an Excel file to "output.xlsx".
 
         Supported Formats and Extensions:
-            - JSON: .json, .jsonl
+            - JSON: .json, .jsonl, - (standard output)
             - CSV/TSV: .csv, .tsv
             - Excel: .xlsx, .xls, .xlsm **(requires codablellm[excel])**
             - Markdown: .md, .markdown **(requires codablellm[markdown])**
@@ -81,12 +115,14 @@ class Dataset(ABC):
         def to_markdown(df: DataFrame, path: Path) -> None:
             df.to_markdown(path)
 
+        if str(path) == STDOUT_PATH or Path(path).suffix.casefold() in STREAMING_EXTENSIONS:
+            # Find the columns up front, since the rows may not all have the same columns
+            save_rows(self.iter_rows(), path, self.INDEX, columns=self.get_columns())
+            return
         path = Path(path)
         extension = path.suffix.casefold()
-        if extension in [e.casefold() for e in ['.json', '.jsonl']]:
-            self.to_df().to_json(path, lines=extension == '.jsonl'.casefold(), orient='records')
-        elif extension in [e.casefold() for e in ['.csv', '.tsv']]:
-            self.to_df().to_csv(path, sep=',' if extension == '.csv'.casefold() else '\t')
+        if extension == '.json'.casefold():
+            self.to_df().to_json(path, orient='records')
         elif extension in [e.casefold() for e in ['.xlsx', '.xls', '.xlsm']]:
             to_excel(self.to_df(), path)
         elif extension in [e.casefold() for e in ['.md', '.markdown']]:
@@ -173,6 +209,173 @@ class SourceCodeDatasetConfig:
 T = TypeVar('T')
 
 
+STDOUT_PATH: Final[str] = '-'
+'''
+The path that `save_rows` and `Dataset.save_as` interpret as the standard output.
+'''
+STREAMING_EXTENSIONS: Final[Tuple[str, ...]] = ('.jsonl', '.csv', '.tsv')
+'''
+The file extensions of the formats that `save_rows` writes one row at a time.
+'''
+
+
+def save_rows(rows: Iterable[Mapping[str, Any]], path: utils.PathLike, index: str,
+              columns: Optional[Sequence[str]] = None, buffer_size: int = 1 << 20) -> None:
+    '''
+    Writes rows of a dataset to a JSON Lines, CSV or TSV file one row at a time, so that the
+    memory used does not grow with the number of rows. The file is synced to disk once every
+    row is written.
+
+    The rows are written like `DataFrame.to_json(orient='records', lines=True)` and
+    `DataFrame.to_csv` would write the DataFrame of the rows: JSON Lines files omit the `index`
+    column, and CSV and TSV files start with it.
+
+    Parameters:
+        rows: The rows to write, such as those of `Dataset.iter_rows`.
+        path: Path to save the rows at, or `-` to write JSON Lines to the standard output.
+        index: The column that identifies each row.
+        columns: The columns of the rows. Defaults to the columns of each row for JSON Lines files, and to the columns of the first row for CSV and TSV files, in which case columns that only appear in later rows are not written.
+        buffer_size: Number of bytes that are buffered before they are written.
+
+    Raises:
+        ValueError: If the format of `path` cannot be written one row at a time.
+    '''
+    to_stdout = str(path) == STDOUT_PATH
+    extension = '.jsonl' if to_stdout else Path(path).suffix.casefold()
+    if extension not in STREAMING_EXTENSIONS:
+        raise ValueError(f'Unsupported file extension for streaming: {Path(path).suffix}')
+    file = sys.stdout if to_stdout else \
+        open(path, 'w', buffering=buffer_size, newline='', encoding='utf-8')
+    try:
+        if extension == '.jsonl':
+            for row in rows:
+                # Columns that are missing from a row are written as null, if they are known
+                record = {c: row.get(c) for c in columns} if columns is not None else row
+                file.write(json.dumps({k: v for k, v in record.items() if k != index},
+                                      default=str))
+                file.write('\n')
+        else:
+            writer: Optional[csv.DictWriter[str]] = None
+            missing_columns: Set[str] = set()
+            for row in rows:
+                if writer is None:
+                    if columns is None:
+                        columns = list(row)
+                    # The index comes first, as in DataFrame.to_csv
+                    writer = csv.DictWriter(file, [index, *(c for c in columns if c != index)],
+                                            delimiter=',' if extension == '.csv' else '\t',
+                                            lineterminator='\n', extrasaction='ignore')
+                    writer.writeheader()
+                new_columns = row.keys() - writer.fieldnames - missing_columns
+                if new_columns:
+                    logger.warning(f'Not writing the columns {", ".join(sorted(new_columns))}, '
+                                   'which are missing from the first row')
+                    missing_columns.update(new_columns)
+                writer.writerow(row)
+        file.flush()
+        if not to_stdout:
+            os.fsync(file.fileno())
+    finally:
+        if not to_stdout:
+            file.close()
+    if not to_stdout:
+        logger.info(f'Successfully saved {Path(path).name}')
+
+
+class _DataFrameBuilder:
+    '''
+    Builds a DataFrame column by column in a single pass over the rows of a dataset, instead of
+    creating a DataFrame for every row.
+    '''
+
+    def __init__(self, categorical_columns: Collection[str] = ()) -> None:
+        '''
+        Initializes a new DataFrame builder.
+
+        Parameters:
+            categorical_columns: Columns of repeated strings, such as paths, which are stored as categoricals if none of their values are missing.
+        '''
+        self.categorical_columns = categorical_columns
+        self._columns: Dict[str, List[Any]] = {}
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def add_row(self, row: Mapping[str, Any]) -> None:
+        '''
+        Appends a row to the DataFrame. Columns that are missing from the row are left empty.
+
+        Parameters:
+            row: The values of the row's columns.
+        '''
+        for name, value in row.items():
+            column = self._columns.setdefault(name, [])
+            if len(column) < self._length:
+                column.extend([None] * (self._length - len(column)))
+            column.append(value)
+        self._length += 1
+
+    def build(self, index: str) -> DataFrame:
+        '''
+        Builds the DataFrame.
+
+        Parameters:
+            index: The column to index the DataFrame by.
+
+        Returns:
+            The DataFrame, or an empty DataFrame if no rows were added.
+        '''
+        if not self._length:
+            logger.debug(f'Could not set DataFrame index to "{index}", returning an empty '
+                         'DataFrame to assume that the DataFrame is empty')
+            return DataFrame()
+        data: Dict[str, Any] = {}
+        for name, column in self._columns.items():
+            column.extend([None] * (self._length - len(column)))
+            if name in self.categorical_columns and all(v is not None for v in column):
+                data[name] = Categorical(column)
+            else:
+                data[name] = column
+        return DataFrame(data).set_index(index)
+
+
+def get_source_function_row(function: SourceFunction) -> Dict[str, Any]:
+    '''
+    Converts a source code function to a row of a source code dataset's DataFrame.
+
+    Parameters:
+        function: The source code function.
+
+    Returns:
+        The row of the function, with its metadata flattened into columns.
+    '''
+    function_dict: Dict[str, Any] = dict(function.to_json())
+    # Flatten SourceFunction.metadata
+    function_dict.update(function_dict.pop('metadata'))
+    return function_dict
+
+
+def save_source_functions(functions: Iterable[SourceFunction], path: utils.PathLike) -> None:
+    '''
+    Writes source code functions to a JSON Lines, CSV or TSV file as soon as they are
+    extracted, without collecting them in a dataset first.
+
+    Example:
+        ```py
+        save_source_functions(extractor.extract('path/to/my/repository'), 'functions.jsonl')
+        ```
+
+    Parameters:
+        functions: The source code functions to write, such as the functions of an extraction.
+        path: Path to save the functions at, or `-` to write JSON Lines to the standard output.
+
+    Raises:
+        ValueError: If the format of `path` cannot be written one function at a time.
+    '''
+    save_rows((get_source_function_row(f) for f in functions), path, SourceCodeDataset.INDEX)
+
+
 class SourceCodeDataset(Dataset, Mapping[str, SourceFunction]):
     '''
     A source code dataset.
@@ -211,20 +414,22 @@ class SourceCodeDataset(Dataset, Mapping[str, SourceFunction]):
             return default
 
     def to_df(self) -> DataFrame:
-        function_dicts: List[Dict[str, Any]] = []
+        builder = _DataFrameBuilder(categorical_columns={'path', 'language', 'class_name'})
+        for row in self.iter_rows():
+            builder.add_row(row)
+        return builder.build(self.INDEX)
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        return (get_source_function_row(f) for f in self.values())
+
+    def get_columns(self) -> List[str]:
+        # Only the metadata of the functions differs between rows
+        columns: Dict[str, None] = {}
         for function in self.values():
-            function_json = function.to_json()
-            function_dict = dict(function_json)
-            # Flatten SourceFunction.metadata
-            del function_dict['metadata']
-            function_dict.update(function_json['metadata'])
-            function_dicts.append(function_dict)
-        try:
-            return DataFrame(function_dicts).set_index('uid')
-        except KeyError:
-            logger.debug('Could not set DataFrame index to "uid", returning an empty '
-                         'DataFrame to assume that the DataFrame is empty')
-            return DataFrame()
+            if not columns:
+                columns.update(dict.fromkeys(k for k in function.to_json() if k != 'metadata'))
+            columns.update(dict.fromkeys(function.metadata))
+        return list(columns)
 
     def get_common_directory(self) -> Path:
         '''
@@ -290,14 +495,34 @@ class SourceCodeDataset(Dataset, Mapping[str, SourceFunction]):
         if config.generation_mode != 'temp-append':
             ctx = TemporaryDirectory(delete=config.delete_temp) if config.generation_mode == 'temp' \
                 else nullcontext()
+            extract_config = config.extract_config
             with ctx as temp_dir:
                 if temp_dir:
                     # If a temporary directory was created, copy the repository
                     copied_repo_dir = Path(temp_dir) / Path(path).name
                     shutil.copytree(path, copied_repo_dir)
+                    if extract_config.compile_commands:
+                        # The compilation database refers to the original repository
+                        repo_map = {Path(path).resolve(): copied_repo_dir.resolve()}
+                        original_map = {v: k for k, v in repo_map.items()}
+                        prefix_map = {p: compdb.remap_path(Path(r).resolve(), repo_map)
+                                      for p, r in
+                                      extract_config.compile_commands_prefix_map.items()}
+                        extract_config = replace(extract_config,
+                                                 compile_commands_prefix_map={**repo_map,
+                                                                              **prefix_map})
                     path = copied_repo_dir
                 extraction_pool = extractor.extract(path, as_callable_pool=True,
-                                                    config=config.extract_config)
+                                                    config=extract_config)
+                if temp_dir and extract_config.compile_commands:
+                    # Translation units must refer to the original repository, like the
+                    # compilation database that decompiled functions are narrowed with
+                    extraction_pool.file_metadata = {
+                        f: {**m, 'translation_units': [str(compdb.remap_path(Path(t),
+                                                                             original_map))
+                                                       for t in m['translation_units']]}
+                        for f, m in extraction_pool.file_metadata.items()
+                    }
                 if as_callable_pool:
                     return extraction_pool
                 return cls(s for s in extraction_pool())
@@ -343,6 +568,82 @@ class SourceCodeDataset(Dataset, Mapping[str, SourceFunction]):
                     progress.advance(errors=True)
             return cls(s for s in final_functions)
 
+    @classmethod
+    def from_archive(cls, path: utils.PathLike,
+                     config: extractor.ExtractConfig = extractor.ExtractConfig()) -> 'SourceCodeDataset':
+        '''
+        Creates a source code dataset from a tarball or zip file of a repository without unpacking
+        it to disk.
+
+        Example:
+            ```py
+            SourceCodeDataset.from_archive('path/to/my/repository-1.0.tar.gz')
+            ```
+
+            Will create a source code dataset from the source code files contained in
+            `repository-1.0.tar.gz`, where the path of each function is relative to the root of the
+            archive.
+
+        Parameters:
+            path: Path to the tarball or zip file.
+            config: Configuration settings for extracting source code functions. Transforms should not write back to the source code file, since it does not exist on disk.
+
+        Returns:
+            The generated source code dataset.
+        '''
+        return cls(extractor.extract_archive(path, config=config))
+
+    @classmethod
+    def from_revision(cls, path: utils.PathLike, revision: str = 'HEAD',
+                      config: extractor.ExtractConfig = extractor.ExtractConfig()) -> 'SourceCodeDataset':
+        '''
+        Creates a source code dataset from a Git repository at a given revision, without checking
+        out the working tree.
+
+        Example:
+            ```py
+            SourceCodeDataset.from_revision('path/to/my/repository.git', revision='v1.0')
+            ```
+
+            Will create a source code dataset from the files of the `v1.0` tag of the (possibly
+            bare) repository `path/to/my/repository.git`.
+
+        Parameters:
+            path: Path to the Git repository.
+            revision: The commit, tag, or branch to extract.
+            config: Configuration settings for extracting source code functions. Transforms should not write back to the source code file, since it does not exist on disk.
+
+        Returns:
+            The generated source code dataset.
+        '''
+        return cls(extractor.extract_revision(path, revision=revision, config=config))
+
+    @classmethod
+    def from_history(cls, path: utils.PathLike, revisions: Union[str, Sequence[str]],
+                     config: extractor.ExtractConfig = extractor.ExtractConfig()) -> 'SourceCodeDataset':
+        '''
+        Creates a source code dataset from many revisions of a Git repository, extracting each
+        unique file contents (blob) only once.
+
+        Example:
+            ```py
+            SourceCodeDataset.from_history('path/to/my/repository.git',
+                                           ['v1.0', 'v1.1', 'v2.0'])
+            ```
+
+            Will create a source code dataset from the `v1.0`, `v1.1`, and `v2.0` tags of the
+            repository, where each function records the revisions it was seen in.
+
+        Parameters:
+            path: Path to the Git repository.
+            revisions: Either a commit range (e.g. `"v1.0..v2.0"`), or a sequence of commits, tags, or branches ordered from oldest to newest.
+            config: Configuration settings for extracting source code functions. Transforms should not write back to the source code file, since it does not exist on disk.
+
+        Returns:
+            The generated source code dataset.
+        '''
+        return cls(extractor.extract_history(path, revisions, config=config))
+
 
 def default_mapper(function: DecompiledFunction, uid: Union[SourceFunction, str]) -> bool:
     if isinstance(uid, SourceFunction):
@@ -354,6 +655,198 @@ FunctionMapper = Callable[[DecompiledFunction,
                            Union[str, SourceFunction]], bool]
 
 
+class BatchMapper(ABC):
+    '''
+    A mapper that maps many decompiled functions to their source code functions at once.
+
+    Unlike a `FunctionMapper`, which is called once for every pair of a decompiled function and a
+    candidate source code function, a batch mapper receives a whole batch of decompiled
+    functions together with the index of candidates, which allows vectorized scoring (e.g. with
+    NumPy). Picklable batch mappers can map batches in separate processes, as set by
+    `DecompiledCodeDatasetConfig.mapping_workers`.
+    '''
+
+    @abstractmethod
+    def map_functions(self, functions: Sequence[DecompiledFunction],
+                      candidates: Mapping[str, Sequence[SourceFunction]]
+                      ) -> List[List[SourceFunction]]:
+        '''
+        Maps a batch of decompiled functions to their source code functions.
+
+        Parameters:
+            functions: The decompiled functions to map.
+            candidates: The candidate source code functions, indexed by their function names. When batches are mapped in separate processes, only the candidates with the names of the batch's functions are included.
+
+        Returns:
+            The source code functions that each decompiled function is mapped to, in the order of `functions`.
+        '''
+        pass
+
+
+class PairwiseMapper(BatchMapper):
+    '''
+    A batch mapper that calls a `FunctionMapper` for every decompiled function and each candidate
+    source code function with the same name.
+    '''
+
+    def __init__(self, mapper: FunctionMapper) -> None:
+        '''
+        Initializes a new pairwise mapper.
+
+        Parameters:
+            mapper: The mapper that decides whether a decompiled function maps to a source code function.
+        '''
+        self.mapper = mapper
+
+    def map_functions(self, functions: Sequence[DecompiledFunction],
+                      candidates: Mapping[str, Sequence[SourceFunction]]
+                      ) -> List[List[SourceFunction]]:
+        return [[s for s in candidates.get(f.name, []) if self.mapper(f, s)] for f in functions]
+
+
+def _map_batch(batch: Tuple[int, BatchMapper, Sequence[DecompiledFunction],
+                            Mapping[str, Sequence[SourceFunction]]]
+               ) -> Tuple[int, List[List[SourceFunction]]]:
+    index, mapper, functions, candidates = batch
+    return index, mapper.map_functions(functions, candidates)
+
+
+def _strip_batch(batch: Tuple[int, Sequence[DecompiledFunction]]
+                 ) -> Tuple[int, List[DecompiledFunction]]:
+    index, functions = batch
+    symbol_mappings: Dict[Path, Dict[str, str]] = {}
+    return index, [f.to_stripped(symbol_mappings.setdefault(f.path, {})) for f in functions]
+
+
+def strip_functions(functions: Sequence[DecompiledFunction],
+                    max_workers: Optional[int] = None) -> List[DecompiledFunction]:
+    '''
+    Strips decompiled functions in parallel.
+
+    The stripped names of symbols are derived from the binaries they belong to, so a symbol is
+    stripped to the same name in every function of a binary, even when the functions are
+    stripped by different processes.
+
+    Parameters:
+        functions: The decompiled functions to strip.
+        max_workers: Maximum number of processes to strip functions with. Defaults to the number of available CPUs.
+
+    Returns:
+        The stripped functions, in the order of `functions`.
+
+    Raises:
+        ValueError: If any of the functions could not be stripped.
+    '''
+    workers = utils.get_worker_count(max_workers)
+    # Small batches are not worth the overhead of sending them to another process
+    batch_size = max(256, math.ceil(len(functions) / (workers * 4)))
+    batches = [functions[i:i + batch_size] for i in range(0, len(functions), batch_size)]
+    if workers == 1 or len(batches) <= 1:
+        return _strip_batch((0, functions))[1]
+    results: List[Optional[List[DecompiledFunction]]] = [None] * len(batches)
+    with ProcessPoolProgress(_strip_batch, enumerate(batches),
+                             Progress('Stripping functions...', total=len(batches)),
+                             max_workers=workers) as pool:
+        for index, stripped in pool:
+            results[index] = stripped
+    if any(r is None for r in results):
+        raise ValueError('Could not strip all functions')
+    return [f for stripped in results if stripped for f in stripped]
+
+
+class DwarfMapper:
+    '''
+    Maps decompiled functions to the source code functions they were compiled from with the
+    DWARF debug information of their binaries.
+
+    The debug information of each binary is read once and indexed by address, so that each
+    decompiled function is resolved to the single source file and line it is declared on in
+    logarithmic time. A source code function is only mapped if it is in that file and its byte
+    range contains that line, so functions with the same name in different files (e.g. static
+    helpers or the `main` functions of several tools) are no longer confused. Binaries must be
+    ELF binaries built with debug information (e.g. `-g`), and functions that are not described
+    by it are not mapped.
+    '''
+
+    def __init__(self, prefix_map: Mapping[utils.PathLike, utils.PathLike] = {}) -> None:
+        '''
+        Initializes a new DWARF mapper.
+
+        Parameters:
+            prefix_map: Maps the directories the binaries were compiled in to the directories of the source code on this machine, like `-fdebug-prefix-map`, e.g. if the binaries were built in a container.
+        '''
+        self._prefix_map = {Path(k): Path(v) for k, v in prefix_map.items()}
+        self._debug_info: Dict[Path, Optional[dwarf.DebugInfo]] = {}
+        self._line_offsets: Dict[Path, List[int]] = {}
+
+    def _get_debug_info(self, path: Path) -> Optional[dwarf.DebugInfo]:
+        if path not in self._debug_info:
+            try:
+                debug_info: Optional[dwarf.DebugInfo] = dwarf.DebugInfo.from_elf(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f'Could not read the debug information of "{path.name}": {e}')
+                debug_info = None
+            if debug_info is not None and not debug_info.subprograms:
+                logger.warning(f'"{path.name}" has no debug information, so none of its '
+                               'functions can be mapped')
+            self._debug_info[path] = debug_info
+        return self._debug_info[path]
+
+    def _get_line(self, path: Path, byte: int) -> int:
+        if path not in self._line_offsets:
+            source = path.read_bytes()
+            offsets = [0]
+            index = source.find(b'\n')
+            while index != -1:
+                offsets.append(index + 1)
+                index = source.find(b'\n', index + 1)
+            self._line_offsets[path] = offsets
+        return bisect_right(self._line_offsets[path], byte)
+
+    def locate(self, function: DecompiledFunction) -> Optional[dwarf.Subprogram]:
+        '''
+        Locates the source code of a decompiled function.
+
+        Parameters:
+            function: The decompiled function.
+
+        Returns:
+            The function described by the debug information, with its source file rebased by the prefix map, or `None` if the function is not described by it.
+        '''
+        debug_info = self._get_debug_info(function.path)
+        if not debug_info:
+            return None
+        address = function.metadata.get('address')
+        if address is not None:
+            subprogram = debug_info.lookup_address(debug_info.image_base + address)
+        else:
+            # Without an address, the name must be unambiguous
+            candidates = debug_info.lookup_name(function.name)
+            subprogram = candidates[0] if len(candidates) == 1 else None
+        if not subprogram:
+            return None
+        for prefix, replacement in self._prefix_map.items():
+            try:
+                return subprogram._replace(file=replacement /
+                                           subprogram.file.relative_to(prefix))
+            except ValueError:
+                continue
+        return subprogram
+
+    def __call__(self, function: DecompiledFunction, uid: Union[str, SourceFunction]) -> bool:
+        # Only source code functions have a location to compare with
+        if not isinstance(uid, SourceFunction):
+            return False
+        subprogram = self.locate(function)
+        if not subprogram or os.path.realpath(subprogram.file) != os.path.realpath(uid.path):
+            return False
+        try:
+            return self._get_line(uid.path, uid.start_byte) <= subprogram.line <= \
+                self._get_line(uid.path, max(uid.start_byte, uid.end_byte - 1))
+        except OSError:
+            return False
+
+
 @dataclass(frozen=True)
 class DecompiledCodeDatasetConfig:
     '''
@@ -382,7 +875,57 @@ class DecompiledCodeDatasetConfig:
         necessarily reflect actual stripped functions because the decompiler may still have
         access to debug symbols during the decompilation process.
     '''
-    mapper: FunctionMapper = default_mapper
+    strip_workers: Optional[int] = None
+    '''
+    Maximum number of processes to strip decompiled functions with, if `strip` is `True`.
+    Defaults to the number of available CPUs, or to this process if the functions are stripped
+    as they are decompiled (see `pipeline_mapping`).
+    '''
+    mapper: Union[FunctionMapper, BatchMapper] = default_mapper
+    '''
+    Decides which source code functions each decompiled function is mapped to, either for a
+    single pair of functions (`FunctionMapper`) or for a batch of decompiled functions at once
+    (`BatchMapper`).
+    '''
+    mapping_workers: int = 1
+    '''
+    Number of processes that map batches of decompiled functions in parallel. The mapper must be
+    picklable, otherwise the functions are mapped in this process.
+    '''
+    mapping_batch_size: int = 10000
+    '''
+    Number of decompiled functions that are mapped together in a single batch.
+    '''
+    decompile_source_names_only: bool = True
+    '''
+    If `True`, only the functions whose names match an extracted source code function are
+    decompiled, which skips the runtime and library functions of statically linked binaries.
+    This only applies when the default mapper or a `DwarfMapper` is used, the decompiler
+    supports the `function_names` option, and `decompiler_config` does not already specify
+    function names. Source code functions are then extracted before the binaries are decompiled
+    rather than in parallel.
+    '''
+
+    pipeline_mapping: bool = True
+    '''
+    If `True`, the functions of each batch of binaries are mapped, and stripped if `strip` is
+    `True`, as soon as the batch is decompiled instead of after every binary is decompiled.
+    Pipelining is batch-granular: a batch is only mapped once its worker has decompiled all of
+    its binaries, so mapping only overlaps with decompilation if there are more batches than
+    workers or batches take different times (see `DecompileConfig.batch_size`). This
+    only applies when the source code functions are available before decompilation (see
+    `decompile_source_names_only`), `decompiler_config` does not deduplicate functions, and
+    neither `mapping_workers` nor `strip_workers` asks for more processes, since pipelined
+    functions are mapped and stripped in this process.
+    '''
+
+    def __post_init__(self) -> None:
+        if self.mapping_workers < 1:
+            raise ValueError('Mapping workers must be a positive integer')
+        if self.mapping_batch_size < 1:
+            raise ValueError('Mapping batch size must be a positive integer')
+        if self.strip_workers is not None and self.strip_workers < 1:
+            raise ValueError('Strip workers must be a positive integer')
 
 
 class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, SourceCodeDataset]]):
@@ -393,6 +936,8 @@ class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, Sour
     and their possible source code counterparts, allowing for easy lookup by unique identifiers (UIDs).
     '''
 
+    INDEX: ClassVar[str] = 'decompiled_uid'
+
     def __init__(self,
                  mappings: Iterable[Tuple[DecompiledFunction, SourceCodeDataset]]) -> None:
         '''
@@ -403,22 +948,52 @@ class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, Sour
             mappings: An iterable collection of 2-tuples, where each tuple consists of the decompiled function and the corresponding potential source functions.
         '''
         super().__init__()
-        self._mapping: Dict[str,
-                            Tuple[DecompiledFunction, SourceCodeDataset]
-                            ] = {
-                                m[0].uid: m for m in mappings
-        }
+        # Source functions are stored once in a shared table, and the candidates of each
+        # decompiled function are stored as a range of indices into the table. The range of
+        # the decompiled function at position i is _candidates[_offsets[i]:_offsets[i + 1]]
+        self._decompiled_functions: List[DecompiledFunction] = []
+        self._positions: Dict[str, int] = {}
+        self._source_functions: List[SourceFunction] = []
+        self._source_positions: Dict[str, int] = {}
+        self._offsets = array('q', [0])
+        self._candidates = array('I')
+        for decompiled_function, source_functions in mappings:
+            self._candidates.extend(self._add_source_function(f)
+                                    for f in source_functions.values())
+            self._offsets.append(len(self._candidates))
+            # A later mapping of the same decompiled function replaces the earlier one
+            self._positions[decompiled_function.uid] = len(self._decompiled_functions)
+            self._decompiled_functions.append(decompiled_function)
+        self._source_index: Optional[Dict[str, List[str]]] = None
+
+    def _add_source_function(self, function: SourceFunction) -> int:
+        position = self._source_positions.get(function.uid)
+        if position is not None:
+            existing_function = self._source_functions[position]
+            if existing_function is function or existing_function == function:
+                return position
+        position = len(self._source_functions)
+        self._source_positions.setdefault(function.uid, position)
+        self._source_functions.append(function)
+        return position
+
+    def _get_candidates(self, position: int) -> List[SourceFunction]:
+        return [self._source_functions[i]
+                for i in self._candidates[self._offsets[position]:self._offsets[position + 1]]]
 
     def __getitem__(self, key: Union[str, DecompiledFunction]) -> Tuple[DecompiledFunction, SourceCodeDataset]:
         if isinstance(key, DecompiledFunction):
             return self[key.uid]
-        return self._mapping[key]
+        position = self._positions[key]
+        # The source code dataset of the candidates is only built when it is accessed
+        return self._decompiled_functions[position], \
+            SourceCodeDataset(self._get_candidates(position))
 
     def __iter__(self) -> Iterator[str]:
-        return iter(self._mapping)
+        return iter(self._positions)
 
     def __len__(self) -> int:
-        return len(self._mapping)
+        return len(self._positions)
 
     def get(self, key: Union[str, DecompiledFunction], default: T = None) -> Union[Tuple[DecompiledFunction, SourceCodeDataset], T]:
         try:
@@ -427,42 +1002,58 @@ class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, Sour
             return default
 
     def to_df(self) -> DataFrame:
-        function_dicts: List[Dict[str, Any]] = []
-        for decompiled_function, source_functions in self.values():
-            decompiled_function_json = decompiled_function.to_json()
-            decompiled_function_dict = dict(decompiled_function_json)
-            # Flatten DecompiledFunction.metadata
-            del decompiled_function_dict['metadata']
-            decompiled_function_dict.update(
-                decompiled_function_json['metadata'])
-            # Refactor names to be more specific on decompiled functions and multiple source functions
-            decompiled_function_dict['decompiled_uid'] = \
-                decompiled_function_dict.pop('uid')
-            decompiled_function_dict['bin'] = \
-                decompiled_function_dict.pop('path')
-            decompiled_function_dict['decompiled_definition'] = \
-                decompiled_function_dict.pop('definition')
-            source_functions_dict = source_functions.to_df().to_dict()
-            source_functions_dict['source_files'] = \
-                source_functions_dict.pop('path')
-            source_functions_dict['source_definitions'] = \
-                source_functions_dict.pop('definition')
-            del source_functions_dict['name']
-            source_functions_dict['source_file_start_bytes'] = \
-                source_functions_dict.pop('start_byte')
-            source_functions_dict['source_file_end_bytes'] = \
-                source_functions_dict.pop('end_byte')
-            source_functions_dict['class_names'] = \
-                source_functions_dict.pop('class_name')
-            decompiled_function_dict.update(
-                source_functions_dict)  # type: ignore
-            function_dicts.append(decompiled_function_dict)
-        try:
-            return DataFrame(function_dicts).set_index('decompiled_uid')
-        except KeyError:
-            logger.debug('Could not set DataFrame index to "uid", returning an empty '
-                         'DataFrame to assume that the DataFrame is empty')
-            return DataFrame()
+        builder = _DataFrameBuilder(categorical_columns={'bin', 'architecture'})
+        for row in self.iter_rows():
+            builder.add_row(row)
+        return builder.build(self.INDEX)
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        for position in self._positions.values():
+            decompiled_function = self._decompiled_functions[position]
+            source_functions = self._get_candidates(position)
+            source_uids = [f.uid for f in source_functions]
+            source_metadata = [f.metadata for f in source_functions]
+            # Refactor names to be more specific on decompiled functions and multiple source
+            # functions, which are mapped by their UIDs
+            function_dict: Dict[str, Any] = {
+                'assembly': decompiled_function.assembly,
+                'architecture': decompiled_function.architecture,
+                'name': decompiled_function.name,
+                # Flatten DecompiledFunction.metadata
+                **decompiled_function.metadata,
+                'decompiled_uid': decompiled_function.uid,
+                'bin': str(decompiled_function.path),
+                'decompiled_definition': decompiled_function.definition,
+                'language': dict(zip(source_uids, (f.language for f in source_functions))),
+                # Flatten SourceFunction.metadata
+                **{k: {u: m.get(k) for u, m in zip(source_uids, source_metadata)}
+                   for k in dict.fromkeys(k for m in source_metadata for k in m)},
+                'source_files': dict(zip(source_uids, (str(f.path) for f in source_functions))),
+                'source_definitions': dict(zip(source_uids,
+                                               (f.definition for f in source_functions))),
+                'source_file_start_bytes': dict(zip(source_uids,
+                                                    (f.start_byte for f in source_functions))),
+                'source_file_end_bytes': dict(zip(source_uids,
+                                                  (f.end_byte for f in source_functions))),
+                'class_names': dict(zip(source_uids, (f.class_name for f in source_functions)))
+            }
+            yield function_dict
+
+    def get_columns(self) -> List[str]:
+        # Only the metadata of the functions differs between rows, so the columns of each row
+        # are laid out like in iter_rows without building the row
+        columns: Dict[str, None] = {}
+        for position in self._positions.values():
+            decompiled_function = self._decompiled_functions[position]
+            source_metadata_keys = dict.fromkeys(k for f in self._get_candidates(position)
+                                                 for k in f.metadata)
+            columns.update(dict.fromkeys([
+                'assembly', 'architecture', 'name', *decompiled_function.metadata,
+                'decompiled_uid', 'bin', 'decompiled_definition', 'language',
+                *source_metadata_keys, 'source_files', 'source_definitions',
+                'source_file_start_bytes', 'source_file_end_bytes', 'class_names'
+            ]))
+        return list(columns)
 
     def lookup(self, key: Union[str, SourceFunction]) -> List[Tuple[DecompiledFunction, SourceCodeDataset]]:
         '''
@@ -479,7 +1070,32 @@ class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, Sour
             A list of tuples, where each tuple consists of a decompiled function and its 
             corresponding source code dataset containing the potential matches.
         '''
-        return [m for m in self.values() if key in m[1]]
+        if isinstance(key, SourceFunction):
+            key = key.uid
+        return [self[u] for u in self._get_source_index().get(key, [])]
+
+    def lookup_many(self, keys: Iterable[Union[str, SourceFunction]]
+                    ) -> List[List[Tuple[DecompiledFunction, SourceCodeDataset]]]:
+        '''
+        Finds the mappings of many source functions at once, as with `lookup`.
+
+        Parameters:
+            keys: The keys to search for, each of which can be either a source function UID or a `SourceFunction` object.
+
+        Returns:
+            The mappings of each key, in the order of `keys`.
+        '''
+        return [self.lookup(k) for k in keys]
+
+    def _get_source_index(self) -> Dict[str, List[str]]:
+        # The inverted index from source function UIDs to decompiled function UIDs is built on
+        # the first lookup. The dataset is never modified, so it is never invalidated
+        if self._source_index is None:
+            self._source_index = {}
+            for uid, position in self._positions.items():
+                for source_function in self._get_candidates(position):
+                    self._source_index.setdefault(source_function.uid, []).append(uid)
+        return self._source_index
 
     def to_source_code_dataset(self) -> SourceCodeDataset:
         '''
@@ -491,43 +1107,205 @@ class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, Sour
         Returns:
             A dataset containing all source functions extracted from the decompiled code dataset.
         '''
-        return SourceCodeDataset(f for _, d in self.values() for f in d.values())
+        return SourceCodeDataset(f for p in self._positions.values()
+                                 for f in self._get_candidates(p))
 
-    def to_stripped_dataset(self) -> 'DecompiledCodeDataset':
+    def to_stripped_dataset(self, max_workers: Optional[int] = None) -> 'DecompiledCodeDataset':
         '''
         Converts the decompiled code dataset into a stripped decompiled code dataset.
 
         The method applies the stripping process to each decompiled function in the dataset, 
         resulting in a dataset with stripped versions of the decompiled functions.
 
+        Parameters:
+            max_workers: Maximum number of processes to strip functions with. Defaults to the number of available CPUs.
+
         Returns:
             A new dataset where all decompiled functions have been stripped.
         '''
-        return DecompiledCodeDataset((d.to_stripped(), s) for d, s in self.values())
-
-    @classmethod
-    def _from_dataset_and_decompiled(cls, source_dataset: SourceCodeDataset,
-                                     decompiled_functions: Iterable[DecompiledFunction],
-                                     stripped: bool,
-                                     mapper: FunctionMapper) -> 'DecompiledCodeDataset':
+        positions = list(self._positions.values())
+        stripped_functions = strip_functions([self._decompiled_functions[p] for p in positions],
+                                             max_workers=max_workers)
+        return DecompiledCodeDataset(zip(stripped_functions,
+                                         (SourceCodeDataset(self._get_candidates(p))
+                                          for p in positions)))
+
+    @staticmethod
+    def _get_translation_unit_outputs(config: extractor.ExtractConfig) -> Dict[Path, Path]:
+        if not config.compile_commands:
+            return {}
+        return compdb.get_translation_unit_outputs(
+            compdb.load_compile_commands(config.compile_commands,
+                                         prefix_map=config.compile_commands_prefix_map)
+        )
 
+    @staticmethod
+    def _map_functions(decompiled_functions: Sequence[DecompiledFunction],
+                       function_name_map: Mapping[str, Sequence[SourceFunction]],
+                       mapper: BatchMapper, workers: int,
+                       batch_size: int) -> List[List[SourceFunction]]:
+        if workers > 1:
+            # Give every worker at least one batch
+            batch_size = max(1, min(batch_size, math.ceil(len(decompiled_functions) / workers)))
+        batches = [decompiled_functions[i:i + batch_size]
+                   for i in range(0, len(decompiled_functions), batch_size)]
+        if workers > 1 and len(batches) > 1:
+            try:
+                pickle.dumps(mapper)
+            except (pickle.PicklingError, AttributeError, TypeError) as e:
+                logger.warning(f'Mapping functions in a single process, since the mapper is not '
+                               f'picklable: {e}')
+            else:
+                # Only the candidates that a batch can be mapped to are sent to its worker
+                items = [(i, mapper, b, {n: function_name_map[n] for n in {f.name for f in b}
+                                         if n in function_name_map})
+                         for i, b in enumerate(batches)]
+                results: List[Optional[List[List[SourceFunction]]]] = [None] * len(batches)
+                with ProcessPoolProgress(_map_batch, items,
+                                         Progress('Mapping functions...', total=len(items)),
+                                         max_workers=workers) as pool:
+                    for index, mapped in pool:
+                        results[index] = mapped
+                if any(r is None for r in results):
+                    raise ValueError('Could not map all functions')
+                return [m for mapped in results if mapped for m in mapped]
+        with Progress('Mapping functions...', total=len(batches)) as progress:
+            mapped_functions: List[List[SourceFunction]] = []
+            for batch in batches:
+                mapped_functions.extend(mapper.map_functions(batch, function_name_map))
+                progress.advance()
+            return mapped_functions
+
+    @staticmethod
+    def _get_function_name_map(source_dataset: SourceCodeDataset
+                               ) -> Dict[str, List[SourceFunction]]:
         function_name_map: Dict[str, List[SourceFunction]] = {}
         for source_function in source_dataset.values():
             function_name_map.setdefault(SourceFunction.get_function_name(source_function.uid),
                                          []).append(source_function)
+        return function_name_map
+
+    @staticmethod
+    def _narrow_to_translation_unit(decompiled_function: DecompiledFunction,
+                                    source_functions: List[SourceFunction],
+                                    translation_unit_outputs: Mapping[Path, Path]
+                                    ) -> List[SourceFunction]:
+        # If the binary is the output of a single translation unit, only keep the candidates
+        # that are compiled in it
+        translation_unit = translation_unit_outputs.get(decompiled_function.path.resolve())
+        if not translation_unit or len(source_functions) < 2:
+            return source_functions
+        narrowed_functions = [s for s in source_functions
+                              if str(translation_unit) in s.metadata.get('translation_units', [])]
+        return narrowed_functions if narrowed_functions else source_functions
+
+    @classmethod
+    def _from_dataset_and_decompiled(cls, source_dataset: SourceCodeDataset,
+                                     decompiled_functions: Iterable[DecompiledFunction],
+                                     stripped: bool,
+                                     mapper: Union[FunctionMapper, BatchMapper],
+                                     translation_unit_outputs: Optional[Mapping[Path, Path]] = None,
+                                     mapping_workers: int = 1,
+                                     mapping_batch_size: int = 10000,
+                                     strip_workers: Optional[int] = None) -> 'DecompiledCodeDataset':
+        function_name_map = cls._get_function_name_map(source_dataset)
+        if not isinstance(mapper, BatchMapper):
+            mapper = PairwiseMapper(mapper)
+        decompiled_functions = list(decompiled_functions)
+        mapped_functions = cls._map_functions(decompiled_functions, function_name_map, mapper,
+                                              mapping_workers, mapping_batch_size)
         mappings: List[Tuple[DecompiledFunction, SourceCodeDataset]] = []
-        with Progress('Mapping functions...'):
-            for decompiled_function in decompiled_functions:
-                source_functions = [s for s in function_name_map.get(decompiled_function.name, [])
-                                    if mapper(decompiled_function, s)]
-                if source_functions:
-                    if stripped:
-                        decompiled_function = decompiled_function.to_stripped()
-                    mappings.append((decompiled_function,
-                                    SourceCodeDataset(source_functions)))
-            logger.info(f'Successfully mapped {len(mappings)} decompiled functions to '
-                        f'{sum(len(f) for f in function_name_map.values())} source functions')
-            return cls(mappings)
+        for decompiled_function, source_functions in zip(decompiled_functions,
+                                                         mapped_functions):
+            if translation_unit_outputs:
+                source_functions = cls._narrow_to_translation_unit(decompiled_function,
+                                                                   source_functions,
+                                                                   translation_unit_outputs)
+            if source_functions:
+                mappings.append((decompiled_function,
+                                SourceCodeDataset(source_functions)))
+        logger.info(f'Successfully mapped {len(mappings)} decompiled functions to '
+                    f'{sum(len(f) for f in function_name_map.values())} source functions')
+        dataset = cls(mappings)
+        return dataset.to_stripped_dataset(max_workers=strip_workers) if stripped else dataset
+
+    @classmethod
+    def _iter_mappings(cls, source_dataset: SourceCodeDataset,
+                       decompiled_batches: Iterable[Sequence[DecompiledFunction]],
+                       stripped: bool,
+                       mapper: Union[FunctionMapper, BatchMapper],
+                       translation_unit_outputs: Optional[Mapping[Path, Path]] = None
+                       ) -> Iterator[Tuple[DecompiledFunction, SourceCodeDataset]]:
+        # Map (and strip) each batch of decompiled functions as soon as it arrives, while the
+        # next batches are still being decompiled
+        function_name_map = cls._get_function_name_map(source_dataset)
+        if not isinstance(mapper, BatchMapper):
+            mapper = PairwiseMapper(mapper)
+        symbol_mappings: Dict[Path, Dict[str, str]] = {}
+        mapping_count = 0
+        for decompiled_functions in decompiled_batches:
+            mapped_functions = mapper.map_functions(decompiled_functions, function_name_map)
+            for decompiled_function, source_functions in zip(decompiled_functions,
+                                                             mapped_functions):
+                if translation_unit_outputs:
+                    source_functions = cls._narrow_to_translation_unit(decompiled_function,
+                                                                       source_functions,
+                                                                       translation_unit_outputs)
+                if not source_functions:
+                    continue
+                if stripped:
+                    decompiled_function = decompiled_function.to_stripped(
+                        symbol_mappings.setdefault(decompiled_function.path, {})
+                    )
+                mapping_count += 1
+                yield decompiled_function, SourceCodeDataset(source_functions)
+        logger.info(f'Successfully mapped {mapping_count} decompiled functions to '
+                    f'{sum(len(f) for f in function_name_map.values())} source functions')
+
+    @classmethod
+    def _from_dataset_and_binaries(cls, source_dataset: SourceCodeDataset,
+                                   bins: Sequence[utils.PathLike],
+                                   config: DecompiledCodeDatasetConfig,
+                                   translation_unit_outputs: Optional[Mapping[Path, Path]] = None
+                                   ) -> 'DecompiledCodeDataset':
+        decompile_config = cls._get_decompile_config(config, source_dataset)
+        # Deduplicating functions needs the functions of every binary at once, and pipelined
+        # functions are mapped and stripped in this process
+        if config.pipeline_mapping and not decompile_config.deduplicate_functions and \
+                config.mapping_workers == 1 and config.strip_workers is None:
+            decompiled_batches = decompiler.decompile(bins, config=decompile_config,
+                                                      as_callable_pool=True).iter_batches()
+            return cls(cls._iter_mappings(source_dataset, decompiled_batches, config.strip,
+                                          config.mapper,
+                                          translation_unit_outputs=translation_unit_outputs))
+        return cls._from_dataset_and_decompiled(source_dataset,
+                                                decompiler.decompile(bins,
+                                                                     config=decompile_config),
+                                                config.strip, config.mapper,
+                                                translation_unit_outputs=translation_unit_outputs,
+                                                mapping_workers=config.mapping_workers,
+                                                mapping_batch_size=config.mapping_batch_size,
+                                                strip_workers=config.strip_workers)
+
+    @staticmethod
+    def _decompiles_source_names_only(config: DecompiledCodeDatasetConfig) -> bool:
+        # Decompilation can only be narrowed to the names of the source functions if they are
+        # the only functions that can be mapped
+        return config.decompile_source_names_only and \
+            (config.mapper is default_mapper or isinstance(config.mapper, DwarfMapper)) and \
+            config.decompiler_config.function_names is None and \
+            'function_names' in decompiler.get_decompiler_class().OPTIONS
+
+    @classmethod
+    def _get_decompile_config(cls, config: DecompiledCodeDatasetConfig,
+                              source_dataset: SourceCodeDataset) -> decompiler.DecompileConfig:
+        if not cls._decompiles_source_names_only(config):
+            return config.decompiler_config
+        function_names = {SourceFunction.get_function_name(f.uid)
+                          for f in source_dataset.values()}
+        logger.info(f'Only decompiling functions with the {len(function_names)} names of the '
+                    'source functions')
+        return replace(config.decompiler_config, function_names=function_names)
 
     @classmethod
     def from_repository(cls, path: utils.PathLike, bins: Sequence[utils.PathLike],
@@ -576,18 +1354,30 @@ class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, Sour
         bins = utils.normalize_sequence(bins)
         if not any(bins):
             raise ValueError('Must at least specify one binary')
-        # Extract source code functions and decompile binaries in parallel
-        original_extraction_pool = extractor.extract(path, as_callable_pool=True,
-                                                     config=extract_config)
-        decompile_pool = decompiler.decompile(bins, as_callable_pool=True,
-                                              config=dataset_config.decompiler_config)
-        source_functions, decompiled_functions = \
-            ProcessPoolProgress.multi_progress(original_extraction_pool,
-                                               decompile_pool,
-                                               title='Generating Decompiled Code Dataset')
-        source_dataset = SourceCodeDataset(source_functions)
+        translation_unit_outputs = cls._get_translation_unit_outputs(extract_config)
+        if cls._decompiles_source_names_only(dataset_config):
+            # Extract source code functions first, so that only the functions that can be
+            # mapped are decompiled
+            source_dataset = SourceCodeDataset(extractor.extract(path, config=extract_config))
+            return cls._from_dataset_and_binaries(source_dataset, bins, dataset_config,
+                                                  translation_unit_outputs=translation_unit_outputs)
+        else:
+            # Extract source code functions and decompile binaries in parallel
+            original_extraction_pool = extractor.extract(path, as_callable_pool=True,
+                                                         config=extract_config)
+            decompile_pool = decompiler.decompile(bins, as_callable_pool=True,
+                                                  config=dataset_config.decompiler_config)
+            source_functions, decompiled_functions = \
+                ProcessPoolProgress.multi_progress(original_extraction_pool,
+                                                   decompile_pool,
+                                                   title='Generating Decompiled Code Dataset')
+            source_dataset = SourceCodeDataset(source_functions)
         return cls._from_dataset_and_decompiled(source_dataset, decompiled_functions,
-                                                dataset_config.strip, dataset_config.mapper)
+                                                dataset_config.strip, dataset_config.mapper,
+                                                translation_unit_outputs=translation_unit_outputs,
+                                                mapping_workers=dataset_config.mapping_workers,
+                                                mapping_batch_size=dataset_config.mapping_batch_size,
+                                                strip_workers=dataset_config.strip_workers)
 
     @classmethod
     def from_source_code_dataset(cls, dataset: SourceCodeDataset, bins: Sequence[utils.PathLike],
@@ -624,7 +1414,5 @@ class DecompiledCodeDataset(Dataset, Mapping[str, Tuple[DecompiledFunction, Sour
         Returns:
             The generated dataset containing mappings of decompiled functions to their potential source code functions.
         '''
-        return cls._from_dataset_and_decompiled(dataset, decompiler.decompile(bins,
-                                                                              **utils.resolve_kwargs(max_workers=config.decompiler_config.max_workers)),
-                                                config.strip,
-                                                config.mapper)
+        return cls._from_dataset_and_binaries(dataset, bins, config,
+                                              translation_unit_outputs=cls._get_translation_unit_outputs(config.extract_config))
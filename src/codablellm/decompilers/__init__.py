@@ -2,6 +2,7 @@
 Built-in support for a subset of decompilers.
 '''
 
-from codablellm.decompilers.ghidra import Ghidra
+from codablellm.decompilers.ghidra import Ghidra, GhidraProjectCache
+from codablellm.decompilers.objdump import Objdump
 
-__all__ = ['Ghidra']
+__all__ = ['Ghidra', 'GhidraProjectCache', 'Objdump']
@@ -1,19 +1,384 @@
+import atexit
+from dataclasses import dataclass, field
+import hashlib
 import json
 import logging
+import math
 import os
 from pathlib import Path
+import re
+import shutil
+import socket
 import subprocess
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import Final, List, Optional, Sequence
+from tempfile import TemporaryDirectory
+from threading import Lock, Thread
+import time
+from typing import (Any, Callable, ClassVar, Collection, Dict, Final, FrozenSet, Generator,
+                    Iterator, List, Mapping, Optional, Sequence, Set, Tuple)
 
-from codablellm.core.decompiler import Decompiler
-from codablellm.core.function import DecompiledFunction, DecompiledFunctionJSONObject
-from codablellm.core.utils import is_binary, PathLike
+from codablellm.core.cache import get_default_cache_dir, get_file_hash
+from codablellm.core.decompiler import Decompiler, FunctionKind
+from codablellm.core.function import DecompiledFunction
+from codablellm.core.utils import is_binary, PathLike, resolve_kwargs
 
 
 logger = logging.getLogger('codablellm')
 
 
+def follow_jsonl(path: Path, is_running: Callable[[], bool],
+                 poll_interval: float = 0.1) -> Iterator[Dict[str, Any]]:
+    '''
+    Follows a JSON Lines file that is being written by another process, yielding each record as
+    soon as its line is complete.
+
+    Parameters:
+        path: The JSON Lines file, which may not exist yet.
+        is_running: Returns `True` while the writer may still append to the file.
+        poll_interval: Seconds to wait for new lines.
+
+    Returns:
+        An iterator over the records of the file, which ends once the writer has stopped and every complete line has been read.
+    '''
+    position = 0
+    buffer = b''
+    while True:
+        # Check the writer before reading, so that lines written just before it stopped are read
+        running = is_running()
+        if path.is_file():
+            with open(path, 'rb') as file:
+                file.seek(position)
+                chunk = file.read()
+                position = file.tell()
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            if chunk:
+                continue
+        if not running:
+            return
+        time.sleep(poll_interval)
+
+
+def is_process_alive(pid: int) -> bool:
+    '''
+    Checks whether a process of this host is still running.
+
+    Parameters:
+        pid: The ID of the process.
+
+    Returns:
+        `True` if the process is running, or if it exists but cannot be signalled.
+    '''
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def get_heap_env(max_memory: Optional[int]) -> Dict[str, str]:
+    '''
+    Creates the environment of an `analyzeHeadless` process, which limits its heap size with the
+    `MAXMEM` variable read by Ghidra's launch scripts.
+
+    Parameters:
+        max_memory: The maximum heap size in bytes, or `None` to use Ghidra's default.
+
+    Returns:
+        The environment of the process.
+    '''
+    if max_memory is None:
+        return dict(os.environ)
+    return {**os.environ, 'MAXMEM': f'{max(1, math.ceil(max_memory / 2 ** 20))}M'}
+
+
+def get_default_project_cache_dir() -> Path:
+    '''
+    Retrieves the default directory of the Ghidra project cache, which is next to the
+    decompilation cache (e.g. `~/.cache/codablellm/ghidra_projects`).
+
+    Returns:
+        The default project cache directory.
+    '''
+    return get_default_cache_dir().parent / 'ghidra_projects'
+
+
+@dataclass(frozen=True)
+class GhidraProjectCache:
+    '''
+    An on-disk store of Ghidra projects that binaries have already been imported into.
+
+    Each binary is imported into its own project, keyed by the SHA-256 digest and the name of the
+    binary together with the Ghidra installation, so later runs open the project with `-process`
+    instead of importing the binary again. When `max_size` is exceeded, the least recently used
+    projects are evicted.
+    '''
+
+    path: Path = field(default_factory=get_default_project_cache_dir)
+    '''
+    The directory the projects are stored in.
+    '''
+    max_size: Optional[int] = None
+    '''
+    The maximum total size of the projects in bytes, or `None` for no limit.
+    '''
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'path', Path(self.path))
+        if self.max_size is not None and self.max_size < 0:
+            raise ValueError('Max size must be a non-negative integer')
+
+    def get_key(self, path: PathLike) -> str:
+        '''
+        Derives the key of a binary's project.
+
+        Parameters:
+            path: The binary.
+
+        Returns:
+            The key of the project.
+        '''
+        # Programs are named after their files, so the name is part of the key
+        installation = hashlib.sha256(f'{Ghidra.get_path()}\n{Path(path).name}'.encode())
+        return f'{get_file_hash(path)}-{installation.hexdigest()[:16]}'
+
+    def _get_project_dir(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def load(self, key: str) -> Optional[Path]:
+        '''
+        Looks up the project of a binary.
+
+        Parameters:
+            key: The key of the binary's project.
+
+        Returns:
+            The directory of the project, or `None` if the binary has not been imported yet.
+        '''
+        project_dir = self._get_project_dir(key)
+        if not (project_dir / 'codablellm.gpr').is_file():
+            return None
+        # Mark the project as recently used
+        os.utime(project_dir)
+        return project_dir
+
+    def store(self, key: str, project_dir: Path) -> None:
+        '''
+        Adds a project to the store, evicting the least recently used projects if the store
+        grows too large.
+
+        Parameters:
+            key: The key of the binary's project.
+            project_dir: The directory of a project the binary has been imported into.
+        '''
+        target_dir = self._get_project_dir(key)
+        target_dir.parent.mkdir(parents=True, exist_ok=True)
+        # Copy to a temporary directory first, so that other processes never open a partially
+        # copied project
+        temp_dir = target_dir.with_name(f'.{key}.{os.getpid()}.tmp')
+        try:
+            shutil.copytree(project_dir, temp_dir, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns('*.log', '*.lock*'))
+        except BaseException:
+            # Never leave a partially copied project behind
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        try:
+            temp_dir.rename(target_dir)
+        except OSError:
+            # Another process stored the same project first
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+        logger.debug(f'Cached the Ghidra project of "{key}"')
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def remove(self, key: str) -> None:
+        '''
+        Removes the project of a binary from the store, e.g. because it cannot be opened.
+
+        Parameters:
+            key: The key of the binary's project.
+        '''
+        shutil.rmtree(self._get_project_dir(key), ignore_errors=True)
+        logger.debug(f'Removed "{key}" from the Ghidra project cache')
+
+    def evict(self, max_size: int) -> None:
+        '''
+        Removes the least recently used projects until the store is no larger than `max_size`.
+
+        Parameters:
+            max_size: The maximum total size of the projects in bytes.
+        '''
+        entries = []
+        for project_dir in self.path.glob('*/*'):
+            if project_dir.name.startswith('.'):
+                continue
+            try:
+                entry_size = sum(f.stat().st_size for f in project_dir.rglob('*') if f.is_file())
+                entries.append((project_dir.stat().st_mtime, entry_size, project_dir))
+            except FileNotFoundError:
+                continue
+        size = sum(s for _, s, _ in entries)
+        for _, entry_size, project_dir in sorted(entries):
+            if size <= max_size:
+                break
+            shutil.rmtree(project_dir, ignore_errors=True)
+            size -= entry_size
+            logger.debug(f'Evicted "{project_dir.name}" from the Ghidra project cache')
+
+    def clear(self) -> None:
+        '''
+        Removes all projects from the store.
+        '''
+        self.evict(0)
+
+
+class GhidraServer:
+    '''
+    A long-lived `analyzeHeadless` process that decompiles binaries on request.
+
+    The server runs the `serve.py` script, which listens on a local socket for binary paths and
+    decompiles each request in the same JVM, so that the startup cost of Ghidra is only paid once.
+    Any process can send requests to a running server with `GhidraServer.request`.
+    '''
+
+    SCRIPT_PATH: Final[Path] = Path(__file__).parent.parent / 'resources' / 'ghidra_scripts' / \
+        'serve.py'
+    '''
+    The path to the Ghidra server script (`serve.py`).
+    '''
+
+    PORT_PATTERN: Final[re.Pattern[str]] = re.compile(r'CODABLELLM_GHIDRA_PORT=(\d+)')
+    '''
+    The pattern of the line the server script prints once it is accepting requests.
+    '''
+
+    def __init__(self, ghidra_path: PathLike, max_memory: Optional[int] = None) -> None:
+        '''
+        Starts a new Ghidra server. The server is not ready to accept requests until
+        `wait_until_ready` returns.
+
+        Parameters:
+            ghidra_path: The path to Ghidra's `analyzeHeadless` command.
+            max_memory: The maximum heap size of the server in bytes. Defaults to Ghidra's default heap size.
+        '''
+        self._project_dir = TemporaryDirectory(prefix='codablellm_ghidra_server')
+        # analyzeHeadless only runs scripts on imported programs, so the server script is run on
+        # a small raw binary
+        placeholder = Path(self._project_dir.name) / 'placeholder.bin'
+        placeholder.write_bytes(bytes(16))
+        self._process = subprocess.Popen([ghidra_path, self._project_dir.name, 'codablellm',
+                                          '-import', placeholder, '-loader', 'BinaryLoader',
+                                          '-processor', 'x86:LE:64:default', '-noanalysis',
+                                          '-scriptPath', GhidraServer.SCRIPT_PATH.parent,
+                                          '-postScript', GhidraServer.SCRIPT_PATH.name, '0'],
+                                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                         text=True, env=get_heap_env(max_memory))
+        self._port: Optional[int] = None
+        self._output: List[str] = []
+
+    @property
+    def port(self) -> Optional[int]:
+        '''
+        The local port the server accepts requests on, or `None` if it is not ready.
+        '''
+        return self._port
+
+    def is_alive(self) -> bool:
+        '''
+        Checks if the server process is still running.
+
+        Returns:
+            `True` if the server process is running.
+        '''
+        return self._process.poll() is None
+
+    def wait_until_ready(self) -> int:
+        '''
+        Waits until the server accepts requests.
+
+        Returns:
+            The local port the server accepts requests on.
+
+        Raises:
+            ValueError: If the server exits before accepting requests.
+        '''
+        if self._port is not None:
+            return self._port
+        assert self._process.stdout
+        for line in self._process.stdout:
+            self._output.append(line)
+            match = GhidraServer.PORT_PATTERN.search(line)
+            if match:
+                self._port = int(match.group(1))
+                break
+        else:
+            self._process.wait()
+            raise ValueError('Ghidra server exited before accepting requests'
+                             f'\noutput:\n{"".join(self._output)}')
+        # Keep draining the output of the server so that it never blocks on a full pipe
+        Thread(target=self._drain, daemon=True).start()
+        logger.info(f'Ghidra server is accepting requests on port {self._port}')
+        return self._port
+
+    def _drain(self) -> None:
+        assert self._process.stdout
+        for line in self._process.stdout:
+            logger.debug(f'Ghidra server ({self._port}): {line.rstrip()}')
+
+    def shutdown(self, timeout: float = 30) -> None:
+        '''
+        Shuts down the server, killing it if it does not exit in time.
+
+        Parameters:
+            timeout: Seconds to wait for the server to exit.
+        '''
+        if self.is_alive():
+            if self._port is not None:
+                try:
+                    GhidraServer.request(self._port, {'command': 'shutdown'}, timeout=timeout)
+                    self._process.wait(timeout=timeout)
+                except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+                    logger.warning(f'Ghidra server did not shut down cleanly: {e}')
+            if self.is_alive():
+                self._process.kill()
+                self._process.wait()
+        self._project_dir.cleanup()
+
+    @staticmethod
+    def request(port: int, message: Mapping[str, Any],
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        '''
+        Sends a request to a running server and waits for its response.
+
+        Parameters:
+            port: The local port the server accepts requests on.
+            message: The JSON-serializable request.
+            timeout: Seconds to wait for the response, or `None` to wait indefinitely.
+
+        Returns:
+            The response of the server.
+
+        Raises:
+            ValueError: If the server reports that the request failed.
+        '''
+        with socket.create_connection(('127.0.0.1', port), timeout=timeout) as connection:
+            with connection.makefile('rw') as stream:
+                stream.write(json.dumps(message) + '\n')
+                stream.flush()
+                line = stream.readline()
+        if not line:
+            raise ValueError(f'Ghidra server on port {port} closed the connection')
+        response: Dict[str, Any] = json.loads(line)
+        if response.get('status') != 'ok':
+            raise ValueError(f'Ghidra server request failed: {response.get("message")}')
+        return response
+
+
 class Ghidra(Decompiler):
     '''
     The Ghidra decompiler.
@@ -36,10 +401,47 @@ class Ghidra(Decompiler):
     The path to the Ghidra decompiler script (`decompile.py`) used during the decompilation process.
     '''
 
-    def __init__(self) -> None:
+    BASE_MEMORY: Final[int] = 1 << 30
+    '''
+    The estimated heap size in bytes that Ghidra needs regardless of the binary.
+    '''
+    MEMORY_PER_BYTE: Final[int] = 32
+    '''
+    The estimated heap size in bytes that Ghidra needs per byte of the largest binary of a
+    session.
+    '''
+    DECOMPILER_PROCESS_MEMORY: Final[int] = 256 << 20
+    '''
+    The estimated memory in bytes of each native decompiler process, which Ghidra starts for
+    every decompiler thread outside of its heap.
+    '''
+
+    OPTIONS: ClassVar[FrozenSet[str]] = frozenset({'timeout', 'threads', 'function_names',
+                                                   'skip_functions', 'max_memory'})
+    SUPPORTS_SHARDING: ClassVar[bool] = True
+
+    _servers: ClassVar[List[GhidraServer]] = []
+    _servers_lock: ClassVar[Lock] = Lock()
+
+    def __init__(self, persistent: bool = False, server_port: Optional[int] = None,
+                 timeout: Optional[float] = None, threads: Optional[int] = None,
+                 function_names: Optional[Collection[str]] = None,
+                 skip_functions: Optional[Sequence[FunctionKind]] = None,
+                 max_memory: Optional[int] = None,
+                 project_cache: Optional[GhidraProjectCache] = None) -> None:
         '''
         Initializes a new `Ghidra` decompiler instance.
 
+        Parameters:
+            persistent: If `True`, binaries are decompiled by a long-lived Ghidra server instead of a new `analyzeHeadless` process per batch. Servers are reused by all `Ghidra` instances of the process that started them, and are shut down when it exits.
+            server_port: The local port of a running Ghidra server to use. If `None` and `persistent` is `True`, a server is started (or reused) by this process.
+            timeout: Seconds Ghidra may spend decompiling a single function. Defaults to 60 seconds.
+            threads: Number of functions decompiled concurrently in each Ghidra session. Defaults to the number of processors available to the JVM.
+            function_names: If specified, only functions with these names are decompiled and disassembled.
+            skip_functions: Kinds of functions that are not decompiled.
+            max_memory: The maximum heap size of each Ghidra process in bytes. Defaults to Ghidra's default heap size.
+            project_cache: If specified, the project each binary is imported into is kept in this store, and binaries that were already imported are opened from it instead of being imported again. Each binary is then decompiled in its own `analyzeHeadless` session. Servers do not use the store.
+
         Raises:
             ValueError: If GHIDRA_HEADLESS is not set.
         '''
@@ -49,45 +451,417 @@ class Ghidra(Decompiler):
             raise ValueError(
                 f"{Ghidra.ENVIRON_KEY} is not set to Ghidra's analyzeHeadless command")
         self._ghidra_path = ghidra_path
+        self._persistent = persistent or server_port is not None
+        self._server_port = server_port
+        self._script_args = [f'{k}={v}' for k, v in
+                             resolve_kwargs(timeout=timeout, threads=threads,
+                                            skip=','.join(skip_functions or []) or None).items()]
+        self._function_names = set(function_names) if function_names is not None else None
+        self._max_memory = max_memory
+        self._project_cache = project_cache
+
+    def _get_script_args(self, output_dir: Path) -> List[str]:
+        if self._function_names is None:
+            return self._script_args
+        # The names may not fit on a command line, so they are passed in a file
+        names_path = output_dir / 'function_names.txt'
+        names_path.write_text('\n'.join(sorted(self._function_names)))
+        return [*self._script_args, f'names={names_path}']
 
     def decompile(self, path: PathLike) -> Sequence[DecompiledFunction]:
         path = Path(path)
         if not is_binary(path):
             raise ValueError('path must be an existing binary.')
+        return [f for _, f in self._get_session_iterator()([path]) if f]
+
+    def decompile_many(self, paths: Sequence[PathLike]) -> Sequence[DecompiledFunction]:
+        return list(self.iter_decompile(paths))
+
+    def iter_decompile(self, paths: Sequence[PathLike]) -> Iterator[DecompiledFunction]:
+        '''
+        Decompiles a batch of binaries, yielding the decompiled functions of each binary as soon
+        as Ghidra has decompiled all of them, while the rest of the batch is still being
+        decompiled. Binaries that cannot be decompiled are logged and skipped, like in
+        `decompile_each`.
+
+        Parameters:
+            paths: The paths to the binary files to be decompiled.
+
+        Returns:
+            An iterator over the decompiled functions of all of the binaries.
+        '''
+        return (f for _, functions in self.decompile_each(paths) for f in functions)
+
+    def decompile_each(self, paths: Sequence[PathLike]
+                       ) -> Iterator[Tuple[Path, Sequence[DecompiledFunction]]]:
+        bins: List[Path] = []
+        for path in paths:
+            path = Path(path)
+            if is_binary(path):
+                bins.append(path)
+            else:
+                logger.warning(f'Skipping "{path.name}" because it is not an existing binary')
+        iter_session = self._get_session_iterator()
+        if iter_session == self._iter_cached_project:
+            # Every binary has its own project, so that it can be reused independently
+            for path in bins:
+                yield from self._iter_binaries([path], iter_session)
+            return
+        # Programs in a Ghidra project are named after their files, so binaries with the same
+        # name must be imported in separate sessions (or server requests)
+        sessions: List[List[Path]] = []
+        for path in bins:
+            session = next((s for s in sessions if all(b.name != path.name for b in s)), None)
+            if session is None:
+                sessions.append([path])
+            else:
+                session.append(path)
+        for session in sessions:
+            yield from self._iter_binaries(session, iter_session)
+
+    def _get_session_iterator(self) -> Callable[[Sequence[Path]],
+                                                Iterator[Tuple[Path,
+                                                               Optional[DecompiledFunction]]]]:
+        if self._persistent:
+            return self._iter_server
+        if self._project_cache:
+            return self._iter_cached_project
+        return self._iter_headless
+
+    @staticmethod
+    def _iter_binaries(paths: Sequence[Path],
+                       iter_session: Callable[[Sequence[Path]],
+                                              Iterator[Tuple[Path, Optional[DecompiledFunction]]]]
+                       ) -> Iterator[Tuple[Path, List[DecompiledFunction]]]:
+        # Collects the functions of each binary of a session until the binary is complete, so
+        # that a failing session only loses the binaries it has not finished yet
+        functions: Dict[Path, List[DecompiledFunction]] = {}
+        decompiled: Set[Path] = set()
+        try:
+            for path, function in iter_session(paths):
+                if function:
+                    functions.setdefault(path, []).append(function)
+                else:
+                    decompiled.add(path)
+                    yield path, functions.pop(path, [])
+        except Exception as e:
+            remaining = [p for p in paths if p not in decompiled]
+            if len(paths) == 1:
+                logger.warning(f'Could not decompile "{paths[0].name}": '
+                               f'{type(e).__name__}: {e}')
+                return
+            # Decompile the rest of the session one binary at a time, so that only the binaries
+            # that cannot be decompiled are skipped
+            logger.warning(f'Ghidra failed to decompile a batch of {len(paths)} binaries, '
+                           f'retrying {len(remaining)} of them one at a time: '
+                           f'{type(e).__name__}: {e}')
+            for path in remaining:
+                yield from Ghidra._iter_binaries([path], iter_session)
+
+    def _iter_cached_project(self, paths: Sequence[Path]
+                             ) -> Iterator[Tuple[Path, Optional[DecompiledFunction]]]:
+        assert self._project_cache
+        path, = paths
+        key = self._project_cache.get_key(path)
+        imported_project = self._project_cache.load(key)
+        if not imported_project:
+            yield from self._iter_headless([path], project_key=key)
+            return
+        logger.debug(f'Reusing the cached Ghidra project of "{path.name}"')
+        try:
+            yield from self._iter_headless([path], imported_project=imported_project)
+        except Exception:
+            # Do not reuse a project that cannot be opened again
+            self._project_cache.remove(key)
+            raise
+
+    def _iter_headless(self, paths: Sequence[Path], imported_project: Optional[Path] = None,
+                       script_args: Sequence[str] = (), project_key: Optional[str] = None
+                       ) -> Iterator[Tuple[Path, Optional[DecompiledFunction]]]:
         # Create a temporary directory for the Ghidra project
         with TemporaryDirectory() as project_dir:
             logger.debug(f'Ghidra project directory created at {project_dir}')
-            # Create a temporary file to store the JSON output of the decompiled functions
-            with NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as output_file:
-                logger.debug('Ghidra decompiled functions file created '
-                             f'at {output_file.name}')
-                output_path = Path(output_file.name)
-                try:
-                    output_file.close()
-                    # Run decompile script
-                    try:
-                        results = subprocess.run([self._ghidra_path, project_dir, 'codablellm', '-import', path,
-                                                  '-scriptPath', Ghidra.SCRIPT_PATH.parent, '-noanalysis',
-                                                  '-postScript', Ghidra.SCRIPT_PATH.name, output_path],
-                                                 check=True, capture_output=True)
-                    except subprocess.CalledProcessError as e:
-                        logger.debug(f'Failed Ghidra command stdout:\n{
-                                     e.stdout.decode()}')
-                        raise ValueError(f'Ghidra command failed: "{e.cmd}"'
-                                         f'\nstderr:\n{e.stderr.decode()}') from e
-                    # Deserialize decompiled functions
+            if imported_project:
+                # Work on a copy of a project the binary was already imported into, since a
+                # project can only be opened by one Ghidra process at a time
+                shutil.copytree(imported_project, project_dir, dirs_exist_ok=True)
+                program_args = ['-process', *(p.name for p in paths), '-readOnly']
+            else:
+                program_args = ['-import', *paths]
+            # Create a temporary directory to store the JSON Lines output of each program
+            with TemporaryDirectory() as output_dir:
+                logger.debug('Ghidra decompiled functions directory created '
+                             f'at {output_dir}')
+                command = [self._ghidra_path, project_dir, 'codablellm', *program_args,
+                           '-scriptPath', Ghidra.SCRIPT_PATH.parent, '-noanalysis',
+                           '-postScript', Ghidra.SCRIPT_PATH.name, output_dir,
+                           *self._get_script_args(Path(output_dir)), *script_args]
+                # Ghidra's output is written to a file rather than a pipe, so that it can never
+                # block while the decompiled functions are being read
+                log_path = Path(project_dir) / 'codablellm.log'
+                with open(log_path, 'wb') as log:
+                    # Run decompile script on every imported program
+                    process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                                               env=get_heap_env(self._max_memory))
                     try:
-                        json_objects: List[DecompiledFunctionJSONObject] = \
-                            json.loads(output_path.read_text())
-                    except json.JSONDecodeError as e:
-                        logger.debug(f'Failed Ghidra post-script stdout:\n{
-                                     results.stdout.decode()}')
-                        raise ValueError('Ghidra post-script failure '
-                                         f'\nstderr:\n{results.stderr.decode()}') from e
-                    else:
-                        return [DecompiledFunction.from_decompiled_json(j) for j in json_objects]
-                finally:
-                    output_path.unlink(missing_ok=True)
+                        incomplete = yield from Ghidra._iter_output(
+                            paths, Path(output_dir), lambda: process.poll() is None,
+                            rebase_paths=imported_project is not None
+                        )
+                        process.wait()
+                    finally:
+                        if process.poll() is None:
+                            process.kill()
+                            process.wait()
+                output = log_path.read_text(errors='replace')
+                if process.returncode:
+                    raise ValueError(f'Ghidra command failed: "{command}"'
+                                     f'\noutput:\n{output}')
+                Ghidra._check_incomplete(paths, incomplete, output)
+            if project_key and not incomplete and self._project_cache:
+                try:
+                    self._project_cache.store(project_key, Path(project_dir))
+                except OSError as e:
+                    # The binary was decompiled, even though its project could not be cached
+                    logger.warning(f'Could not cache the Ghidra project of "{paths[0].name}": '
+                                   f'{e}')
+
+    def decompile_shard(self, path: PathLike, shard: int, shards: int,
+                        workspace: Path) -> Sequence[DecompiledFunction]:
+        path = Path(path)
+        if not is_binary(path):
+            raise ValueError('path must be an existing binary.')
+        imported_project = None
+        if self._project_cache:
+            imported_project = self._project_cache.load(self._project_cache.get_key(path))
+        if not imported_project:
+            imported_project = self._import_shared(path, workspace)
+        return [f for _, f in self._iter_headless([path], imported_project=imported_project,
+                                                  script_args=[f'shard={shard}/{shards}'])
+                if f]
+
+    def _import_shared(self, path: Path, workspace: Path, poll_interval: float = 1,
+                       start_timeout: float = 60) -> Path:
+        # The first shard to create the project imports the binary, while the other shards wait
+        # until it has been imported
+        project_dir = workspace / 'project'
+        imported_marker = workspace / 'imported'
+        failed_marker = workspace / 'failed'
+        importer_marker = workspace / 'importer'
+        try:
+            project_dir.mkdir()
+        except FileExistsError:
+            Ghidra._wait_for_import(path, imported_marker, failed_marker, importer_marker,
+                                    poll_interval, start_timeout)
+            return project_dir
+        importer_marker.write_text(str(os.getpid()))
+        logger.debug(f'Importing "{path.name}" into a shared Ghidra project...')
+        try:
+            subprocess.run([self._ghidra_path, project_dir, 'codablellm', '-import', path,
+                            '-noanalysis'], check=True, capture_output=True,
+                           env=get_heap_env(self._max_memory))
+            if self._project_cache:
+                self._project_cache.store(self._project_cache.get_key(path), project_dir)
+        except subprocess.CalledProcessError as e:
+            failed_marker.touch()
+            raise ValueError(f'Ghidra command failed: "{e.cmd}"'
+                             f'\nstderr:\n{e.stderr.decode()}') from e
+        except BaseException:
+            # Never leave the other shards waiting for an import that will not finish
+            failed_marker.touch()
+            raise
+        imported_marker.touch()
+        return project_dir
+
+    @staticmethod
+    def _wait_for_import(path: Path, imported_marker: Path, failed_marker: Path,
+                         importer_marker: Path, poll_interval: float,
+                         start_timeout: float) -> None:
+        deadline = time.monotonic() + start_timeout
+        while not imported_marker.exists():
+            if failed_marker.exists():
+                raise ValueError(f'Ghidra could not import "{path.name}"')
+            try:
+                importer = int(importer_marker.read_text())
+            except (FileNotFoundError, ValueError):
+                # The importer has not recorded its process ID yet
+                if time.monotonic() > deadline:
+                    raise ValueError(f'Ghidra did not start importing "{path.name}"')
+            else:
+                # The importer may have been killed without marking the import as failed
+                if not is_process_alive(importer):
+                    raise ValueError(f'The process importing "{path.name}" exited before '
+                                     'it was imported')
+            time.sleep(poll_interval)
+
+    def _iter_server(self, paths: Sequence[Path]
+                     ) -> Iterator[Tuple[Path, Optional[DecompiledFunction]]]:
+        port = self._server_port
+        if port is None:
+            port, = Ghidra.start_servers(1)
+        with TemporaryDirectory() as output_dir:
+            # Send the request in the background, so that the output can be read while the
+            # server is decompiling
+            responses: List[Dict[str, Any]] = []
+            errors: List[Exception] = []
+            script_args = self._get_script_args(Path(output_dir))
+
+            def request() -> None:
+                try:
+                    responses.append(GhidraServer.request(port, {
+                        'command': 'decompile',
+                        'paths': [str(p.resolve()) for p in paths],
+                        'output': output_dir,
+                        'args': script_args
+                    }))
+                except (OSError, ValueError) as e:
+                    errors.append(e)
+
+            thread = Thread(target=request, daemon=True)
+            thread.start()
+            incomplete = yield from Ghidra._iter_output(paths, Path(output_dir),
+                                                        thread.is_alive)
+            thread.join()
+            if errors:
+                raise errors[0]
+            response, = responses
+            Ghidra._check_incomplete(paths, incomplete,
+                                     f'failed: {response.get("failed", [])}')
+
+    @staticmethod
+    def _iter_output(paths: Sequence[Path], output_dir: Path,
+                     is_running: Callable[[], bool], rebase_paths: bool = False
+                     ) -> Generator[Tuple[Path, Optional[DecompiledFunction]], None, List[Path]]:
+        # Yields each decompiled function with its binary, followed by the binary and None once
+        # all of its functions have been decompiled. Programs of a previously imported project
+        # report the path they were imported from, so their functions can be rebased onto the
+        # binary that is being decompiled
+        incomplete: List[Path] = []
+        for path in paths:
+            output_path = output_dir / f'{path.name}.jsonl'
+            decompiled = failed = 0
+            done = False
+            # Deserialize decompiled functions as they are written
+            for json_object in follow_jsonl(output_path, is_running):
+                if json_object.get('done'):
+                    done = True
+                    break
+                if 'error' in json_object:
+                    failed += 1
+                    logger.debug(f'Could not decompile "{json_object["name"]}" in '
+                                 f'"{path.name}": {json_object["error"]}')
+                else:
+                    decompiled += 1
+                    if decompiled % 1000 == 0:
+                        logger.debug(f'Decompiled {decompiled} functions of "{path.name}"...')
+                    if rebase_paths:
+                        json_object['path'] = str(path)
+                    yield path, DecompiledFunction.from_decompiled_json(json_object)
+            if failed:
+                logger.warning(f'Ghidra failed to decompile {failed} functions in '
+                               f'"{path.name}"')
+            if done:
+                yield path, None
+            else:
+                incomplete.append(path)
+            logger.debug(f'Decompiled {decompiled} functions of "{path.name}"')
+        return incomplete
+
+    @staticmethod
+    def _check_incomplete(paths: Sequence[Path], incomplete: Sequence[Path], output: str) -> None:
+        if not incomplete:
+            return
+        logger.debug(f'Failed Ghidra post-script output:\n{output}')
+        if len(paths) == 1:
+            raise ValueError(f'Ghidra post-script failure\noutput:\n{output}')
+        for path in incomplete:
+            logger.warning(f'Ghidra post-script failed to decompile "{path.name}"')
+
+    @classmethod
+    def get_version(cls, *args: Any, **kwargs: Any) -> str:
+        # Cached results are invalidated when the scripts or the Ghidra installation change
+        return get_file_hash(Ghidra.SCRIPT_PATH)[:16] + f':{Ghidra.get_path()}'
+
+    @classmethod
+    def get_worker_memory(cls, paths: Sequence[Path], *args: Any,
+                          **kwargs: Any) -> Optional[int]:
+        # Each decompiler thread runs its own native decompiler process next to the JVM. If the
+        # threads are not set, the CPUs are split among the workers, so a single thread is
+        # counted per worker
+        heap = kwargs.get('max_memory') or Ghidra.estimate_memory(paths)
+        return heap + (kwargs.get('threads') or 1) * Ghidra.DECOMPILER_PROCESS_MEMORY
+
+    @classmethod
+    def get_worker_kwargs(cls, workers: int, *args: Any,
+                          **kwargs: Any) -> Sequence[Mapping[str, Any]]:
+        if not kwargs.get('persistent') or kwargs.get('server_port') is not None:
+            return super().get_worker_kwargs(workers, *args, **kwargs)
+        return [{'server_port': p}
+                for p in Ghidra.start_servers(workers, max_memory=kwargs.get('max_memory'))]
+
+    @staticmethod
+    def estimate_memory(paths: Sequence[PathLike]) -> int:
+        '''
+        Estimates the heap size Ghidra needs to decompile binaries in a single session, which
+        grows with the size of the largest binary since programs are analyzed one at a time.
+
+        Parameters:
+            paths: The binaries that are decompiled in the session.
+
+        Returns:
+            The estimated heap size in bytes.
+        '''
+        largest = max((Path(p).stat().st_size for p in paths if Path(p).is_file()), default=0)
+        return Ghidra.BASE_MEMORY + Ghidra.MEMORY_PER_BYTE * largest
+
+    @staticmethod
+    def start_servers(count: int, max_memory: Optional[int] = None) -> List[int]:
+        '''
+        Starts Ghidra servers, reusing the servers this process has already started.
+
+        Parameters:
+            count: The number of servers that should be running.
+            max_memory: The maximum heap size of each new server in bytes. Defaults to Ghidra's default heap size.
+
+        Returns:
+            The local ports of `count` running servers.
+
+        Raises:
+            ValueError: If GHIDRA_HEADLESS is not set or a server could not be started.
+        '''
+        ghidra_path = Ghidra.get_path()
+        if not ghidra_path:
+            raise ValueError(
+                f"{Ghidra.ENVIRON_KEY} is not set to Ghidra's analyzeHeadless command")
+        with Ghidra._servers_lock:
+            for server in [s for s in Ghidra._servers if not s.is_alive()]:
+                logger.warning(f'Ghidra server on port {server.port} exited unexpectedly')
+                server.shutdown()
+                Ghidra._servers.remove(server)
+            if len(Ghidra._servers) < count:
+                logger.info(f'Starting {count - len(Ghidra._servers)} Ghidra servers...')
+                # Start all servers before waiting on any, so that they warm up concurrently
+                started = [GhidraServer(ghidra_path, max_memory=max_memory)
+                           for _ in range(count - len(Ghidra._servers))]
+                try:
+                    for server in started:
+                        server.wait_until_ready()
+                except:
+                    for server in started:
+                        server.shutdown()
+                    raise
+                Ghidra._servers.extend(started)
+            return [s.wait_until_ready() for s in Ghidra._servers[:count]]
+
+    @staticmethod
+    def shutdown_servers() -> None:
+        '''
+        Shuts down all Ghidra servers started by this process.
+        '''
+        with Ghidra._servers_lock:
+            for server in Ghidra._servers:
+                server.shutdown()
+            Ghidra._servers.clear()
 
     @staticmethod
     def set_path(path: PathLike) -> None:
@@ -110,3 +884,6 @@ class Ghidra(Decompiler):
         '''
         value = os.environ.get(Ghidra.ENVIRON_KEY)
         return Path(value) if value else None
+
+
+atexit.register(Ghidra.shutdown_servers)
@@ -0,0 +1,155 @@
+from collections import Counter
+import logging
+import os
+from pathlib import Path
+import re
+import subprocess
+from typing import (Any, ClassVar, Collection, Final, FrozenSet, List, Optional, Sequence, Set,
+                    Tuple)
+
+from codablellm.core.decompiler import Decompiler
+from codablellm.core.function import DecompiledFunction
+from codablellm.core.utils import is_binary, PathLike
+
+
+logger = logging.getLogger('codablellm')
+
+ARCHITECTURE_PATTERN: Final[re.Pattern[str]] = re.compile(r'^architecture: ([^,\s]+)',
+                                                          re.MULTILINE)
+'''
+Matches the architecture in the file header printed by `objdump -f`.
+'''
+LABEL_PATTERN: Final[re.Pattern[str]] = re.compile(r'^[0-9a-fA-F]+ <(.+)>:$')
+'''
+Matches the label that starts the disassembly of a symbol, e.g. `0000000000001139 <main>:`.
+'''
+LOAD_PATTERN: Final[re.Pattern[str]] = re.compile(r'^\s*LOAD\s+off\s+0x[0-9a-fA-F]+\s+'
+                                                  r'vaddr\s+0x([0-9a-fA-F]+)', re.MULTILINE)
+'''
+Matches the virtual address of a loadable segment in the program headers printed by
+`objdump -p`.
+'''
+INSTRUCTION_PATTERN: Final[re.Pattern[str]] = re.compile(r'^\s+[0-9a-fA-F]+:\s+(.*?)\s*$')
+'''
+Matches a disassembled instruction, e.g. `    1139:	push   %rbp`, capturing the instruction.
+'''
+FUNCTION_SYMBOL_TYPES: Final[FrozenSet[str]] = frozenset('TtWw')
+'''
+The `nm` symbol types of functions: symbols in a text section and weak symbols.
+'''
+
+
+class Objdump(Decompiler):
+    '''
+    A lightweight disassembler backed by GNU binutils.
+
+    This class extracts the assembly of each function with `objdump` and `nm`, which are
+    available on most Linux systems. It does not decompile functions, so the `definition` of
+    every function is empty, but it is orders of magnitude faster than a full decompiler. The
+    `OBJDUMP` and `NM` environment variables can be set to use other binutils commands, such as
+    those of a cross toolchain.
+    '''
+
+    OBJDUMP_ENVIRON_KEY: Final[str] = 'OBJDUMP'
+    '''
+    The system environment variable key that may contain the path to the `objdump` command.
+    '''
+    NM_ENVIRON_KEY: Final[str] = 'NM'
+    '''
+    The system environment variable key that may contain the path to the `nm` command.
+    '''
+
+    OPTIONS: ClassVar[FrozenSet[str]] = frozenset({'function_names'})
+
+    def __init__(self, function_names: Optional[Collection[str]] = None,
+                 syntax: Optional[str] = None) -> None:
+        '''
+        Initializes a new `Objdump` disassembler instance.
+
+        Parameters:
+            function_names: If specified, only functions with these names are disassembled.
+            syntax: The assembly syntax passed to `objdump -M`, such as `intel` on x86. Defaults to the native syntax of `objdump`.
+        '''
+        super().__init__()
+        self._function_names = set(function_names) if function_names is not None else None
+        self._syntax = syntax
+
+    def decompile(self, path: PathLike) -> Sequence[DecompiledFunction]:
+        path = Path(path)
+        if not is_binary(path):
+            raise ValueError('path must be an existing binary.')
+        function_symbols = self._get_function_symbols(path)
+        command = [Objdump.get_objdump_path(), '--disassemble', '--file-headers',
+                   '--private-headers', '--wide', '--no-show-raw-insn', str(path)]
+        if self._syntax:
+            command[1:1] = ['-M', self._syntax]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        architecture_match = ARCHITECTURE_PATTERN.search(output)
+        architecture = architecture_match.group(1) if architecture_match else 'unknown'
+        # Addresses are made relative to the lowest loaded segment, like those of Ghidra
+        image_base = min((int(a, 16) for a in LOAD_PATTERN.findall(output)), default=0)
+        # Split the disassembly into the instructions of each symbol. Static functions of
+        # different files may have the same name, so symbols are kept apart by their address
+        symbols: List[Tuple[str, int, List[str]]] = []
+        current: Optional[List[str]] = None
+        for line in output.splitlines():
+            label_match = LABEL_PATTERN.match(line)
+            if label_match:
+                name = label_match.group(1)
+                # Without symbols (e.g. stripped binaries), only section labels are printed
+                wanted = name in function_symbols if function_symbols else \
+                    not name.startswith('.')
+                if wanted and (self._function_names is None or name in self._function_names):
+                    current = []
+                    symbols.append((name, int(line.split()[0], 16) - image_base, current))
+                else:
+                    current = None
+                continue
+            instruction_match = INSTRUCTION_PATTERN.match(line)
+            if current is not None and instruction_match and instruction_match.group(1):
+                current.append(instruction_match.group(1))
+        logger.debug(f'Disassembled {len(symbols)} functions in "{path.name}"')
+        name_counts = Counter(name for name, _, _ in symbols)
+        return [DecompiledFunction.from_decompiled_json({
+            'path': str(path), 'name': name, 'definition': '', 'assembly': '\n'.join(assembly),
+            'architecture': architecture, 'address': address,
+            'duplicate_name': name_counts[name] > 1
+        }) for name, address, assembly in symbols]
+
+    def _get_function_symbols(self, path: Path) -> Set[str]:
+        # The POSIX format prints "name type value [size]" for each symbol
+        output = subprocess.run([Objdump.get_nm_path(), '--defined-only', '--portability',
+                                 str(path)], capture_output=True, text=True).stdout
+        symbols: Set[str] = set()
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) >= 2 and fields[1] in FUNCTION_SYMBOL_TYPES:
+                symbols.add(fields[0])
+        return symbols
+
+    @classmethod
+    def get_version(cls, *args: Any, **kwargs: Any) -> str:
+        # Cached results are invalidated when a different version of objdump is used
+        output = subprocess.run([Objdump.get_objdump_path(), '--version'], capture_output=True,
+                                text=True).stdout
+        return output.splitlines()[0] if output else Objdump.get_objdump_path()
+
+    @staticmethod
+    def get_objdump_path() -> str:
+        '''
+        Retrieves the `objdump` command.
+
+        Returns:
+            The value of the `OBJDUMP` environment variable, or `objdump` if it is not set.
+        '''
+        return os.environ.get(Objdump.OBJDUMP_ENVIRON_KEY) or 'objdump'
+
+    @staticmethod
+    def get_nm_path() -> str:
+        '''
+        Retrieves the `nm` command.
+
+        Returns:
+            The value of the `NM` environment variable, or `nm` if it is not set.
+        '''
+        return os.environ.get(Objdump.NM_ENVIRON_KEY) or 'nm'
@@ -43,12 +43,22 @@ class CExtractor(Extractor):
     Tree-sitter `Parser` instance for C.
     '''
 
+    EXTENSIONS: Final[Sequence[str]] = ['.c', '.h']
+    '''
+    File extensions of C source code files.
+    '''
+
     def extract(self, file_path: PathLike, repo_path: Optional[PathLike] = None) -> Sequence[SourceFunction]:
+        file_path = Path(file_path)
+        return self.extract_code(file_path.read_bytes(), file_path, repo_path=repo_path)
+
+    def extract_code(self, code: bytes, file_path: PathLike,
+                     repo_path: Optional[PathLike] = None) -> Sequence[SourceFunction]:
         functions = []
         file_path = Path(file_path)
         if repo_path is not None:
             repo_path = Path(repo_path)
-        ast = CExtractor.PARSER.parse(file_path.read_bytes())
+        ast = CExtractor.PARSER.parse(code)
         for _, group in CExtractor.LANGUAGE.query(TREE_SITTER_QUERY).matches(ast.root_node):
             function_definition, = group['function.definition']
             function_name, = group['function.name']
@@ -65,8 +75,7 @@ class CExtractor(Extractor):
 
     def get_extractable_files(self, path: PathLike) -> Sequence[Path]:
         path = Path(path)
-        extensions = ['.c', '.h']
-        if any(path.suffix.casefold() == e.casefold() for e in extensions):
+        if self.is_extractable(path):
             return [path]
         return list(itertools.chain.from_iterable([path.rglob(f'*{e}', case_sensitive=False)
-                                                   for e in extensions]))
+                                                   for e in CExtractor.EXTENSIONS]))
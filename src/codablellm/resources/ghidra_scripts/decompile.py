@@ -2,67 +2,157 @@
 import json
 from ghidra.app.decompiler import DecompInterface
 from ghidra.util.task import ConsoleTaskMonitor
+from java.lang import Runtime, Throwable
+from java.util.concurrent import (Callable, ExecutorCompletionService, Executors,
+                                  LinkedBlockingQueue)
 import os
 
 # Ensure an argument is provided
 if len(getScriptArgs()) < 1:
-    print("Usage: <script> <output_file_path>")
+    print("Usage: <script> <output_file_path|output_directory> [timeout=<seconds>] "
+          "[threads=<count>] [names=<function_names_file>] [skip=<thunk,external>] "
+          "[shard=<index>/<count>]")
     exit(1)
 
-# Get the output file path from the first argument
+# Get the output file path from the first argument. If it is a directory, each program
+# analyzed in the same session is saved to its own file in that directory
 output_file = getScriptArgs()[0]
+if os.path.isdir(output_file):
+    output_file = os.path.join(output_file, currentProgram.getName() + ".jsonl")
 
-# Initialize decompiler
-decompiler = DecompInterface()
-decompiler.openProgram(currentProgram)
-
-# Initialize result list
-result_list = []
-
-# Get the file name from the program's executable path
-file_name = os.path.basename(currentProgram.getExecutablePath())
-
-# Iterate over all functions in the current program
-function_iter = currentProgram.getFunctionManager().getFunctions(True)
-for function in function_iter:
-    # Get the function name and entry point
-    name = function.getName()
-    entry_point = function.getEntryPoint().toString()
-
-    # Get the path (module or file name)
-    path = currentProgram.getExecutablePath()
-
-    # Decompile the function
-    decompiled_results = \
-        decompiler.decompileFunction(function, 60, ConsoleTaskMonitor())
-    if decompiled_results.decompileCompleted():
-        definition = decompiled_results.getDecompiledFunction().getC()
-    else:
-        print("Decompilation failed")
-        exit(1)
-
-    # Get the assembly instructions
-    instruction_iter = \
-        currentProgram.getListing().getInstructions(function.getBody(), True)
-    assembly = "\n".join([str(instr) for instr in instruction_iter])
-
-    # Get the architecture (processor name)
-    architecture = str(currentProgram.getLanguage().getProcessor())
-
-    # Create a dictionary for this function
-    func_dict = {
-        "path": path,
-        "definition": definition,
-        "name": name,
-        "assembly": assembly,
-        "architecture": architecture
-    }
-
-    # Add the function dictionary to the result list
-    result_list.append(func_dict)
-
-# Dump the result list to the output file as JSON
-with open(output_file, "w") as f:
-    json.dump(result_list, f, indent=4)
-
-print('Decompiled functions saved to' + output_file)
+# Parse the optional key=value arguments
+options = dict(arg.split("=", 1) for arg in getScriptArgs()[1:] if "=" in arg)
+timeout = int(float(options.get("timeout", 60)))
+threads = int(options.get("threads", 0)) or Runtime.getRuntime().availableProcessors()
+skip = set(k for k in options.get("skip", "").split(",") if k)
+shard, shards = [int(n) for n in options.get("shard", "0/1").split("/")]
+names = None
+if "names" in options:
+    with open(options["names"]) as f:
+        names = set(line.strip() for line in f if line.strip())
+
+
+def is_wanted(function):
+    # Only decompile the functions that were asked for
+    if names is not None and function.getName() not in names:
+        return False
+    if "thunk" in skip and function.isThunk():
+        return False
+    if "external" in skip and function.isExternal():
+        return False
+    return True
+
+
+# Get the path (module or file name) and the architecture (processor name)
+path = currentProgram.getExecutablePath()
+architecture = str(currentProgram.getLanguage().getProcessor())
+image_base = currentProgram.getImageBase()
+listing = currentProgram.getListing()
+function_manager = currentProgram.getFunctionManager()
+symbol_table = currentProgram.getSymbolTable()
+
+# Initialize a pool of decompilers. A DecompInterface is not thread-safe, so each thread
+# borrows its own instance for every function
+decompilers = LinkedBlockingQueue()
+for _ in range(threads):
+    decompiler = DecompInterface()
+    decompiler.openProgram(currentProgram)
+    decompilers.put(decompiler)
+
+
+class DecompileTask(Callable):
+
+    def __init__(self, function, duplicate_name):
+        self.function = function
+        self.duplicate_name = duplicate_name
+
+    def call(self):
+        name = self.function.getName()
+        decompiler = decompilers.take()
+        try:
+            # Decompile the function
+            decompiled_results = decompiler.decompileFunction(self.function, timeout,
+                                                              ConsoleTaskMonitor())
+            if not decompiled_results.decompileCompleted():
+                return {"path": path, "name": name,
+                        "error": decompiled_results.getErrorMessage() or "Decompilation failed"}
+            definition = decompiled_results.getDecompiledFunction().getC()
+        except (Exception, Throwable) as e:
+            return {"path": path, "name": name, "error": str(e)}
+        finally:
+            decompilers.put(decompiler)
+
+        # Get the assembly instructions, and the symbols they refer to, so that functions can
+        # be compared without comparing their addresses
+        instructions = []
+        references = []
+        for instr in listing.getInstructions(self.function.getBody(), True):
+            instructions.append(str(instr))
+            for reference in instr.getReferencesFrom():
+                target = reference.getToAddress()
+                symbol = function_manager.getFunctionAt(target) or \
+                    symbol_table.getPrimarySymbol(target)
+                if symbol is not None:
+                    references.append([target.getOffset(), symbol.getName()])
+        assembly = "\n".join(instructions)
+
+        # Create a dictionary for this function. The address is relative to the image base,
+        # since Ghidra may load the program at a different base than the binary's own
+        return {
+            "path": path,
+            "definition": definition,
+            "name": name,
+            "assembly": assembly,
+            "architecture": architecture,
+            "address": self.function.getEntryPoint().subtract(image_base),
+            "duplicate_name": self.duplicate_name,
+            "references": references
+        }
+
+
+# Decompile all functions in the current program concurrently, writing each function to the
+# output file as a compact JSON line as soon as it is decompiled. Functions that fail are
+# recorded with an error instead of discarding the results of the whole program
+executor = Executors.newFixedThreadPool(threads)
+failures = 0
+with open(output_file, "w") as output:
+
+    def write(record):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    try:
+        completion_service = ExecutorCompletionService(executor)
+        submitted = 0
+        # Functions are always iterated in the same order, so every shard takes a disjoint
+        # share of them
+        wanted_functions = [f for f in currentProgram.getFunctionManager().getFunctions(True)
+                            if is_wanted(f)]
+        # Functions with the same name (e.g. static functions of different files) are told
+        # apart by their addresses
+        name_counts = {}
+        for function in wanted_functions:
+            name_counts[function.getName()] = name_counts.get(function.getName(), 0) + 1
+        for index, function in enumerate(wanted_functions):
+            if index % shards != shard:
+                continue
+            completion_service.submit(DecompileTask(function,
+                                                    name_counts[function.getName()] > 1))
+            submitted += 1
+        for _ in range(submitted):
+            try:
+                record = completion_service.take().get()
+            except (Exception, Throwable) as e:
+                record = {"path": path, "name": "", "error": str(e)}
+            if "error" in record:
+                failures += 1
+            write(record)
+    finally:
+        executor.shutdown()
+        while not decompilers.isEmpty():
+            decompilers.take().dispose()
+
+    # Mark the output as complete, so that readers following the file know to stop
+    write({"done": True, "failed": failures})
+
+print("Decompiled functions saved to " + output_file + " (" + str(failures) + " failed)")
@@ -0,0 +1,66 @@
+# Import required libraries
+import json
+import socket
+from ghidra.app.script import GhidraState
+from java.io import File
+from java.lang import Throwable
+
+# Ensure an argument is provided
+if len(getScriptArgs()) < 1:
+    print("Usage: <script> <port>")
+    exit(1)
+
+# Listen for requests on the loopback interface. A port of 0 lets the operating system pick a
+# free port, which is reported to the parent process
+server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+server.bind(("127.0.0.1", int(getScriptArgs()[0])))
+server.listen(16)
+print("CODABLELLM_GHIDRA_PORT=%d" % server.getsockname()[1])
+
+
+def decompile(paths, output_dir, args):
+    # Import every binary into this session and run the decompile script on it, writing the
+    # decompiled functions of each program to its own file in the output directory
+    failed = []
+    for path in paths:
+        program = None
+        try:
+            program = importFile(File(path))
+            program_state = GhidraState(state.getTool(), state.getProject(), program,
+                                        None, None, None)
+            runScript("decompile.py", [output_dir] + args, program_state)
+        except (Exception, SystemExit, Throwable) as e:
+            print("Failed to decompile " + path + ": " + str(e))
+            failed.append(path)
+        finally:
+            # Programs are never saved to the project, so release them to free their memory
+            if program is not None:
+                for consumer in list(program.getConsumerList()):
+                    program.release(consumer)
+    return {"status": "ok", "failed": failed}
+
+
+# Serve requests one at a time until a shutdown request is received
+running = True
+while running:
+    connection, _ = server.accept()
+    stream = connection.makefile("rw")
+    try:
+        request = json.loads(stream.readline())
+        if request.get("command") == "shutdown":
+            running = False
+            response = {"status": "ok"}
+        elif request.get("command") == "decompile":
+            response = decompile(request["paths"], request["output"],
+                                 [str(a) for a in request.get("args", [])])
+        else:
+            response = {"status": "error",
+                        "message": "Unknown command: " + str(request.get("command"))}
+    except (Exception, Throwable) as e:
+        response = {"status": "error", "message": str(e)}
+    stream.write(json.dumps(response) + "\n")
+    stream.flush()
+    connection.close()
+
+server.close()
+print("Ghidra server shut down")
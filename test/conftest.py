@@ -7,7 +7,6 @@ from pytest import MonkeyPatch, TempPathFactory, fixture
 from codablellm.core import utils
 from codablellm.core import decompiler
 from codablellm.core.decompiler import Decompiler
-from codablellm.core.decompiler import _decompile
 from codablellm.core.function import DecompiledFunction, DecompiledFunctionJSONObject
 from codablellm.repoman import Command
 
@@ -49,9 +48,14 @@ def _decompile(path: utils.PathLike, *args: Any, **kwargs: Any) -> Sequence[Deco
     return MockDecompiler().decompile(path)
 
 
+def _decompile_many(paths: Sequence[utils.PathLike], *args: Any, **kwargs: Any) -> Sequence[DecompiledFunction]:
+    return MockDecompiler().decompile_many(paths)
+
+
 @fixture(autouse=True)
 def mock_decompile(monkeypatch: MonkeyPatch) -> None:
     monkeypatch.setattr(decompiler, '_decompile', _decompile)
+    monkeypatch.setattr(decompiler, '_decompile_many', _decompile_many)
 
 
 @fixture(scope='session')
@@ -1,4 +1,5 @@
 from pathlib import Path
+from click import BadParameter
 from pandas import DataFrame
 import pandas
 import pytest
@@ -6,6 +7,7 @@ from typer.testing import CliRunner
 
 from codablellm import __version__
 from codablellm.cli import app
+from codablellm.core import decompiler
 from codablellm.dataset import DecompiledCodeDataset
 
 RUNNER = CliRunner()
@@ -14,6 +16,21 @@ RUNNER = CliRunner()
 def test_check_version() -> None:
     assert __version__ in RUNNER.invoke(app, '--version').stdout
 
+
+def test_ghidra_project_cache_option(c_repository: Path, c_bin: Path, tmp_path: Path,
+                                     monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(decompiler.DECOMPILER, 'class_path', decompiler.DECOMPILER['class_path'])
+    args = [str(c_repository), str(tmp_path / 'out.csv'), str(c_bin), '--decompile']
+    # Only Ghidra can use the project cache
+    result = RUNNER.invoke(app, [*args, '--decompiler', 'objdump',
+                                 '--ghidra-project-cache', str(tmp_path / 'projects')])
+    assert isinstance(result.exception, BadParameter)
+    assert result.exception.param_hint == '--ghidra-project-cache'
+    result = RUNNER.invoke(app, [*args, '--ghidra-project-cache-size', '1024'])
+    assert isinstance(result.exception, BadParameter)
+    assert result.exception.param_hint == '--ghidra-project-cache-size'
+    assert not (tmp_path / 'out.csv').exists()
+
 @pytest.mark.skip(reason="Mock of decompiled functions is most likely causing the issue")
 def test_compile_dataset(c_repository: Path, c_bin: Path, tmpdir: Path) -> None:
     out_file = tmpdir / 'out.csv'
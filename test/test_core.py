@@ -1,16 +1,29 @@
 from collections import deque
 from pathlib import Path
+import json
+import re
 from queue import Queue
+import shutil
+import subprocess
+import sys
 import time
-from typing import List
+from typing import List, Optional, Sequence, Tuple
 
 import pytest
 
 from codablellm.core import *
 from codablellm.core import utils
+from codablellm.core.decompiler import Decompiler
+from codablellm.core.function import get_stripped_symbol
+from codablellm.decompilers.ghidra import Ghidra, GhidraProjectCache, follow_jsonl
+from codablellm.decompilers.objdump import Objdump
 from codablellm.exceptions import ExtractorNotFound
 from codablellm.languages import CExtractor
 
+# The real subprocess.run, before it is mocked by conftest
+SUBPROCESS_RUN = subprocess.run
+DECOMPILE_MANY = decompiler._decompile_many
+
 
 def test_progress() -> None:
     with Progress('Doing some task...') as progress:
@@ -132,6 +145,457 @@ def test_decompiled_function(tmp_path: Path) -> None:
     assert 'addTwoNumbers' not in stripped_function.definition
     assert 'printf' not in stripped_function.assembly
     assert 'addTwoNumbers' not in stripped_function.assembly
+    assert stripped_function.name == get_stripped_symbol('addTwoNumbers', tmp_path)
+    assert stripped_function.definition.startswith(f'void {stripped_function.name}(')
+    assert stripped_function.uid == decompiled_function.uid
+    # Symbols are stripped to the same names in every function of a binary
+    caller = DecompiledFunction(DecompiledFunction.create_uid(tmp_path, 'main'), tmp_path, 'main',
+                                'int main() { addTwoNumbers(1, 2); printf("done"); }',
+                                'main:\n\tcall addTwoNumbers\n\tcall printf', 'x86')
+    stripped_caller = caller.to_stripped()
+    printf = get_stripped_symbol('printf', tmp_path)
+    assert f'call {stripped_function.name}' in stripped_caller.assembly
+    assert printf in stripped_caller.definition and printf in stripped_function.definition
+    assert stripped_caller.to_json() == caller.to_stripped().to_json()
+    # Stripped names carry 64 bits of the digest, so they practically never collide
+    assert re.fullmatch(r'sub_[0-9a-f]{16}', printf)
+
+
+def test_ast_editor() -> None:
+    definition = (
+        'int add(int a, int b) {'
+        '\n\treturn helper(a) + helper(b) + other(a, "é");'
+        '\n}'
+    )
+    editor = ASTEditor(CExtractor.PARSER, definition)
+    query = ('(call_expression'
+             '    function: (identifier) @function.callee'
+             ')')
+    edits = editor.plan_edits(query, {'function.callee': lambda n: f'{n.text.decode()}_v2'})
+    assert [e.new_code for e in edits] == ['helper_v2', 'helper_v2', 'other_v2']
+    assert editor.source_code == definition
+    editor.apply_edits(edits)
+    assert editor.source_code == definition.replace('helper', 'helper_v2') \
+        .replace('other', 'other_v2')
+    editor.match_and_edit(query, {'function.callee': 'f'})
+    assert 'return f(a) + f(b) + f(a, "é");' in editor.source_code
+    with pytest.raises(ValueError):
+        editor.apply_edits([ASTEdit(0, 3, 'long'), ASTEdit(2, 4, 'x')])
+
+
+def test_batch_decompile(c_bin: Path) -> None:
+    functions = decompiler.decompile([c_bin, c_bin, 'FAILED'],
+                                     config=DecompileConfig(batch_size=2))
+    assert len(functions) == 16
+    assert {f.name for f in functions} == {f'function{n}' for n in range(1, 9)}
+
+
+def test_deduplicate_functions(tmp_path: Path) -> None:
+
+    def function(binary: str, name: str, assembly: str,
+                 references: Sequence[Tuple[int, str]] = ()) -> DecompiledFunction:
+        path = tmp_path / binary
+        function = DecompiledFunction(DecompiledFunction.create_uid(path, name), path, name,
+                                      f'void {name}(void) {{}}', assembly, 'x86')
+        if references:
+            function.set_metadata({'references': [list(r) for r in references]})
+        return function
+
+    functions = [function('app', 'helper', 'PUSH RBP\nCALL 0x00101139', [(0x101139, 'puts')]),
+                 function('app', 'main', 'CALL 0x00101180', [(0x101180, 'helper')]),
+                 function('tool', 'helper', 'PUSH RBP\nCALL 0x00104e20', [(0x104e20, 'puts')]),
+                 function('tool', 'main', 'MOV EAX,0x1')]
+    deduplicated = decompiler.deduplicate_functions(functions)
+    assert [(f.path.name, f.name) for f in deduplicated] == \
+        [('app', 'helper'), ('app', 'main'), ('tool', 'main')]
+    assert deduplicated[0].metadata['binaries'] == [str(tmp_path / 'app'), str(tmp_path / 'tool')]
+    assert deduplicated[2].metadata['binaries'] == [str(tmp_path / 'tool')]
+    # Functions that only differ by their callee, the string they load or a constant differ
+    assert decompiler.get_assembly_hash(
+        function('app', 'f', 'CALL 0x00101139', [(0x101139, 'puts')])
+    ) != decompiler.get_assembly_hash(
+        function('tool', 'f', 'CALL 0x00104e20', [(0x104e20, 'abort')])
+    )
+    assert decompiler.get_assembly_hash(
+        function('app', 'f', 'LEA RDI,[0x00102004]', [(0x102004, 's_hello_00102004')])
+    ) == decompiler.get_assembly_hash(
+        function('tool', 'f', 'LEA RDI,[0x00108010]', [(0x108010, 's_hello_00108010')])
+    ) != decompiler.get_assembly_hash(
+        function('tool', 'f', 'LEA RDI,[0x00108010]', [(0x108010, 's_bye_00108010')])
+    )
+    assert decompiler.get_assembly_hash(function('app', 'f', 'MOV EAX,0x100000')) != \
+        decompiler.get_assembly_hash(function('tool', 'f', 'MOV EAX,0x200000'))
+    # objdump prints branch targets as bare addresses followed by the symbol
+    assert decompiler.get_assembly_hash(function('app', 'f', 'call   1139 <g>')) == \
+        decompiler.get_assembly_hash(function('tool', 'f', 'call   2f40 <g>')) != \
+        decompiler.get_assembly_hash(function('tool', 'f', 'call   2f40 <h>'))
+    # and instruction-relative operands as displacements from the next instruction
+    assert decompiler.get_assembly_hash(
+        function('app', 'f', 'lea    0xe9c(%rip),%rdi        # 2004 <msg>')
+    ) == decompiler.get_assembly_hash(
+        function('tool', 'f', 'lea    0x2ee1(%rip),%rdi        # 4008 <msg>')
+    )
+    assert decompiler.get_assembly_hash(function('app', 'f', 'lea    rdi,[rip+0xe9c]')) == \
+        decompiler.get_assembly_hash(function('tool', 'f', 'lea    rdi,[rip+0x2ee1]'))
+
+
+GHIDRA_SERVER_STUB = '''
+import json, os, socket, sys
+server = socket.socket()
+server.bind(('127.0.0.1', 0))
+server.listen(16)
+print('INFO  serve.py> CODABLELLM_GHIDRA_PORT=%d' % server.getsockname()[1], flush=True)
+while True:
+    connection, _ = server.accept()
+    with connection, connection.makefile('rw') as stream:
+        request = json.loads(stream.readline())
+        if request['command'] == 'shutdown':
+            stream.write(json.dumps({'status': 'ok'}) + '\\n')
+            break
+        for path in request['paths']:
+            name = os.path.basename(path)
+            with open(os.path.join(request['output'], name + '.jsonl'), 'w') as f:
+                for record in [{'path': path, 'name': 'main', 'definition': str(os.getpid()),
+                                'assembly': ' '.join(request['args']), 'architecture': 'x86'},
+                               {'path': path, 'name': 'broken', 'error': 'Timed out'},
+                               {'done': True, 'failed': 1}]:
+                    f.write(json.dumps(record) + '\\n')
+        stream.write(json.dumps({'status': 'ok', 'failed': []}) + '\\n')
+'''
+
+
+def test_persistent_ghidra(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    stub = tmp_path / 'analyzeHeadless'
+    stub.write_text(f'#!{sys.executable}\n{GHIDRA_SERVER_STUB}')
+    stub.chmod(0o755)
+    monkeypatch.setenv(Ghidra.ENVIRON_KEY, str(stub))
+    binary = tmp_path / 'a.out'
+    binary.write_bytes(b'\x7fELF\0')
+    try:
+        ghidra = Ghidra(persistent=True)
+        first, = ghidra.decompile(binary)
+        second, = ghidra.decompile_many([binary])
+        # Both calls are served by the same long-lived process
+        assert first.name == 'main' and first.definition == second.definition
+        worker_kwargs = Ghidra.get_worker_kwargs(2, persistent=True)
+        assert len(worker_kwargs) == 2
+        third, = Ghidra(**worker_kwargs[0]).decompile(binary)
+        fourth, = Ghidra(**worker_kwargs[1]).decompile(binary)
+        assert third.definition == first.definition != fourth.definition
+        assert Ghidra.get_worker_kwargs(2) == [{}]
+        # Decompiler options of the config are forwarded to the Ghidra script
+        config = DecompileConfig(timeout=5, threads=2)
+        options, = Ghidra(persistent=True, **config.get_decompiler_kwargs()).decompile(binary)
+        assert options.assembly == 'timeout=5 threads=2'
+        # Binaries are imported without analysis, so library functions cannot be told apart
+        with pytest.raises(ValueError):
+            DecompileConfig(skip_functions=['library'])  # type: ignore
+        config = DecompileConfig(function_names=['main'], skip_functions=['thunk'])
+        filtered, = Ghidra(persistent=True,
+                           **config.get_decompiler_kwargs(Ghidra)).decompile(binary)
+        assert filtered.assembly.startswith('skip=thunk names=')
+    finally:
+        Ghidra.shutdown_servers()
+    assert not Ghidra._servers
+
+
+GHIDRA_HEADLESS_STUB = '''
+import json, os, sys
+project_dir, _, mode, *args = sys.argv[1:]
+output = args[args.index('-postScript') + 2]
+programs = args[:args.index('-scriptPath')]
+if mode == '-import':
+    with open(os.path.join(project_dir, 'codablellm.gpr'), 'w') as f:
+        f.write('\\n'.join(programs))
+    with open(os.environ['IMPORT_LOG'], 'a') as f:
+        f.write('\\n'.join(programs) + '\\n')
+with open(os.path.join(project_dir, 'codablellm.gpr')) as f:
+    imported = f.read().split('\\n')
+for path in imported:
+    with open(os.path.join(output, os.path.basename(path) + '.jsonl'), 'w') as f:
+        for record in [{'path': path, 'name': 'main', 'definition': '',
+                        'assembly': os.environ.get('MAXMEM', ''), 'architecture': 'x86'},
+                       {'done': True, 'failed': 0}]:
+            f.write(json.dumps(record) + '\\n')
+'''
+
+
+def test_ghidra_project_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    stub = tmp_path / 'analyzeHeadless'
+    stub.write_text(f'#!{sys.executable}\n{GHIDRA_HEADLESS_STUB}')
+    stub.chmod(0o755)
+    monkeypatch.setenv(Ghidra.ENVIRON_KEY, str(stub))
+    import_log = tmp_path / 'imports.log'
+    monkeypatch.setenv('IMPORT_LOG', str(import_log))
+    (tmp_path / 'build').mkdir()
+    binary = tmp_path / 'build' / 'a.out'
+    binary.write_bytes(b'\x7fELF\0')
+    project_cache = GhidraProjectCache(tmp_path / 'projects')
+    monkeypatch.delenv('MAXMEM', raising=False)
+    ghidra = Ghidra(project_cache=project_cache)
+    first, = ghidra.decompile(binary)
+    assert first.path == binary
+    # The heap of analyzeHeadless is only limited if a maximum is given
+    assert first.assembly == ''
+    assert project_cache.load(project_cache.get_key(binary))
+    # Identical binaries are opened from the cached project instead of being imported again
+    (tmp_path / 'install').mkdir()
+    installed = tmp_path / 'install' / 'a.out'
+    installed.write_bytes(binary.read_bytes())
+    second, third = Ghidra(project_cache=project_cache).decompile_many([binary, installed])
+    assert (second.path, third.path) == (binary, installed)
+    assert import_log.read_text().split() == [str(binary)]
+    project_cache.clear()
+    assert not project_cache.load(project_cache.get_key(binary))
+    limited, = Ghidra(project_cache=project_cache, max_memory=3 * 2 ** 29).decompile(installed)
+    assert limited.assembly == '1536M'
+    assert import_log.read_text().split() == [str(binary), str(installed)]
+
+
+FAILING_HEADLESS_STUB = '''
+import json, os, sys
+project_dir, _, mode, *args = sys.argv[1:]
+output = args[args.index('-postScript') + 2]
+if mode == '-import':
+    with open(os.path.join(project_dir, 'codablellm.gpr'), 'w') as f:
+        f.write('\\n'.join(args[:args.index('-scriptPath')]))
+with open(os.path.join(project_dir, 'codablellm.gpr')) as f:
+    imported = f.read().split('\\n')
+for path in imported:
+    # Ghidra gives up on the rest of the session once a program fails
+    if os.path.basename(path).startswith('bad'):
+        sys.exit(1)
+    with open(os.path.join(output, os.path.basename(path) + '.jsonl'), 'w') as f:
+        for record in [{'path': path, 'name': 'main', 'definition': '', 'assembly': '',
+                        'architecture': 'x86'},
+                       {'done': True, 'failed': 0}]:
+            f.write(json.dumps(record) + '\\n')
+'''
+
+
+def test_ghidra_failing_binary(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    stub = tmp_path / 'analyzeHeadless'
+    stub.write_text(f'#!{sys.executable}\n{FAILING_HEADLESS_STUB}')
+    stub.chmod(0o755)
+    monkeypatch.setenv(Ghidra.ENVIRON_KEY, str(stub))
+    bins = [tmp_path / 'first', tmp_path / 'bad', tmp_path / 'last']
+    for path in bins:
+        path.write_bytes(b'\x7fELF\0')
+    # A binary that cannot be decompiled does not discard the rest of its batch
+    functions = Ghidra().decompile_many(bins)
+    assert sorted(f.path.name for f in functions) == ['first', 'last']
+    assert [p.name for p, _ in Ghidra().decompile_each(bins)] == ['first', 'last']
+    with pytest.raises(ValueError):
+        Ghidra().decompile(tmp_path / 'bad')
+    # Cached projects that cannot be opened are skipped and removed from the cache
+    project_cache = GhidraProjectCache(tmp_path / 'projects')
+    ghidra = Ghidra(project_cache=project_cache)
+    assert sorted(f.path.name for f in ghidra.decompile_many(bins)) == ['first', 'last']
+    assert project_cache.load(project_cache.get_key(bins[1])) is None
+    key = project_cache.get_key(bins[0])
+    cached_project = project_cache.load(key)
+    assert cached_project
+    (cached_project / 'codablellm.gpr').write_text(str(tmp_path / 'bad'))
+    assert sorted(f.path.name for f in ghidra.decompile_many(bins)) == ['last']
+    assert project_cache.load(key) is None
+    assert sorted(f.path.name for f in ghidra.decompile_many(bins)) == ['first', 'last']
+
+
+def test_ghidra_shared_import(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # The stub imports nothing, but succeeds
+    stub = tmp_path / 'analyzeHeadless'
+    stub.write_text('#!/bin/sh\n')
+    stub.chmod(0o755)
+    monkeypatch.setenv(Ghidra.ENVIRON_KEY, str(stub))
+    monkeypatch.setattr(subprocess, 'run', SUBPROCESS_RUN)
+    binary = tmp_path / 'a.out'
+    binary.write_bytes(b'\x7fELF\0')
+    # Shards stop waiting when the importing process exited without finishing the import
+    workspace = tmp_path / 'dead'
+    (workspace / 'project').mkdir(parents=True)
+    dead = subprocess.Popen([sys.executable, '-c', ''])
+    dead.wait()
+    (workspace / 'importer').write_text(str(dead.pid))
+    with pytest.raises(ValueError):
+        Ghidra()._import_shared(binary, workspace, poll_interval=0.01)
+    # ... or when it never started importing
+    workspace = tmp_path / 'unstarted'
+    (workspace / 'project').mkdir(parents=True)
+    with pytest.raises(ValueError):
+        Ghidra()._import_shared(binary, workspace, poll_interval=0.01, start_timeout=0.05)
+    # An import that fails in any way is marked as failed for the waiting shards
+    workspace = tmp_path / 'failing'
+    workspace.mkdir()
+    project_cache = GhidraProjectCache(tmp_path / 'projects')
+    monkeypatch.setattr(GhidraProjectCache, 'store', lambda *_: sys.exit(1))
+    with pytest.raises(SystemExit):
+        Ghidra(project_cache=project_cache)._import_shared(binary, workspace)
+    assert (workspace / 'failed').exists()
+
+
+def test_decompile_cache(c_bin: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(decompiler.DECOMPILER, 'class_path', 'conftest.MockDecompiler')
+    cache = DecompileCache(tmp_path / 'cache')
+    config = DecompileConfig(cache=cache)
+    assert len(decompiler.decompile(c_bin, config=config)) == 8
+    # Identical binaries are loaded from the cache without being decompiled again
+    copied_bin = tmp_path / 'copy.lib'
+    copied_bin.write_bytes(c_bin.read_bytes())
+    monkeypatch.setattr(decompiler, 'get_decompiler', None)
+    functions = decompiler.decompile(copied_bin, config=config)
+    assert len(functions) == 8
+    assert all(f.path == copied_bin for f in functions)
+    # The least recently used entries are evicted first
+    cache.store('0' * 64, [])
+    cache.store('1' * 64, [])
+    time.sleep(0.01)
+    assert cache.load('0' * 64, copied_bin) == []
+    cache.evict(2)
+    assert cache.load('0' * 64, copied_bin) == []
+    assert cache.load('1' * 64, copied_bin) is None
+    cache.clear()
+    assert not list((tmp_path / 'cache').glob('*/*.json'))
+
+
+class ShardedMockDecompiler(Decompiler):
+    SUPPORTS_SHARDING = True
+
+    def decompile(self, path: utils.PathLike) -> Sequence[DecompiledFunction]:
+        return [DecompiledFunction.from_json(j) for j in json.loads(Path(path).read_text())]
+
+    def decompile_shard(self, path: utils.PathLike, shard: int, shards: int,
+                        workspace: Path) -> Sequence[DecompiledFunction]:
+        return self.decompile(path)[shard::shards]
+
+
+def test_sharded_decompile(c_bin: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(decompiler.DECOMPILER, 'class_path', 'test_core.ShardedMockDecompiler')
+    config = DecompileConfig(shard_threshold=0, shards=3, cache=DecompileCache(tmp_path))
+    functions = decompiler.decompile(c_bin, config=config)
+    assert sorted(f.name for f in functions) == [f'function{n}' for n in range(1, 9)]
+    # The cached shards are merged into a single entry for the binary
+    assert len(list(tmp_path.glob('*/*.json'))) == 1
+    # Binaries are only sharded if a threshold is given
+    monkeypatch.setattr(ShardedMockDecompiler, 'decompile_shard', None)
+    assert len(decompiler.decompile(c_bin, config=DecompileConfig(shards=3))) == 8
+
+
+class ThreadedMockDecompiler(Decompiler):
+    OPTIONS = frozenset({'threads'})
+
+    def __init__(self, threads: Optional[int] = None) -> None:
+        super().__init__()
+        self.threads = threads
+
+    def decompile(self, path: utils.PathLike) -> Sequence[DecompiledFunction]:
+        path = Path(path)
+        return [DecompiledFunction(DecompiledFunction.create_uid(path, 'main'), path, 'main', '',
+                                   str(self.threads), 'x86')]
+
+
+def test_decompile_threads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(decompiler.DECOMPILER, 'class_path', 'test_core.ThreadedMockDecompiler')
+    monkeypatch.setattr(decompiler, '_decompile_many', DECOMPILE_MANY)
+    monkeypatch.setattr(decompiler, 'get_cpu_limit', lambda: 8)
+    bins = [tmp_path / 'a.out', tmp_path / 'b.out']
+    for index, path in enumerate(bins):
+        path.write_bytes(b'\x7fELF' + bytes([index]))
+    # The CPUs are split among the workers that decompile concurrently
+    functions = decompiler.decompile(bins, config=DecompileConfig(max_workers=2))
+    assert [f.assembly for f in functions] == ['4', '4']
+    functions = decompiler.decompile(bins, config=DecompileConfig(max_workers=16))
+    assert [f.assembly for f in functions] == ['4', '4']
+    functions = decompiler.decompile(bins, config=DecompileConfig(max_workers=2, threads=3))
+    assert [f.assembly for f in functions] == ['3', '3']
+
+
+def test_follow_jsonl(tmp_path: Path) -> None:
+    output = tmp_path / 'output.jsonl'
+    assert not list(follow_jsonl(output, lambda: False))
+    output.write_text('{"name": "a"}\n{"name": "b"}\n{"name": "c')
+    polls = iter([True, False])
+    # Lines written while following are read, but an incomplete last line is not
+    records = follow_jsonl(output, lambda: next(polls, False), poll_interval=0)
+    assert next(records) == {'name': 'a'}
+    with output.open('a') as file:
+        file.write('"}\n')
+    assert [r['name'] for r in records] == ['b', 'c']
+
+
+def test_binary_discovery(c_bin: Path, tmp_path: Path) -> None:
+
+    def elf(e_type: int) -> bytes:
+        return b'\x7fELF\x02\x01\x01' + bytes(9) + e_type.to_bytes(2, 'little') + bytes(46)
+
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'main').write_bytes(elf(2))
+    (tmp_path / 'lib' / 'util.o').write_bytes(elf(1))
+    (tmp_path / 'lib' / 'libutil.a').write_bytes(b'!<arch>\n')
+    (tmp_path / 'README').write_text('Ünïcödé text is not a binary')
+    assert not utils.is_binary(tmp_path / 'README')
+    assert utils.get_binary_format(tmp_path / 'lib' / 'libutil.a') == 'ar'
+    assert decompiler.discover_binaries(tmp_path) == [tmp_path / 'lib' / 'libutil.a',
+                                                      tmp_path / 'lib' / 'util.o',
+                                                      tmp_path / 'main']
+    assert tmp_path / 'lib' / 'util.o' not in \
+        decompiler.discover_binaries(tmp_path, skip_object_files=True)
+    # Identical binaries are decompiled once and fanned out to every path
+    hard_link = tmp_path / 'link.lib'
+    hard_link.hardlink_to(c_bin)
+    copied_bin = tmp_path / 'copy.lib'
+    copied_bin.write_bytes(c_bin.read_bytes())
+    functions = decompiler.decompile([c_bin, hard_link, copied_bin])
+    assert sorted(str(f.path) for f in functions) == \
+        sorted(str(p) for p in [c_bin, hard_link, copied_bin] for _ in range(8))
+
+
+@pytest.mark.skipif(not all(shutil.which(c) for c in ['gcc', 'objdump', 'nm']),
+                    reason='binutils and gcc are required')
+def test_objdump(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(subprocess, 'run', SUBPROCESS_RUN)
+    source = tmp_path / 'main.c'
+    source.write_text('int add(int a, int b) { return a + b; }\n'
+                      'int main(void) { return add(1, 2); }\n')
+    binary = tmp_path / 'main'
+    subprocess.run(['gcc', '-O0', '-o', str(binary), str(source)], check=True)
+    functions = {f.name: f for f in Objdump().decompile(binary)}
+    assert {'add', 'main'} <= functions.keys()
+    assert functions['main'].definition == ''
+    assert functions['main'].assembly and 'add' in functions['main'].assembly
+    assert functions['main'].path == binary
+    assert [f.name for f in Objdump(function_names=['add']).decompile(binary)] == ['add']
+    monkeypatch.setitem(decompiler.DECOMPILER, 'class_path', decompiler.DECOMPILER['class_path'])
+    decompiler.set_decompiler('objdump')
+    assert decompiler.get_decompiler_class() is Objdump
+
+
+def test_worker_count(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(utils, 'CGROUP_PATH', tmp_path)
+    monkeypatch.setattr(utils.os, 'sched_getaffinity', lambda _: set(range(64)), raising=False)
+    assert utils.get_cpu_limit() == 64
+    (tmp_path / 'cpu.max').write_text('250000 100000\n')
+    assert utils.get_cpu_limit() == 3
+    (tmp_path / 'memory.max').write_text(f'{10 * 2 ** 30}\n')
+    (tmp_path / 'memory.current').write_text(f'{2 ** 30}\n')
+    memory = utils.get_memory_limit()
+    assert memory is not None and memory <= 9 * 2 ** 30
+    # Workers are admitted against the memory budget as well as the CPU quota
+    assert utils.get_worker_count(worker_memory=memory // 2) == 2
+    assert utils.get_worker_count(worker_memory=2 * memory) == 1
+    assert utils.get_worker_count(worker_memory=1) == 3
+    assert utils.get_worker_count(max_workers=8, worker_memory=2 * memory) == 8
+    # Ghidra's heap is scaled to the size of the largest binary
+    small, large = tmp_path / 'small', tmp_path / 'large'
+    small.write_bytes(bytes(16))
+    large.write_bytes(bytes(2 ** 20))
+    assert Ghidra.get_worker_memory([small, large]) == Ghidra.BASE_MEMORY + \
+        Ghidra.MEMORY_PER_BYTE * 2 ** 20 + Ghidra.DECOMPILER_PROCESS_MEMORY
+    # as well as the native decompiler process of each thread
+    assert Ghidra.get_worker_memory([small], max_memory=2 ** 30, threads=4) == \
+        2 ** 30 + 4 * Ghidra.DECOMPILER_PROCESS_MEMORY
+    assert DecompileConfig(worker_memory=2 ** 30).get_decompiler_kwargs(Ghidra) == \
+        {'max_memory': 2 ** 30}
+    assert DecompileConfig(worker_memory=2 ** 30).get_decompiler_kwargs(Objdump) == {}
 
 
 def test_extractors_config() -> None:
@@ -141,6 +605,24 @@ def test_extractors_config() -> None:
         extractor.get_extractor('nonexistant')
 
 
+class ExtensionExtractor(extractor.Extractor):
+    EXTENSIONS = ['.py']
+
+    def extract(self, file_path: utils.PathLike,
+                repo_path: Optional[utils.PathLike] = None) -> Sequence[SourceFunction]:
+        return []
+
+    def get_extractable_files(self, path: utils.PathLike) -> Sequence[Path]:
+        raise AssertionError('The file system should not be accessed')
+
+
+def test_is_extractable() -> None:
+    # Files are recognized by their extensions alone
+    assert ExtensionExtractor().is_extractable('does/not/exist.PY')
+    assert not ExtensionExtractor().is_extractable('main.c')
+    assert CExtractor().is_extractable('include/util.h')
+
+
 @utils.rate_limiter(max_rpm=500, max_tpm=30000)
 def print_prompt(prompt: str) -> None:
     print(prompt)
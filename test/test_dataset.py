@@ -1,8 +1,21 @@
+from dataclasses import replace
+import json
+import shutil
+import subprocess
+import tarfile
+import zipfile
 from pathlib import Path
 
+from git import Repo
 import pytest
+from codablellm.core import decompiler
 from codablellm.core.extractor import ExtractConfig
 from codablellm.dataset import *
+from codablellm.decompilers.objdump import Objdump
+
+# The real subprocess.run, before it is mocked by conftest
+SUBPROCESS_RUN = subprocess.run
+DECOMPILE_MANY = decompiler._decompile_many
 
 
 def test_save_dataset(tmp_path: Path) -> None:
@@ -17,6 +30,33 @@ def test_save_dataset(tmp_path: Path) -> None:
         empty_dataset.save_as(tmp_path / 'dataset.unknown')
 
 
+def test_streaming_save(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    (tmp_path / 'main.c').write_text('int util(void) { return 1; }\n'
+                                     'int main(void) { return util(); }\n')
+    dataset = SourceCodeDataset.from_repository(tmp_path,
+                                                SourceCodeDatasetConfig(
+                                                    generation_mode='path'
+                                                ))
+    first, second = dataset.values()
+    first.set_metadata({'custom_field': True})
+    second.set_metadata({'other_field': 'value'})
+    # Streamed files have the same contents as the files pandas would write
+    dataset.save_as(tmp_path / 'dataset.jsonl')
+    dataset.to_df().to_json(tmp_path / 'expected.jsonl', lines=True, orient='records')
+    assert [json.loads(l) for l in (tmp_path / 'dataset.jsonl').read_text().splitlines()] == \
+        [json.loads(l) for l in (tmp_path / 'expected.jsonl').read_text().splitlines()]
+    dataset.save_as(tmp_path / 'dataset.tsv')
+    dataset.to_df().to_csv(tmp_path / 'expected.tsv', sep='\t')
+    assert (tmp_path / 'dataset.tsv').read_text() == (tmp_path / 'expected.tsv').read_text()
+    capsys.readouterr()
+    dataset.save_as('-')
+    assert capsys.readouterr().out == (tmp_path / 'dataset.jsonl').read_text()
+    save_source_functions(iter(dataset.values()), tmp_path / 'functions.jsonl')
+    assert len((tmp_path / 'functions.jsonl').read_text().splitlines()) == len(dataset)
+    with pytest.raises(ValueError):
+        save_source_functions(iter(dataset.values()), tmp_path / 'functions.json')
+
+
 def test_source_dataset(c_repository: Path) -> None:
     dataset = SourceCodeDataset.from_repository(c_repository,
                                                 SourceCodeDatasetConfig(
@@ -108,3 +148,423 @@ def test_decompiled_dataset(c_repository: Path, c_bin: Path) -> None:
                                                                              for _, d in mappings],
                                                    'class_names': [{uid: f.class_name for uid, f in d.items()}
                                                                    for _, d in mappings]}).set_index('decompiled_uid').to_dict()
+
+
+def test_decompile_source_names_only(tmp_path: Path) -> None:
+    (tmp_path / 'main.c').write_text('int util(void) { return 1; }\n'
+                                     'int main(void) { return util(); }\n')
+    source_dataset = SourceCodeDataset.from_repository(tmp_path,
+                                                       SourceCodeDatasetConfig(
+                                                           generation_mode='path'
+                                                       ))
+    config = DecompiledCodeDatasetConfig()
+    decompile_config = DecompiledCodeDataset._get_decompile_config(config, source_dataset)
+    assert decompile_config.function_names == {'main', 'util'}
+    # Custom mappers may map functions with other names, so nothing is skipped
+    config = DecompiledCodeDatasetConfig(mapper=lambda d, s: True)
+    assert DecompiledCodeDataset._get_decompile_config(config, source_dataset).function_names \
+        is None
+
+
+class FirstCandidateMapper(BatchMapper):
+
+    def map_functions(self, functions, candidates):
+        return [list(candidates.get(f.name, []))[:1] for f in functions]
+
+
+class FailingMapper(BatchMapper):
+
+    def map_functions(self, functions, candidates):
+        raise RuntimeError('Mapping failed')
+
+
+def test_batch_mapper(tmp_path: Path) -> None:
+    (tmp_path / 'main.c').write_text(''.join(f'int f{i}(void) {{ return {i}; }}\n'
+                                             for i in range(8)))
+    source_dataset = SourceCodeDataset.from_repository(tmp_path,
+                                                       SourceCodeDatasetConfig(
+                                                           generation_mode='path'
+                                                       ))
+    decompiled_functions = [DecompiledFunction.from_decompiled_json({
+        'path': str(tmp_path / 'main'), 'name': name, 'definition': '', 'assembly': '',
+        'architecture': 'x86'
+    }) for name in ['f0', 'f3', 'missing', 'f7']]
+    for mapper in [default_mapper, FirstCandidateMapper()]:
+        for workers in [1, 2]:
+            dataset = DecompiledCodeDataset._from_dataset_and_decompiled(
+                source_dataset, decompiled_functions, False, mapper, mapping_workers=workers,
+                mapping_batch_size=1
+            )
+            assert sorted(f.name for f, _ in dataset.values()) == ['f0', 'f3', 'f7']
+            assert all([s.name for s in d.values()] == [f.name] for f, d in dataset.values())
+    # Functions are never silently left unmapped if a batch fails
+    with pytest.raises(ValueError):
+        DecompiledCodeDataset._from_dataset_and_decompiled(
+            source_dataset, decompiled_functions, False, FailingMapper(), mapping_workers=2,
+            mapping_batch_size=1
+        )
+    with pytest.raises(ValueError):
+        DecompiledCodeDatasetConfig(mapping_workers=0)
+
+
+def test_strip_functions(tmp_path: Path) -> None:
+    functions = [DecompiledFunction.from_decompiled_json({
+        'path': str(tmp_path / b), 'name': f'f{i}',
+        'definition': f'int f{i}(void) {{ return helper({i}); }}',
+        'assembly': f'f{i}:\n\tcall helper', 'architecture': 'x86'
+    }) for b in ['a', 'b'] for i in range(300)]
+    stripped_functions = strip_functions(functions, max_workers=2)
+    assert [f.uid for f in stripped_functions] == [f.uid for f in functions]
+    assert stripped_functions[0].to_json() == functions[0].to_stripped().to_json()
+    # Every call to the helper of a binary is stripped to the same name, which differs between
+    # binaries
+    helpers = {f.path.name: set() for f in functions}
+    for function in stripped_functions:
+        assert 'helper' not in function.definition and 'helper' not in function.assembly
+        helpers[function.path.name].add(function.assembly.split()[-1])
+    assert all(len(h) == 1 for h in helpers.values()) and helpers['a'] != helpers['b']
+
+
+@pytest.mark.skipif(not all(shutil.which(c) for c in ['gcc', 'objdump', 'nm']),
+                    reason='binutils and gcc are required')
+def test_pipeline_mapping(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(subprocess, 'run', SUBPROCESS_RUN)
+    monkeypatch.setattr(decompiler, '_decompile_many', DECOMPILE_MANY)
+    monkeypatch.setitem(decompiler.DECOMPILER, 'class_path', decompiler.DECOMPILER['class_path'])
+    decompiler.set_decompiler('objdump')
+    repository = tmp_path / 'repository'
+    repository.mkdir()
+    (repository / 'main.c').write_text('int add(int a, int b) { return a + b; }\n'
+                                       'int main(void) { return add(1, 2); }\n')
+    bins = [tmp_path / 'a', tmp_path / 'b']
+    for binary in bins:
+        subprocess.run(['gcc', '-O0', '-o', str(binary), str(repository / 'main.c')],
+                       check=True)
+    source_dataset = SourceCodeDataset.from_repository(repository,
+                                                       SourceCodeDatasetConfig(
+                                                           generation_mode='path'
+                                                       ))
+    datasets = [DecompiledCodeDataset.from_source_code_dataset(
+        source_dataset, bins,
+        DecompiledCodeDatasetConfig(strip=True, pipeline_mapping=pipeline_mapping,
+                                    decompiler_config=decompiler.DecompileConfig(batch_size=1))
+    ) for pipeline_mapping in [True, False]]
+    # Functions are not pipelined if they are mapped or stripped by other processes
+    iter_mappings = DecompiledCodeDataset._iter_mappings
+    monkeypatch.setattr(DecompiledCodeDataset, '_iter_mappings', None)
+    datasets.extend(DecompiledCodeDataset.from_source_code_dataset(
+        source_dataset, bins,
+        DecompiledCodeDatasetConfig(strip=True, mapping_workers=mapping_workers,
+                                    strip_workers=strip_workers,
+                                    decompiler_config=decompiler.DecompileConfig(batch_size=1))
+    ) for mapping_workers, strip_workers in [(2, None), (1, 2)])
+    assert len(datasets[0]) == 4
+    for dataset in datasets[1:]:
+        assert sorted(json.dumps(f.to_json(), sort_keys=True) for f, _ in dataset.values()) == \
+            sorted(json.dumps(f.to_json(), sort_keys=True) for f, _ in datasets[0].values())
+    # Pipelining is batch-granular, so the first batch is mapped before the last batch is
+    # decompiled
+    monkeypatch.setattr(DecompiledCodeDataset, '_iter_mappings', iter_mappings)
+    events = []
+    iter_batches = decompiler._CallableDecompiler.iter_batches
+
+    def recording_iter_batches(self: decompiler._CallableDecompiler
+                               ) -> Iterator[List[DecompiledFunction]]:
+        for batch in iter_batches(self):
+            if batch:
+                events.append('decompiled')
+            yield batch
+
+    def recording_mapper(function: DecompiledFunction, uid: Union[SourceFunction, str]) -> bool:
+        events.append('mapped')
+        return default_mapper(function, uid)
+
+    monkeypatch.setattr(decompiler._CallableDecompiler, 'iter_batches', recording_iter_batches)
+    # Identical binaries are only decompiled once
+    distinct_bins = [tmp_path / 'c', tmp_path / 'd']
+    for binary, optimization in zip(distinct_bins, ['-O0', '-O1']):
+        subprocess.run(['gcc', optimization, '-o', str(binary), str(repository / 'main.c')],
+                       check=True)
+    dataset = DecompiledCodeDataset.from_source_code_dataset(
+        source_dataset, distinct_bins,
+        DecompiledCodeDatasetConfig(mapper=recording_mapper,
+                                    decompiler_config=decompiler.DecompileConfig(batch_size=1,
+                                                                                 max_workers=1))
+    )
+    assert len(dataset) == 4
+    assert events.count('decompiled') == 2
+    assert events.index('mapped') < len(events) - events[::-1].index('decompiled') - 1
+
+
+def test_decompiled_dataset_lookup(tmp_path: Path) -> None:
+    (tmp_path / 'main.c').write_text('int util(void) { return 1; }\n'
+                                     'int main(void) { return util(); }\n')
+    source_dataset = SourceCodeDataset.from_repository(tmp_path,
+                                                       SourceCodeDatasetConfig(
+                                                           generation_mode='path'
+                                                       ))
+    util, main = sorted(source_dataset.values(), key=lambda f: f.name, reverse=True)
+    decompiled_functions = [DecompiledFunction.from_decompiled_json({
+        'path': str(tmp_path / b), 'name': n, 'definition': '', 'assembly': '',
+        'architecture': 'x86'
+    }) for b in ['a', 'b'] for n in ['main', 'util']]
+    dataset = DecompiledCodeDataset((d, SourceCodeDataset([util if d.name == 'util' else main]))
+                                    for d in decompiled_functions)
+    assert [d.uid for d, _ in dataset.lookup(util)] == \
+        [d.uid for d in decompiled_functions if d.name == 'util']
+    assert dataset.lookup(main.uid) == dataset.lookup(main)
+    assert dataset.lookup('missing') == []
+    assert dataset.lookup_many([util, 'missing', main.uid]) == \
+        [dataset.lookup(util), [], dataset.lookup(main)]
+    # Candidates are stored once and shared by every decompiled function mapped to them
+    assert len(dataset._source_functions) == 2
+    assert dataset[decompiled_functions[0]] == (decompiled_functions[0], SourceCodeDataset([main]))
+    # A later mapping of the same decompiled function replaces the earlier one
+    dataset = DecompiledCodeDataset([(decompiled_functions[0], SourceCodeDataset([main])),
+                                     (decompiled_functions[1], SourceCodeDataset([util])),
+                                     (decompiled_functions[0], SourceCodeDataset([util]))])
+    assert list(dataset) == [decompiled_functions[0].uid, decompiled_functions[1].uid]
+    assert list(dataset[decompiled_functions[0]][1].values()) == [util]
+    assert dataset.lookup(main) == []
+
+
+def test_decompiled_dataset_df(tmp_path: Path) -> None:
+    (tmp_path / 'main.c').write_text('int util(void) { return 1; }\n'
+                                     'int main(void) { return util(); }\n')
+    source_dataset = SourceCodeDataset.from_repository(tmp_path,
+                                                       SourceCodeDatasetConfig(
+                                                           generation_mode='path'
+                                                       ))
+    source_df = source_dataset.to_df()
+    # Repeated strings are stored as categoricals, unless some of them are missing
+    assert source_df['path'].dtype == 'category' and source_df['language'].dtype == 'category'
+    assert source_df['class_name'].dtype == object
+    decompiled_functions = [DecompiledFunction.from_decompiled_json({
+        'path': str(tmp_path / 'main'), 'name': f.name, 'definition': '', 'assembly': '',
+        'architecture': 'x86'
+    }) for f in source_dataset.values()]
+    decompiled_functions[0].set_metadata({'address': 16})
+    decompiled_functions[1].set_metadata({'binaries': ['main']})
+    list(source_dataset.values())[1].set_metadata({'translation_units': ['main.c']})
+    dataset = DecompiledCodeDataset((d, SourceCodeDataset([s]))
+                                    for d, s in zip(decompiled_functions, source_dataset.values()))
+    # The columns are found without building the rows
+    assert dataset.get_columns() == list(dict.fromkeys(c for r in dataset.iter_rows() for c in r))
+    assert source_dataset.get_columns() == \
+        list(dict.fromkeys(c for r in source_dataset.iter_rows() for c in r))
+    df = dataset.to_df()
+    assert df['bin'].dtype == 'category'
+    assert df['address'].tolist()[0] == 16
+    assert df.loc[decompiled_functions[1].uid, 'source_files'] == \
+        {f.uid: str(f.path) for f in source_dataset.values() if f.name == decompiled_functions[1].name}
+    assert DecompiledCodeDataset([]).to_df().empty
+
+
+@pytest.mark.skipif(not all(shutil.which(c) for c in ['gcc', 'objdump', 'nm']),
+                    reason='binutils and gcc are required')
+def test_dwarf_mapper(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(subprocess, 'run', SUBPROCESS_RUN)
+    repository = tmp_path / 'repository'
+    (repository / 'tools').mkdir(parents=True)
+    (repository / 'main.c').write_text('int util(int x);\n'
+                                       'static int helper(int x)\n'
+                                       '{\n'
+                                       '    return x * 2;\n'
+                                       '}\n'
+                                       'int main(void) { return helper(1) + util(2); }\n')
+    (repository / 'tools' / 'util.c').write_text('static int helper(int x) { return x + 3; }\n'
+                                                 'int util(int x) { return helper(x); }\n')
+    binary = tmp_path / 'app'
+    subprocess.run(['gcc', '-g', '-O0', '-o', str(binary), str(repository / 'main.c'),
+                    str(repository / 'tools' / 'util.c')], check=True)
+    source_dataset = SourceCodeDataset.from_repository(repository,
+                                                       SourceCodeDatasetConfig(
+                                                           generation_mode='path'
+                                                       ))
+    helpers = [f for f in Objdump().decompile(binary) if f.name == 'helper']
+    candidates = [s for s in source_dataset.values() if s.name == 'helper']
+    assert len(helpers) == len(candidates) == 2
+    # Matching by name maps each helper to both static helpers, while the debug information maps
+    # each helper to the file it is defined in
+    assert all(default_mapper(h, s) for h in helpers for s in candidates)
+    mapper = DwarfMapper()
+    mapped = [[s.path.name for s in candidates if mapper(h, s)] for h in helpers]
+    assert sorted(mapped) == [['main.c'], ['util.c']]
+    # Both helpers are kept apart in the dataset by their addresses
+    assert len({h.uid for h in helpers}) == 2
+    assert helpers[0].with_path(tmp_path / 'copy').uid == \
+        f"{tmp_path / 'copy'}::{helpers[0].uid.rsplit('::', maxsplit=1)[1]}"
+    dataset = DecompiledCodeDataset._from_dataset_and_decompiled(source_dataset,
+                                                                 Objdump().decompile(binary),
+                                                                 False, mapper)
+    mapped = [(f.uid, [s.path.name for s in d.values()])
+              for f, d in dataset.values() if f.name == 'helper']
+    assert sorted(m for _, m in mapped) == [['main.c'], ['util.c']]
+    assert {u for u, _ in mapped} == {h.uid for h in helpers}
+    assert dataset.get(f'{binary}::main') is not None
+    # Source code that was moved after the build is found through the prefix map
+    moved = tmp_path / 'moved'
+    shutil.move(repository, moved)
+    moved_candidates = [s.with_path(moved / s.path.relative_to(repository))
+                        for s in candidates]
+    assert not any(DwarfMapper()(h, s) for h in helpers for s in moved_candidates)
+    mapper = DwarfMapper(prefix_map={repository: moved})
+    assert sorted([s.path.name for s in moved_candidates if mapper(h, s)] for h in helpers) == \
+        [['main.c'], ['util.c']]
+
+
+def test_compile_commands_source_dataset(tmp_path: Path) -> None:
+    repository = tmp_path / 'repository'
+    (repository / 'include').mkdir(parents=True)
+    (repository / 'include' / 'util.h').write_text('static int util(void) { return 1; }\n')
+    (repository / 'main.c').write_text('#include "util.h"\n'
+                                       '#include <stdio.h>\n'
+                                       'int main(void) { return util(); }\n')
+    (repository / 'unused.c').write_text('int unused(void) { return 0; }\n')
+    compile_commands = tmp_path / 'compile_commands.json'
+    compile_commands.write_text(json.dumps([{'directory': str(repository),
+                                             'file': 'main.c',
+                                             'command': 'cc -Iinclude -o main main.c'}]))
+    dataset = SourceCodeDataset.from_repository(repository,
+                                                SourceCodeDatasetConfig(
+                                                    generation_mode='path',
+                                                    extract_config=ExtractConfig(
+                                                        compile_commands=compile_commands
+                                                    )
+                                                ))
+    assert {f.name for f in dataset.values()} == {'main', 'util'}
+    for function in dataset.values():
+        assert function.metadata['translation_units'] == [str((repository / 'main.c').resolve())]
+    # Compilation databases generated elsewhere are remapped onto the repository
+    build_dir = Path('/build/repository')
+    compile_commands.write_text(json.dumps([{'directory': str(build_dir), 'file': 'main.c',
+                                             'command': f'cc -I{build_dir / "include"} -o main '
+                                             'main.c'}]))
+    config = SourceCodeDatasetConfig(generation_mode='path',
+                                     extract_config=ExtractConfig(
+                                         compile_commands=compile_commands,
+                                         compile_commands_prefix_map={build_dir: repository}
+                                     ))
+    dataset = SourceCodeDataset.from_repository(repository, config)
+    assert {f.name for f in dataset.values()} == {'main', 'util'}
+    # and onto the copy of a repository that is extracted in a temporary directory
+    config = SourceCodeDatasetConfig(generation_mode='temp',
+                                     extract_config=replace(config.extract_config,
+                                                            transform=lambda s: s))
+    dataset = SourceCodeDataset.from_repository(repository, config)
+    assert {f.name for f in dataset.values()} == {'main', 'util'}
+    # Translation units still refer to the original repository
+    for function in dataset.values():
+        assert function.metadata['translation_units'] == [str((repository / 'main.c').resolve())]
+
+
+def test_compile_commands_temp_narrowing(tmp_path: Path) -> None:
+    repository = tmp_path / 'repository'
+    repository.mkdir()
+    for name in ['a', 'b']:
+        (repository / f'{name}.c').write_text(f'static int helper(void) {{ return 0; }}\n'
+                                               f'int {name}(void) {{ return helper(); }}\n')
+    build_dir = Path('/build/repository')
+    compile_commands = tmp_path / 'compile_commands.json'
+    compile_commands.write_text(json.dumps([{'directory': str(build_dir), 'file': f'{name}.c',
+                                             'command': f'cc -o {name} {name}.c'}
+                                            for name in ['a', 'b']]))
+    extract_config = ExtractConfig(compile_commands=compile_commands,
+                                   compile_commands_prefix_map={build_dir: repository},
+                                   transform=lambda s: s)
+    source_dataset = SourceCodeDataset.from_repository(repository,
+                                                       SourceCodeDatasetConfig(
+                                                           generation_mode='temp',
+                                                           extract_config=extract_config
+                                                       ))
+    assert len(source_dataset) == 4
+    decompiled_functions = [DecompiledFunction.from_decompiled_json({
+        'path': str(repository / name), 'name': 'helper', 'definition': '', 'assembly': '',
+        'architecture': 'x86'
+    }) for name in ['a', 'b']]
+    # The helper of each binary is only mapped to the helper of its own translation unit
+    dataset = DecompiledCodeDataset._from_dataset_and_decompiled(
+        source_dataset, decompiled_functions, False, default_mapper,
+        translation_unit_outputs=DecompiledCodeDataset._get_translation_unit_outputs(
+            extract_config
+        )
+    )
+    assert len(dataset) == 2
+    for decompiled_function, source_functions in dataset.values():
+        source_function, = source_functions.values()
+        assert source_function.path.name == f'{decompiled_function.path.name}.c'
+
+
+def test_archive_source_dataset(tmp_path: Path) -> None:
+    repository = tmp_path / 'repository'
+    repository.mkdir()
+    for file_number in range(1, 4):
+        (repository / f'file{file_number}.c').write_text(
+            '\n'.join(f'void function{file_number}_{n}() {{ }}' for n in range(3))
+        )
+    (repository / 'README.md').write_text('# repository')
+    tarball = tmp_path / 'repository.tar.gz'
+    with tarfile.open(tarball, 'w:gz') as tar:
+        tar.add(repository, arcname='repository')
+    zip_path = tmp_path / 'repository.zip'
+    with zipfile.ZipFile(zip_path, 'w') as zip_file:
+        for file in repository.iterdir():
+            zip_file.write(file, f'repository/{file.name}')
+    for archive in [tarball, zip_path]:
+        dataset = SourceCodeDataset.from_archive(archive, ExtractConfig(use_checkpoint=False))
+        assert len(dataset) == 9
+        function = dataset['repository::file1.c::function1_0']
+        assert function.path == Path('repository/file1.c')
+        assert function.definition == 'void function1_0() { }'
+    dataset = SourceCodeDataset.from_archive(tarball,
+                                             ExtractConfig(use_checkpoint=False,
+                                                           exclude_subpaths={Path('repository/file1.c')}))
+    assert len(dataset) == 6
+
+
+def test_revision_source_dataset(tmp_path: Path) -> None:
+    repository = tmp_path / 'repository'
+    repo = Repo.init(repository)
+    (repository / 'src').mkdir()
+    (repository / 'src' / 'main.c').write_text('int main(void) { return 0; }\n')
+    (repository / 'src' / 'copy.c').write_text('int main(void) { return 0; }\n')
+    repo.index.add(['src/main.c', 'src/copy.c'])
+    first_commit = repo.index.commit('First commit')
+    (repository / 'src' / 'main.c').write_text('int main(void) { return 1; }\n')
+    repo.index.add(['src/main.c'])
+    repo.index.commit('Second commit')
+    dataset = SourceCodeDataset.from_revision(repository, revision=first_commit.hexsha,
+                                              config=ExtractConfig(use_checkpoint=False))
+    assert len(dataset) == 2
+    function = dataset['repository::src::main.c::main']
+    assert function.definition == 'int main(void) { return 0; }'
+    assert function.metadata['revision'] == first_commit.hexsha
+    assert function.metadata['blob_sha'] == \
+        dataset['repository::src::copy.c::main'].metadata['blob_sha']
+    dataset = SourceCodeDataset.from_revision(repository,
+                                              config=ExtractConfig(use_checkpoint=False))
+    assert dataset['repository::src::main.c::main'].definition == 'int main(void) { return 1; }'
+
+
+def test_history_source_dataset(tmp_path: Path) -> None:
+    repository = tmp_path / 'repository'
+    repo = Repo.init(repository)
+    (repository / 'lib.c').write_text('int lib(void) { return 0; }\n')
+    (repository / 'main.c').write_text('int main(void) { return 0; }\n')
+    repo.index.add(['lib.c', 'main.c'])
+    repo.create_tag('v1', ref=repo.index.commit('v1'))
+    (repository / 'main.c').write_text('int main(void) { return 1; }\n')
+    repo.index.add(['main.c'])
+    repo.create_tag('v2', ref=repo.index.commit('v2'))
+    repo.create_tag('v3', ref=repo.index.commit('v3'))
+    dataset = SourceCodeDataset.from_history(repository, ['v1', 'v2', 'v3'],
+                                             config=ExtractConfig(use_checkpoint=False))
+    assert len(dataset) == 3
+    lib, = [f for f in dataset.values() if f.name == 'lib']
+    assert lib.metadata['revisions'] == ['v1', 'v2', 'v3']
+    old_main, new_main = sorted((f for f in dataset.values() if f.name == 'main'),
+                                key=lambda f: f.metadata['first_seen'])
+    assert old_main.definition == 'int main(void) { return 0; }'
+    assert (old_main.metadata['first_seen'], old_main.metadata['last_seen']) == ('v1', 'v1')
+    assert (new_main.metadata['first_seen'], new_main.metadata['last_seen']) == ('v2', 'v3')
+    assert new_main.uid == f'repository::main.c@{new_main.metadata["blob_sha"][:12]}::main'